@@ -245,9 +245,14 @@ def get_portfolio_summary(
 
     total_value = sum(holding_values.values())
 
+    # Bucket holdings by tier in one pass instead of rescanning per tier
+    holdings_by_tier = {tier: [] for tier in Tier}
+    for h in holdings:
+        holdings_by_tier[h.tier].append(h)
+
     tiers = []
     for tier in [Tier.CORE, Tier.GROWTH, Tier.GAMBLE]:
-        tier_holdings = [h for h in holdings if h.tier == tier]
+        tier_holdings = holdings_by_tier[tier]
         tier_value = sum(holding_values.get(h.id, Decimal("0")) for h in tier_holdings)
         target = TARGET_ALLOCATIONS[tier]
         actual = (tier_value / total_value * 100) if total_value else Decimal("0")
@@ -546,8 +551,11 @@ def get_dashboard(
 
     total_value = sum(d["market_value"] for d in holding_data)
 
-    # Group by tier
+    # Group by tier in one pass
     tier_order = [Tier.CORE, Tier.GROWTH, Tier.GAMBLE]
+    data_by_tier = {tier: [] for tier in Tier}
+    for d in holding_data:
+        data_by_tier[d["holding"].tier].append(d)
     tiers = []
     total_pnl_7d = Decimal("0")
     total_ref_7d = Decimal("0")
@@ -555,7 +563,7 @@ def get_dashboard(
     total_ref_30d = Decimal("0")
 
     for tier in tier_order:
-        tier_holdings = [d for d in holding_data if d["holding"].tier == tier]
+        tier_holdings = data_by_tier[tier]
         tier_mv = sum(d["market_value"] for d in tier_holdings)
         tier_pnl_7d = sum(d["pnl_7d"] for d in tier_holdings)
         tier_ref_7d = sum(d["ref_7d_value"] for d in tier_holdings)
@@ -19,9 +19,20 @@ class Settings(BaseSettings):
     tushare_token: str = ""
     fred_api_key: str = ""
 
+    # Collectors / storage
+    collector_fetch_workers: int = 4  # Collectors fetched concurrently per collection job (1 = one at a time)
+    storage_upsert_page_size: int = 1000  # Rows per collector upsert statement (0 = all in one)
+
     # LLM
     llm_base_url: str = "https://test-anas.feihua100.com/gw/v1"
     llm_api_key: str = ""
+    llm_max_concurrency: int = 8  # Max in-flight LLM requests per report
+    llm_holdings_per_prompt: int = 5  # Daily holdings packed into one AI prompt (0 = all in one)
+    llm_cache_ttl: int = 0  # Seconds report LLM answers are reused for identical prompts (0 = off)
+    llm_cache_path: str = ""  # Optional SQLite file persisting the report LLM cache across restarts
+    llm_prompt_cache_key: str = ""  # Prefix-cache key sent with report advice requests ("" = off)
+    llm_holding_cache_ttl: int = 7 * 86400  # Seconds a daily holding analysis is reused while its prompt is unchanged
+    report_parallel_sections: bool = True  # Build DB-only weekly report sections and run daily/weekly report analyzers on worker threads
 
     # Auth
     jwt_secret_key: str = "change-me-in-production"
@@ -34,6 +45,7 @@ class Settings(BaseSettings):
     telegram_bot_token: str = ""
     telegram_chat_id: str = ""
     telegram_enabled: bool = False
+    telegram_max_concurrency: int = 5  # Max in-flight sends per notification batch
 
     model_config = SettingsConfigDict(
         env_file=".env",
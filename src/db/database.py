@@ -1,4 +1,6 @@
 """Database connection and session management."""
+import functools
+import json
 import logging
 
 from sqlalchemy import create_engine, text, inspect
@@ -15,7 +17,13 @@ class Base(DeclarativeBase):
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=settings.debug)
+# Compact, UTF-8 JSON for JSON columns: report content is mostly Chinese text,
+# which the default ensure_ascii encoding inflates into \uXXXX escapes
+engine = create_engine(
+    settings.database_url,
+    echo=settings.debug,
+    json_serializer=functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":")),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -42,6 +50,34 @@ def _add_column_if_not_exists(engine, table: str, column: str, column_def: str):
         logger.info(f"Added column {column} to {table}")
 
 
+def _add_index_if_not_exists(engine, table: str, column: str):
+    """Add a single-column index to a table if it doesn't already exist."""
+    insp = inspect(engine)
+    try:
+        indexes = [i["name"] for i in insp.get_indexes(table)]
+    except Exception:
+        return  # Table doesn't exist yet
+    index_name = f"ix_{table}_{column}"
+    if index_name not in indexes:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX `{index_name}` ON `{table}`(`{column}`)"))
+        logger.info(f"Added index {index_name}")
+
+
+def _add_composite_index_if_not_exists(engine, table: str, index_name: str, columns: list):
+    """Add a named multi-column index to a table if it doesn't already exist."""
+    insp = inspect(engine)
+    try:
+        indexes = [i["name"] for i in insp.get_indexes(table)]
+    except Exception:
+        return  # Table doesn't exist yet
+    if index_name not in indexes:
+        column_list = ", ".join(f"`{c}`" for c in columns)
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX `{index_name}` ON `{table}`({column_list})"))
+        logger.info(f"Added index {index_name}")
+
+
 def _migrate_user_columns():
     """Add user_id columns to existing tables if they don't exist."""
     for table in ["holdings", "watchlist", "signals", "generated_report"]:
@@ -96,6 +132,20 @@ def _migrate_tier_rename():
         logger.info("Updated tier enum column definition")
 
 
+def _migrate_sector_name_indexes():
+    """Index sector names so report lookups by sector don't scan the table."""
+    for table in ["sector_snapshots", "sector_flow_snapshots"]:
+        _add_index_if_not_exists(engine, table, "name")
+
+
+def _migrate_fundamental_lookup_index():
+    """Index fundamentals by (symbol, market, date) for latest-per-symbol lookups."""
+    _add_composite_index_if_not_exists(
+        engine, "fundamental_snapshots", "ix_fundamental_symbol_market_date",
+        ["symbol", "market", "snapshot_date"],
+    )
+
+
 def init_db():
     """Create all tables and run migrations."""
     # Import all model modules so they register with Base.metadata
@@ -109,3 +159,5 @@ def init_db():
     # Run migrations for existing tables
     _migrate_user_columns()
     _migrate_tier_rename()
+    _migrate_sector_name_indexes()
+    _migrate_fundamental_lookup_index()
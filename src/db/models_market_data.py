@@ -100,7 +100,7 @@ class SectorSnapshot(Base):
     snapshot_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
     sector_type: Mapped[str] = mapped_column(String(20), nullable=False)  # "industry" or "concept"
     code: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
-    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    name: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     stock_count: Mapped[int] = mapped_column(Integer, nullable=False)
     avg_price: Mapped[Decimal] = mapped_column(DECIMAL(18, 4), nullable=False)
     change_pct: Mapped[Decimal] = mapped_column(DECIMAL(10, 4), nullable=False)
@@ -158,6 +158,8 @@ class FundamentalSnapshot(Base):
 
     __table_args__ = (
         UniqueConstraint('symbol', 'snapshot_date', name='uq_fundamental_symbol_date'),
+        # Latest-snapshot-per-(symbol, market) lookups in the report generators
+        Index("ix_fundamental_symbol_market_date", "symbol", "market", "snapshot_date"),
         {"mysql_charset": "utf8mb4"},
     )
 
@@ -170,7 +172,7 @@ class SectorFlowSnapshot(Base):
     snapshot_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
     sector_type: Mapped[str] = mapped_column(String(20), nullable=False)  # "industry" or "concept"
     code: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
-    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    name: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     main_net_inflow: Mapped[Decimal] = mapped_column(DECIMAL(20, 4), nullable=False)
     super_large_inflow: Mapped[Decimal] = mapped_column(DECIMAL(20, 4), nullable=False)
     large_inflow: Mapped[Decimal] = mapped_column(DECIMAL(20, 4), nullable=False)
@@ -1,5 +1,6 @@
 """APScheduler-based scheduled task framework."""
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, Optional
 from zoneinfo import ZoneInfo
 
@@ -30,6 +31,26 @@ WEEKLY_SCHEDULE = {
 }
 
 
+def _fetch_pool() -> ThreadPoolExecutor:
+    """Worker pool for a collection job's network fetches."""
+    from src.config import get_settings
+    return ThreadPoolExecutor(max_workers=max(1, get_settings().collector_fetch_workers))
+
+
+def _prefetch(pool: ThreadPoolExecutor, registry, runs: Dict[str, dict]) -> Dict[str, Future]:
+    """Start ``registry.run(name, **kwargs)`` on ``pool`` for each configured collector.
+
+    Fetches are pure network I/O and overlap on the pool; results are stored
+    afterwards on the job's thread, which owns the DB session.
+    """
+    fetches = {}
+    for name, kwargs in runs.items():
+        info = registry.get(name)
+        if info and info.is_configured():
+            fetches[name] = pool.submit(registry.run, name, **kwargs)
+    return fetches
+
+
 def _collect_market_data() -> None:
     """Collect market data from structured collectors and persist to DB."""
     logger.info("Running scheduled market data collection")
@@ -37,151 +58,156 @@ def _collect_market_data() -> None:
         from src.collectors.registry import get_registry
         from src.db.database import SessionLocal
         from src.services.storage import StorageService
+        from datetime import date
 
         registry = get_registry()
         db = SessionLocal()
         try:
-            storage = StorageService(db)
-
-            # Northbound flow
-            info = registry.get("northbound")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("northbound")
-                    n = storage.store_northbound_flow(result)
-                    logger.info(f"Stored {n} northbound flow records")
-                except Exception as e:
-                    logger.error(f"Failed to collect northbound: {e}")
-
-            # Sector data
-            info = registry.get("sector")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("sector")
-                    n = storage.store_sectors(result)
-                    logger.info(f"Stored {n} sector snapshot records")
-                except Exception as e:
-                    logger.error(f"Failed to collect sector: {e}")
-
-            # Market indicators (VIX, gold, silver, copper)
-            info = registry.get("market_indicators")
-            if info and info.is_configured():
+            with _fetch_pool() as pool, StorageService(db) as storage:
+                storage.set_tick_date(date.today())
+                fetches = _prefetch(pool, registry, {
+                    name: {} for name in [
+                        "northbound", "sector", "market_indicators",
+                        "sector_flow", "market_breadth", "tushare",
+                    ]
+                })
+
+                # Northbound flow
+                if "northbound" in fetches:
+                    try:
+                        result = fetches["northbound"].result()
+                        n = storage.store_northbound_flow(result)
+                        logger.info(f"Stored {n} northbound flow records")
+                    except Exception as e:
+                        logger.error(f"Failed to collect northbound: {e}")
+
+                # Sector data
+                if "sector" in fetches:
+                    try:
+                        result = fetches["sector"].result()
+                        n = storage.store_sectors(result)
+                        logger.info(f"Stored {n} sector snapshot records")
+                    except Exception as e:
+                        logger.error(f"Failed to collect sector: {e}")
+
+                # Market indicators (VIX, gold, silver, copper)
+                if "market_indicators" in fetches:
+                    try:
+                        result = fetches["market_indicators"].result()
+                        n = storage.store_market_indicators(result)
+                        logger.info(f"Stored {n} market indicator records")
+                    except Exception as e:
+                        logger.error(f"Failed to collect market_indicators: {e}")
+
+                # Fundamentals (holdings + watchlist)
+                info = registry.get("fundamentals")
+                if info and info.is_configured():
+                    try:
+                        from src.db.models import Holding, HoldingStatus, Watchlist
+                        holdings = db.query(Holding).filter(
+                            Holding.status == HoldingStatus.ACTIVE
+                        ).all()
+                        pairs = [(h.symbol, h.market.value) for h in holdings if h.symbol != "CASH"]
+                        # Also include watchlist symbols
+                        watchlist_items = db.query(Watchlist).all()
+                        watchlist_pairs = [(w.symbol, w.market.value) for w in watchlist_items]
+                        # Deduplicate
+                        all_pairs = list(set(pairs + watchlist_pairs))
+                        if all_pairs:
+                            collector = info.collector_class()
+                            result = collector.fetch_all_holdings_fundamentals(all_pairs)
+                            n = storage.store_fundamentals(result)
+                            logger.info(f"Stored fundamentals for {n} symbols (holdings + watchlist)")
+                    except Exception as e:
+                        logger.error(f"Failed to collect fundamentals: {e}")
+
+                # Daily quotes for CN holdings (critical for afternoon report)
                 try:
-                    result = registry.run("market_indicators")
-                    n = storage.store_market_indicators(result)
-                    logger.info(f"Stored {n} market indicator records")
-                except Exception as e:
-                    logger.error(f"Failed to collect market_indicators: {e}")
+                    from src.db.models import Holding, HoldingStatus, Watchlist, Market, DailyQuote
+                    from src.collectors.structured.akshare_collector import AkShareCollector
+                    from datetime import date, timedelta
 
-            # Fundamentals (holdings + watchlist)
-            info = registry.get("fundamentals")
-            if info and info.is_configured():
-                try:
-                    from src.db.models import Holding, HoldingStatus, Watchlist
                     holdings = db.query(Holding).filter(
-                        Holding.status == HoldingStatus.ACTIVE
+                        Holding.status == HoldingStatus.ACTIVE,
+                        Holding.market == Market.CN
                     ).all()
-                    pairs = [(h.symbol, h.market.value) for h in holdings if h.symbol != "CASH"]
-                    # Also include watchlist symbols
-                    watchlist_items = db.query(Watchlist).all()
-                    watchlist_pairs = [(w.symbol, w.market.value) for w in watchlist_items]
-                    # Deduplicate
-                    all_pairs = list(set(pairs + watchlist_pairs))
-                    if all_pairs:
-                        collector = info.collector_class()
-                        result = collector.fetch_all_holdings_fundamentals(all_pairs)
-                        n = storage.store_fundamentals(result)
-                        logger.info(f"Stored fundamentals for {n} symbols (holdings + watchlist)")
-                except Exception as e:
-                    logger.error(f"Failed to collect fundamentals: {e}")
-
-            # Daily quotes for CN holdings (critical for afternoon report)
-            try:
-                from src.db.models import Holding, HoldingStatus, Watchlist, Market, DailyQuote
-                from src.collectors.structured.akshare_collector import AkShareCollector
-                from datetime import date, timedelta
-
-                holdings = db.query(Holding).filter(
-                    Holding.status == HoldingStatus.ACTIVE,
-                    Holding.market == Market.CN
-                ).all()
-                symbols = [(h.symbol, h.market) for h in holdings if h.symbol != "CASH"]
-
-                # Also include CN watchlist symbols
-                watchlist_items = db.query(Watchlist).filter(
-                    Watchlist.market == Market.CN
-                ).all()
-                symbols.extend([(w.symbol, w.market) for w in watchlist_items])
-                symbols = list(set(symbols))
-
-                if symbols:
-                    collector = AkShareCollector()
-                    today = date.today()
-                    start = today - timedelta(days=7)
-                    synced = 0
-                    for symbol, market in symbols:
-                        try:
-                            quotes = collector.fetch_quotes(symbol, start, today, market.value)
-                            for q in quotes:
-                                existing = db.query(DailyQuote).filter(
-                                    DailyQuote.symbol == symbol,
-                                    DailyQuote.market == market,
-                                    DailyQuote.trade_date == q.trade_date,
-                                ).first()
-                                if existing:
-                                    existing.open = q.open
-                                    existing.high = q.high
-                                    existing.low = q.low
-                                    existing.close = q.close
-                                    existing.volume = q.volume
-                                else:
-                                    db.add(DailyQuote(
-                                        symbol=symbol,
-                                        market=market,
-                                        trade_date=q.trade_date,
-                                        open=q.open,
-                                        high=q.high,
-                                        low=q.low,
-                                        close=q.close,
-                                        volume=q.volume,
-                                    ))
-                                synced += 1
-                        except Exception as e:
-                            logger.warning(f"PM: Failed to sync quotes for {symbol}: {e}")
-                    db.commit()
-                    logger.info(f"PM: Synced {synced} daily quotes for {len(symbols)} CN symbols")
-            except Exception as e:
-                logger.error(f"PM: Failed to collect CN daily quotes: {e}")
-
-            # Sector fund flows
-            info = registry.get("sector_flow")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("sector_flow")
-                    n = storage.store_sector_flows(result)
-                    logger.info(f"Stored {n} sector fund flow records")
-                except Exception as e:
-                    logger.error(f"Failed to collect sector_flow: {e}")
-
-            # Market breadth (advance/decline)
-            info = registry.get("market_breadth")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("market_breadth")
-                    n = storage.store_market_breadth(result)
-                    logger.info(f"Stored {n} market breadth records")
-                except Exception as e:
-                    logger.error(f"Failed to collect market_breadth: {e}")
+                    symbols = [(h.symbol, h.market) for h in holdings if h.symbol != "CASH"]
 
-            # TuShare (index valuations + ETF NAVs)
-            info = registry.get("tushare")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("tushare")
-                    n = storage.store_tushare_data(result)
-                    logger.info(f"Stored {n} TuShare records (index valuations + fund NAVs)")
+                    # Also include CN watchlist symbols
+                    watchlist_items = db.query(Watchlist).filter(
+                        Watchlist.market == Market.CN
+                    ).all()
+                    symbols.extend([(w.symbol, w.market) for w in watchlist_items])
+                    symbols = list(set(symbols))
+
+                    if symbols:
+                        collector = AkShareCollector()
+                        today = date.today()
+                        start = today - timedelta(days=7)
+                        synced = 0
+                        for symbol, market in symbols:
+                            try:
+                                quotes = collector.fetch_quotes(symbol, start, today, market.value)
+                                # Own savepoint: a bad symbol rolls back alone and
+                                # leaves the tick's session usable
+                                with db.begin_nested():
+                                    for q in quotes:
+                                        existing = db.query(DailyQuote).filter(
+                                            DailyQuote.symbol == symbol,
+                                            DailyQuote.market == market,
+                                            DailyQuote.trade_date == q.trade_date,
+                                        ).first()
+                                        if existing:
+                                            existing.open = q.open
+                                            existing.high = q.high
+                                            existing.low = q.low
+                                            existing.close = q.close
+                                            existing.volume = q.volume
+                                        else:
+                                            db.add(DailyQuote(
+                                                symbol=symbol,
+                                                market=market,
+                                                trade_date=q.trade_date,
+                                                open=q.open,
+                                                high=q.high,
+                                                low=q.low,
+                                                close=q.close,
+                                                volume=q.volume,
+                                            ))
+                                synced += len(quotes)
+                            except Exception as e:
+                                logger.warning(f"PM: Failed to sync quotes for {symbol}: {e}")
+                        # Committed with the rest of the tick when the storage block exits
+                        logger.info(f"PM: Synced {synced} daily quotes for {len(symbols)} CN symbols")
                 except Exception as e:
-                    logger.error(f"Failed to collect tushare: {e}")
+                    logger.error(f"PM: Failed to collect CN daily quotes: {e}")
+
+                # Sector fund flows
+                if "sector_flow" in fetches:
+                    try:
+                        result = fetches["sector_flow"].result()
+                        n = storage.store_sector_flows(result)
+                        logger.info(f"Stored {n} sector fund flow records")
+                    except Exception as e:
+                        logger.error(f"Failed to collect sector_flow: {e}")
+
+                # Market breadth (advance/decline)
+                if "market_breadth" in fetches:
+                    try:
+                        result = fetches["market_breadth"].result()
+                        n = storage.store_market_breadth(result)
+                        logger.info(f"Stored {n} market breadth records")
+                    except Exception as e:
+                        logger.error(f"Failed to collect market_breadth: {e}")
+
+                # TuShare (index valuations + ETF NAVs)
+                if "tushare" in fetches:
+                    try:
+                        result = fetches["tushare"].result()
+                        n = storage.store_tushare_data(result)
+                        logger.info(f"Stored {n} TuShare records (index valuations + fund NAVs)")
+                    except Exception as e:
+                        logger.error(f"Failed to collect tushare: {e}")
         finally:
             db.close()
     except Exception as e:
@@ -201,38 +227,44 @@ def _collect_macro_data() -> None:
         registry = get_registry()
         db = SessionLocal()
         try:
-            storage = StorageService(db)
-
-            # FRED macro series
-            info = registry.get("fred")
-            if info and info.is_configured():
-                try:
-                    end = date.today()
-                    start = end - timedelta(days=30)
-                    result = registry.run("fred", start_date=start, end_date=end)
-                    n = storage.store_fred_data(result)
-                    logger.info(f"Stored {n} FRED data points")
-                except Exception as e:
-                    logger.error(f"Failed to collect fred: {e}")
-
-                # Yield spread (separate call)
-                try:
-                    collector = info.collector_class()
-                    spread = asyncio.run(collector.fetch_yield_spread())
-                    n = storage.store_yield_spread(spread)
-                    logger.info(f"Stored {n} yield spread record")
-                except Exception as e:
-                    logger.error(f"Failed to collect yield spread: {e}")
-
-            # CN Macro (PMI/CPI/M2)
-            info = registry.get("cn_macro")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("cn_macro")
-                    n = storage.store_cn_macro(result)
-                    logger.info(f"Stored {n} CN macro data points")
-                except Exception as e:
-                    logger.error(f"Failed to collect cn_macro: {e}")
+            with _fetch_pool() as pool, StorageService(db) as storage:
+                end = date.today()
+                start = end - timedelta(days=30)
+                fetches = _prefetch(pool, registry, {
+                    "fred": {"start_date": start, "end_date": end},
+                    "cn_macro": {},
+                })
+
+                # FRED macro series
+                if "fred" in fetches:
+                    # Yield spread (separate call)
+                    info = registry.get("fred")
+                    spread_fetch = pool.submit(
+                        lambda: asyncio.run(info.collector_class().fetch_yield_spread())
+                    )
+
+                    try:
+                        result = fetches["fred"].result()
+                        n = storage.store_fred_data(result)
+                        logger.info(f"Stored {n} FRED data points")
+                    except Exception as e:
+                        logger.error(f"Failed to collect fred: {e}")
+
+                    try:
+                        spread = spread_fetch.result()
+                        n = storage.store_yield_spread(spread)
+                        logger.info(f"Stored {n} yield spread record")
+                    except Exception as e:
+                        logger.error(f"Failed to collect yield spread: {e}")
+
+                # CN Macro (PMI/CPI/M2)
+                if "cn_macro" in fetches:
+                    try:
+                        result = fetches["cn_macro"].result()
+                        n = storage.store_cn_macro(result)
+                        logger.info(f"Stored {n} CN macro data points")
+                    except Exception as e:
+                        logger.error(f"Failed to collect cn_macro: {e}")
         finally:
             db.close()
     except Exception as e:
@@ -308,19 +340,21 @@ def _generate_daily_report_new() -> None:
     """Generate pre-stored daily report with per-holding AI commentary for all active users."""
     logger.info("Running scheduled daily report generation (new)")
     try:
-        from src.services.report_generator import DailyReportGenerator
+        from src.services.report_generator import DailyReportGenerator, report_run
         from src.db.database import SessionLocal
         from src.db.models_auth import User
         db = SessionLocal()
         try:
             users = db.query(User).filter(User.is_active == True).all()
-            for user in users:
-                try:
-                    gen = DailyReportGenerator(db, user_id=user.id)
-                    report_id = gen.generate()
-                    logger.info(f"Daily report generated for user {user.username}, id={report_id}")
-                except Exception as e:
-                    logger.error(f"Daily report generation failed for user {user.username}: {e}")
+            # Users' reports share market-wide lookups for this run only
+            with report_run():
+                for user in users:
+                    try:
+                        gen = DailyReportGenerator(db, user_id=user.id)
+                        report_id = gen.generate()
+                        logger.info(f"Daily report generated for user {user.username}, id={report_id}")
+                    except Exception as e:
+                        logger.error(f"Daily report generation failed for user {user.username}: {e}")
         finally:
             db.close()
     except Exception as e:
@@ -334,103 +368,107 @@ def _collect_market_data_am() -> None:
         from src.collectors.registry import get_registry
         from src.db.database import SessionLocal
         from src.services.storage import StorageService
+        from datetime import date
 
         registry = get_registry()
         db = SessionLocal()
         try:
-            storage = StorageService(db)
-
-            # Market indicators (VIX, gold, silver, copper - updated overnight)
-            info = registry.get("market_indicators")
-            if info and info.is_configured():
-                try:
-                    result = registry.run("market_indicators")
-                    n = storage.store_market_indicators(result)
-                    logger.info(f"AM: Stored {n} market indicator records")
-                except Exception as e:
-                    logger.error(f"AM: Failed to collect market_indicators: {e}")
-
-            # Daily quotes for US/HK holdings (critical for morning report)
-            try:
-                from src.db.models import Holding, HoldingStatus, Watchlist, Market, DailyQuote
-                from src.collectors.structured.yfinance_collector import YFinanceCollector
-                from datetime import date, timedelta
-
-                holdings = db.query(Holding).filter(
-                    Holding.status == HoldingStatus.ACTIVE,
-                    Holding.market.in_([Market.US, Market.HK])
-                ).all()
-                symbols = [(h.symbol, h.market) for h in holdings if h.symbol != "CASH"]
-
-                # Also include US/HK watchlist symbols
-                watchlist_items = db.query(Watchlist).filter(
-                    Watchlist.market.in_([Market.US, Market.HK])
-                ).all()
-                symbols.extend([(w.symbol, w.market) for w in watchlist_items])
-                symbols = list(set(symbols))
-
-                if symbols:
-                    collector = YFinanceCollector()
-                    today = date.today()
-                    start = today - timedelta(days=7)  # Fetch last week to catch any gaps
-                    synced = 0
-                    for symbol, market in symbols:
-                        try:
-                            quotes = collector.fetch_quotes(symbol, start, today)
-                            for q in quotes:
-                                # Upsert: check if exists, update if so
-                                existing = db.query(DailyQuote).filter(
-                                    DailyQuote.symbol == symbol,
-                                    DailyQuote.market == market,
-                                    DailyQuote.trade_date == q.trade_date,
-                                ).first()
-                                if existing:
-                                    existing.open = q.open
-                                    existing.high = q.high
-                                    existing.low = q.low
-                                    existing.close = q.close
-                                    existing.volume = q.volume
-                                else:
-                                    db.add(DailyQuote(
-                                        symbol=symbol,
-                                        market=market,
-                                        trade_date=q.trade_date,
-                                        open=q.open,
-                                        high=q.high,
-                                        low=q.low,
-                                        close=q.close,
-                                        volume=q.volume,
-                                    ))
-                                synced += 1
-                        except Exception as e:
-                            logger.warning(f"AM: Failed to sync quotes for {symbol}: {e}")
-                    db.commit()
-                    logger.info(f"AM: Synced {synced} daily quotes for {len(symbols)} US/HK symbols")
-            except Exception as e:
-                logger.error(f"AM: Failed to collect US/HK daily quotes: {e}")
-
-            # Fundamentals for US/HK holdings
-            info = registry.get("fundamentals")
-            if info and info.is_configured():
+            with StorageService(db) as storage:
+                storage.set_tick_date(date.today())
+                # Market indicators (VIX, gold, silver, copper - updated overnight)
+                info = registry.get("market_indicators")
+                if info and info.is_configured():
+                    try:
+                        result = registry.run("market_indicators")
+                        n = storage.store_market_indicators(result)
+                        logger.info(f"AM: Stored {n} market indicator records")
+                    except Exception as e:
+                        logger.error(f"AM: Failed to collect market_indicators: {e}")
+
+                # Daily quotes for US/HK holdings (critical for morning report)
                 try:
-                    from src.db.models import Holding, HoldingStatus, Watchlist, Market
+                    from src.db.models import Holding, HoldingStatus, Watchlist, Market, DailyQuote
+                    from src.collectors.structured.yfinance_collector import YFinanceCollector
+                    from datetime import date, timedelta
+
                     holdings = db.query(Holding).filter(
                         Holding.status == HoldingStatus.ACTIVE,
                         Holding.market.in_([Market.US, Market.HK])
                     ).all()
-                    pairs = [(h.symbol, h.market.value) for h in holdings if h.symbol != "CASH"]
+                    symbols = [(h.symbol, h.market) for h in holdings if h.symbol != "CASH"]
+
+                    # Also include US/HK watchlist symbols
                     watchlist_items = db.query(Watchlist).filter(
                         Watchlist.market.in_([Market.US, Market.HK])
                     ).all()
-                    watchlist_pairs = [(w.symbol, w.market.value) for w in watchlist_items]
-                    all_pairs = list(set(pairs + watchlist_pairs))
-                    if all_pairs:
-                        collector = info.collector_class()
-                        result = collector.fetch_all_holdings_fundamentals(all_pairs)
-                        n = storage.store_fundamentals(result)
-                        logger.info(f"AM: Stored fundamentals for {n} US/HK symbols")
+                    symbols.extend([(w.symbol, w.market) for w in watchlist_items])
+                    symbols = list(set(symbols))
+
+                    if symbols:
+                        collector = YFinanceCollector()
+                        today = date.today()
+                        start = today - timedelta(days=7)  # Fetch last week to catch any gaps
+                        synced = 0
+                        for symbol, market in symbols:
+                            try:
+                                quotes = collector.fetch_quotes(symbol, start, today)
+                                # Own savepoint: a bad symbol rolls back alone and
+                                # leaves the tick's session usable
+                                with db.begin_nested():
+                                    for q in quotes:
+                                        # Upsert: check if exists, update if so
+                                        existing = db.query(DailyQuote).filter(
+                                            DailyQuote.symbol == symbol,
+                                            DailyQuote.market == market,
+                                            DailyQuote.trade_date == q.trade_date,
+                                        ).first()
+                                        if existing:
+                                            existing.open = q.open
+                                            existing.high = q.high
+                                            existing.low = q.low
+                                            existing.close = q.close
+                                            existing.volume = q.volume
+                                        else:
+                                            db.add(DailyQuote(
+                                                symbol=symbol,
+                                                market=market,
+                                                trade_date=q.trade_date,
+                                                open=q.open,
+                                                high=q.high,
+                                                low=q.low,
+                                                close=q.close,
+                                                volume=q.volume,
+                                            ))
+                                synced += len(quotes)
+                            except Exception as e:
+                                logger.warning(f"AM: Failed to sync quotes for {symbol}: {e}")
+                        # Committed with the rest of the tick when the storage block exits
+                        logger.info(f"AM: Synced {synced} daily quotes for {len(symbols)} US/HK symbols")
                 except Exception as e:
-                    logger.error(f"AM: Failed to collect US/HK fundamentals: {e}")
+                    logger.error(f"AM: Failed to collect US/HK daily quotes: {e}")
+
+                # Fundamentals for US/HK holdings
+                info = registry.get("fundamentals")
+                if info and info.is_configured():
+                    try:
+                        from src.db.models import Holding, HoldingStatus, Watchlist, Market
+                        holdings = db.query(Holding).filter(
+                            Holding.status == HoldingStatus.ACTIVE,
+                            Holding.market.in_([Market.US, Market.HK])
+                        ).all()
+                        pairs = [(h.symbol, h.market.value) for h in holdings if h.symbol != "CASH"]
+                        watchlist_items = db.query(Watchlist).filter(
+                            Watchlist.market.in_([Market.US, Market.HK])
+                        ).all()
+                        watchlist_pairs = [(w.symbol, w.market.value) for w in watchlist_items]
+                        all_pairs = list(set(pairs + watchlist_pairs))
+                        if all_pairs:
+                            collector = info.collector_class()
+                            result = collector.fetch_all_holdings_fundamentals(all_pairs)
+                            n = storage.store_fundamentals(result)
+                            logger.info(f"AM: Stored fundamentals for {n} US/HK symbols")
+                    except Exception as e:
+                        logger.error(f"AM: Failed to collect US/HK fundamentals: {e}")
         finally:
             db.close()
     except Exception as e:
@@ -441,19 +479,21 @@ def _generate_weekly_report_new() -> None:
     """Generate pre-stored weekly report with strategic analysis for all active users."""
     logger.info("Running scheduled weekly report generation (new)")
     try:
-        from src.services.report_generator import WeeklyReportGenerator
+        from src.services.report_generator import WeeklyReportGenerator, report_run
         from src.db.database import SessionLocal
         from src.db.models_auth import User
         db = SessionLocal()
         try:
             users = db.query(User).filter(User.is_active == True).all()
-            for user in users:
-                try:
-                    gen = WeeklyReportGenerator(db, user_id=user.id)
-                    report_id = gen.generate()
-                    logger.info(f"Weekly report generated for user {user.username}, id={report_id}")
-                except Exception as e:
-                    logger.error(f"Weekly report generation failed for user {user.username}: {e}")
+            # Users' reports share market-wide lookups for this run only
+            with report_run():
+                for user in users:
+                    try:
+                        gen = WeeklyReportGenerator(db, user_id=user.id)
+                        report_id = gen.generate()
+                        logger.info(f"Weekly report generated for user {user.username}, id={report_id}")
+                    except Exception as e:
+                        logger.error(f"Weekly report generation failed for user {user.username}: {e}")
         finally:
             db.close()
     except Exception as e:
@@ -127,17 +127,22 @@ class AnalyzerRunner:
         all_signals = self.run_all()
 
         if self._telegram and self._telegram.is_enabled():
-            for signal in all_signals:
-                # Only notify for MEDIUM severity and above
+            # Only notify for MEDIUM severity and above
+            to_notify = [
+                signal for signal in all_signals
                 if signal.severity in [
                     SignalSeverity.MEDIUM,
                     SignalSeverity.HIGH,
                     SignalSeverity.CRITICAL,
-                ]:
-                    success = await self._telegram.send_signal(signal)
-                    if success:
-                        signal.telegram_sent = True
-                        signal.telegram_sent_at = datetime.utcnow()
-                        self._db.commit()
+                ]
+            ]
+            results = await self._telegram.send_signals(to_notify)
+            sent_at = datetime.utcnow()
+            for signal, success in zip(to_notify, results):
+                if success:
+                    signal.telegram_sent = True
+                    signal.telegram_sent_at = sent_at
+            if any(results):
+                self._db.commit()
 
         return all_signals
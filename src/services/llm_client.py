@@ -1,7 +1,11 @@
 """LLM Client Service - OpenAI-compatible gateway."""
+import hashlib
 import json
 import logging
-from typing import List, Optional
+import sqlite3
+import time
+from contextlib import asynccontextmanager, closing
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 
@@ -9,6 +13,85 @@ from src.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Process-wide response cache for clients created with cache_ttl > 0:
+# request hash -> (expires_at monotonic seconds, content)
+_RESPONSE_CACHE: Dict[str, Tuple[float, str]] = {}
+_RESPONSE_CACHE_MAX = 1024
+
+# Connection pool for pooled() blocks; a report can have several bounded
+# LLM fan-outs in flight at once, so keep enough idle connections for all
+_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=32)
+
+
+def _cache_key(model: str, messages: List[dict], temperature: float, max_tokens: int) -> str:
+    """Hash a chat request for the response cache."""
+    raw = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Return a cached, unexpired response or None."""
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is None:
+        return None
+    expires_at, content = entry
+    if expires_at < time.monotonic():
+        del _RESPONSE_CACHE[key]
+        return None
+    return content
+
+
+def _cache_put(key: str, content: str, ttl: float) -> None:
+    """Store a response, evicting expired then oldest entries when full."""
+    if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX:
+        now = time.monotonic()
+        for k in [k for k, (exp, _) in _RESPONSE_CACHE.items() if exp < now]:
+            del _RESPONSE_CACHE[k]
+        while len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX:
+            del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+    _RESPONSE_CACHE[key] = (time.monotonic() + ttl, content)
+
+
+def _disk_cache_connect(path: str) -> sqlite3.Connection:
+    """Open the on-disk response cache, creating its table on first use."""
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS llm_response_cache "
+        "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, content TEXT NOT NULL)"
+    )
+    return conn
+
+
+def _disk_cache_get(path: str, key: str) -> Optional[Tuple[float, str]]:
+    """Return ``(seconds left, content)`` for an unexpired on-disk entry, or None."""
+    try:
+        with closing(_disk_cache_connect(path)) as conn:
+            row = conn.execute(
+                "SELECT expires_at, content FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("LLM disk cache read failed: %s", e)
+        return None
+    if row is None:
+        return None
+    ttl_left = row[0] - time.time()
+    return (ttl_left, row[1]) if ttl_left > 0 else None
+
+
+def _disk_cache_put(path: str, key: str, content: str, ttl: float) -> None:
+    """Store a response on disk (wall-clock expiry) and prune expired entries."""
+    now = time.time()
+    try:
+        with closing(_disk_cache_connect(path)) as conn, conn:
+            conn.execute("DELETE FROM llm_response_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, expires_at, content) "
+                "VALUES (?, ?, ?)",
+                (key, now + ttl, content),
+            )
+    except sqlite3.Error as e:
+        logger.warning("LLM disk cache write failed: %s", e)
+
 
 class ModelChoice:
     """Available model choices."""
@@ -24,11 +107,39 @@ class LLMError(Exception):
 class LLMClient:
     """Unified LLM client supporting multiple models via OpenAI-compatible gateway."""
 
-    def __init__(self, model: str = ModelChoice.FAST):
+    def __init__(self, model: str = ModelChoice.FAST, cache_ttl: float = 0, cache_path: str = ""):
+        """
+        Args:
+            model: Default model for requests.
+            cache_ttl: Seconds to reuse responses to identical requests
+                (same model, messages and sampling params). 0 disables.
+            cache_path: Optional SQLite file that also keeps cached responses,
+                so they survive restarts and are shared between processes.
+        """
         self.default_model = model
         settings = get_settings()
         self.base_url = settings.llm_base_url.rstrip("/")
         self.api_key = settings.llm_api_key
+        self.cache_ttl = cache_ttl
+        self.cache_path = cache_path
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @asynccontextmanager
+    async def pooled(self):
+        """Share one HTTP connection pool across all requests made inside the block.
+
+        Outside of this block every request opens its own client. Nested
+        blocks reuse the outer pool.
+        """
+        if self._http is not None:
+            yield self
+            return
+        async with httpx.AsyncClient(timeout=120.0, limits=_POOL_LIMITS) as http:
+            self._http = http
+            try:
+                yield self
+            finally:
+                self._http = None
 
     async def chat(
         self,
@@ -36,6 +147,7 @@ class LLMClient:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        prompt_cache_key: Optional[str] = None,
     ) -> str:
         """Send a chat completion request and return the content string.
 
@@ -44,6 +156,9 @@ class LLMClient:
             model: Model to use, defaults to instance default.
             temperature: Sampling temperature.
             max_tokens: Maximum tokens in response.
+            prompt_cache_key: Optional OpenAI-style ``prompt_cache_key`` so the
+                gateway can route requests sharing a prompt prefix to the same
+                prefix cache. Omitted from the request when None.
 
         Returns:
             The assistant's response content as a string.
@@ -52,6 +167,14 @@ class LLMClient:
             LLMError: On network errors, API errors, or empty responses.
         """
         model = model or self.default_model
+        cache_key = None
+        if self.cache_ttl > 0:
+            cache_key = _cache_key(model, messages, temperature, max_tokens)
+            cached = self.cached(cache_key)
+            if cached is not None:
+                logger.info("LLM cache hit: model=%s", model)
+                return cached
+
         url = f"{self.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -63,11 +186,16 @@ class LLMClient:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
+        if prompt_cache_key:
+            payload["prompt_cache_key"] = prompt_cache_key
 
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
+            if self._http is not None:
+                response = await self._http.post(url, json=payload, headers=headers)
+            else:
+                async with httpx.AsyncClient(timeout=120.0) as client:
+                    response = await client.post(url, json=payload, headers=headers)
+            response.raise_for_status()
         except httpx.HTTPStatusError as e:
             raise LLMError(f"API error {e.response.status_code}: {e.response.text}") from e
         except httpx.RequestError as e:
@@ -78,8 +206,36 @@ class LLMClient:
             raise LLMError("Empty response from LLM")
 
         logger.info("LLM response: model=%s, content_length=%d", model, len(content))
+        if cache_key is not None:
+            self.remember(cache_key, content)
         return content
 
+    def cached(self, key: str) -> Optional[str]:
+        """Return content cached under ``key`` (memory, then disk), or None.
+
+        Also usable by callers caching derived results under their own keys,
+        whether or not this client caches its own chat responses.
+        """
+        cached = _cache_get(key)
+        if cached is None and self.cache_path:
+            disk_entry = _disk_cache_get(self.cache_path, key)
+            if disk_entry is not None:
+                ttl_left, cached = disk_entry
+                _cache_put(key, cached, ttl_left)
+        return cached
+
+    def remember(self, key: str, content: str, ttl: Optional[float] = None) -> None:
+        """Cache ``content`` under ``key`` for ``ttl`` seconds (default: cache_ttl).
+
+        A no-op when the effective ttl is 0.
+        """
+        ttl = ttl or self.cache_ttl
+        if ttl <= 0:
+            return
+        _cache_put(key, content, ttl)
+        if self.cache_path:
+            _disk_cache_put(self.cache_path, key, content, ttl)
+
     async def chat_with_system(
         self,
         system_prompt: str,
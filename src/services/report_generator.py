@@ -1,15 +1,24 @@
 """Report generator service — creates and stores daily/weekly reports."""
 import ast
 import asyncio
+import contextvars
+import hashlib
 import json
 import logging
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 
-from sqlalchemy import desc, func as sa_func
-from sqlalchemy.orm import Session
+import numpy as np
+import pandas as pd
+from sqlalchemy import desc, func as sa_func, or_, tuple_
+from sqlalchemy.orm import Session, aliased
 
 from src.db.models import (
     Holding, HoldingStatus, Market, Tier, DailyQuote, Signal, SignalSeverity,
@@ -21,6 +30,7 @@ from src.db.models_market_data import (
     SectorSnapshot, SectorFlowSnapshot, MarketBreadthSnapshot,
     IndexValuationSnapshot, MacroData, CnMacroRecord, YieldSpreadRecord,
 )
+from src.config import get_settings
 from src.services.llm_client import LLMClient, ModelChoice, LLMError
 
 logger = logging.getLogger(__name__)
@@ -41,6 +51,13 @@ THEME_MAP = {
     "GOOG": "美股科技", "01810": "港股科技", "CASH": "现金",
 }
 
+# Sector board names (industry/concept, as stored in the sector snapshots)
+# each theme is read from; any other theme is looked up by its own name
+THEME_SECTORS = {
+    "电池/新能源": ("电池", "能源金属", "新能源车"),
+    "新能源": ("新能源车", "新能源汽车", "光伏设备", "风电设备"),
+}
+
 # Opportunity detection thresholds (from watchlist_analyzer.py)
 PE_CHEAP = 25
 PULLBACK_THRESHOLD = Decimal("-0.10")
@@ -58,7 +75,48 @@ DAILY_HOLDING_SYSTEM_PROMPT = """你是一位专业投资顾问。请对以下
   "ai_detail": "详细分析报告，markdown格式，包含：\\n## 基本面\\n...\\n## 技术面\\n...\\n## 催化剂\\n...\\n## 风险点\\n..."
 }"""
 
-DAILY_SUMMARY_SYSTEM_PROMPT = """你是一位专业投资顾问。根据以下持仓数据，生成一句话总结（30字以内），概括今日组合整体表现和需要关注的重点。只返回总结文字，不要任何其他格式。"""
+DAILY_HOLDINGS_BATCH_SYSTEM_PROMPT = """你是一位专业投资顾问。请对以下多个持仓逐一进行简要点评，每个持仓以 "=== HOLDING 序号: 代码 ===" 开头。
+
+要求严格按JSON格式回复，不要包含任何其他文字，results 中每个持仓一项：
+{
+  "results": [
+    {
+      "index": "持仓序号（整数），与标题中的序号一致",
+      "symbol": "持仓代码，与标题中的代码一致",
+      "ai_comment": "2-3句话的结论+简要理由，结合仓位占比给出建议",
+      "action": "hold/add/reduce/sell 之一",
+      "ai_detail": "详细分析报告，markdown格式，包含：\\n## 基本面\\n...\\n## 技术面\\n...\\n## 催化剂\\n...\\n## 风险点\\n..."
+    }
+  ]
+}"""
+
+# Daily holding AI output budget; positions under MINOR_HOLDING_WEIGHT_PCT of the
+# portfolio get a brief analysis and a smaller budget
+HOLDING_MAX_TOKENS = 4000
+MINOR_HOLDING_MAX_TOKENS = 1000
+MINOR_HOLDING_WEIGHT_PCT = 1.0
+# Extra output budget when a batched holdings prompt also asks for the summary
+SUMMARY_MAX_TOKENS = 200
+
+# Below this many non-cash holdings the template summary is used and no AI summary is asked for
+SUMMARY_AI_MIN_HOLDINGS = 3
+
+# The portfolio summary rides along with the first batched holdings prompt
+DAILY_HOLDINGS_SUMMARY_BATCH_SYSTEM_PROMPT = """你是一位专业投资顾问。请对以下多个持仓逐一进行简要点评，每个持仓以 "=== HOLDING 序号: 代码 ===" 开头；最后的 "=== PORTFOLIO ===" 部分是组合整体概况。
+
+要求严格按JSON格式回复，不要包含任何其他文字，results 中每个持仓一项：
+{
+  "results": [
+    {
+      "index": "持仓序号（整数），与标题中的序号一致",
+      "symbol": "持仓代码，与标题中的代码一致",
+      "ai_comment": "2-3句话的结论+简要理由，结合仓位占比给出建议",
+      "action": "hold/add/reduce/sell 之一",
+      "ai_detail": "详细分析报告，markdown格式，包含：\\n## 基本面\\n...\\n## 技术面\\n...\\n## 催化剂\\n...\\n## 风险点\\n..."
+    }
+  ],
+  "portfolio_summary": "根据组合整体概况生成的一句话总结（30字以内），概括今日组合整体表现和需要关注的重点"
+}"""
 
 OPPORTUNITY_SYSTEM_PROMPT = """你是一位专业投资顾问。分析以下标的的投资机会。
 
@@ -79,6 +137,14 @@ WEEKLY_HOLDING_SYSTEM_PROMPT = """你是一位专业投资顾问，进行中长
   "ai_detail": "详细分析报告，markdown格式，包含：\\n## 持仓逻辑回顾\\n...\\n## 中期催化剂\\n...\\n## 风险因素\\n...\\n## 仓位建议\\n..."
 }"""
 
+# Weekly holdings below this portfolio weight get a template comment, no LLM call
+WEEKLY_AI_MIN_WEIGHT_PCT = 0.5
+MINOR_POSITION_COMMENT = "持仓占比过低，保持观察"
+
+# MacroEnvironmentAnalyzer detail tags shown in the weekly macro summaries
+US_MACRO_PREFIXES = ("[US宏观]", "[利差]", "[CPI]", "[失业率]", "[VIX]")
+CN_MACRO_PREFIXES = ("[中国宏观]", "[PMI]", "[流动性]", "[Shibor", "[新增贷款]")
+
 WEEKLY_SUMMARY_SYSTEM_PROMPT = """你是一位专业投资顾问。根据以下本周市场和持仓数据，生成一段总结（100字以内），概括本周市场关键变化和持仓整体表现。只返回总结文字，不要任何其他格式。"""
 
 
@@ -86,6 +152,7 @@ WEEKLY_SUMMARY_SYSTEM_PROMPT = """你是一位专业投资顾问。根据以下
 # Module-level shared helpers
 # ======================================================================
 
+@lru_cache(maxsize=None)
 def _symbol_to_ts_code(symbol: str) -> str:
     """Convert a 6-digit CN symbol to TuShare ts_code format."""
     if symbol.startswith(("5", "6")):
@@ -98,28 +165,74 @@ def _is_cn_etf(symbol: str) -> bool:
     return symbol.isdigit() and len(symbol) == 6
 
 
+def _split_cn_symbols(pairs: Iterable[Tuple[str, Market]]) -> Tuple[List[str], List[str]]:
+    """Split the CN symbols in ``pairs`` into (ETFs, stocks) in one pass."""
+    etfs: List[str] = []
+    stocks: List[str] = []
+    for symbol, market in pairs:
+        if market == Market.CN:
+            (etfs if _is_cn_etf(symbol) else stocks).append(symbol)
+    return etfs, stocks
+
+
+@dataclass
+class ReportRun:
+    """Market-wide lookups shared by the reports of one report_run()."""
+    # Analyzer reports by analyzer name
+    analyzer_reports: Dict[str, Any] = field(default_factory=dict)
+    # Latest NAV/close per (symbol, market); None records a symbol with no price yet
+    latest_prices: Dict[Tuple[str, Market], Optional[float]] = field(default_factory=dict)
+
+_REPORT_RUN: contextvars.ContextVar[Optional[ReportRun]] = contextvars.ContextVar(
+    "report_run", default=None
+)
+
+
+@contextmanager
+def report_run():
+    """Share market-wide lookups across the reports generated inside the block.
+
+    Meant to wrap one scheduler run over every user. The shared values live
+    in a context variable and are dropped on exit, so the next run always
+    reads freshly collected data and concurrent runs never see each other's;
+    outside a block nothing is shared. Nested blocks join the outer run.
+    """
+    run = _REPORT_RUN.get()
+    if run is not None:
+        yield run
+        return
+    run = ReportRun()
+    token = _REPORT_RUN.set(run)
+    try:
+        yield run
+    finally:
+        _REPORT_RUN.reset(token)
+
+
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_FENCE_RE = re.compile(r"^```[^\n]*\n(.*?)\n?```$", re.DOTALL)
+
+
 def _strip_markdown_fences(text: str) -> str:
     """Strip markdown code fences from LLM response."""
     text = text.strip()
-    if text.startswith("```"):
-        lines = text.split("\n")
-        text = "\n".join(lines[1:-1]).strip()
-    return text
+    m = _FENCE_RE.match(text)
+    return m.group(1).strip() if m else text
 
 
 def _parse_llm_json(text: str) -> dict:
     """Parse JSON from LLM response, tolerating common LLM quirks."""
     text = _strip_markdown_fences(text)
-    # Extract JSON object if surrounded by other text
-    match = re.search(r'\{[\s\S]*\}', text)
-    if match:
-        text = match.group(0)
+    # Extract JSON object if surrounded by other text (first "{" to last "}")
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
     try:
         return json.loads(text)
     except json.JSONDecodeError:
         pass
     # Fix trailing commas
-    fixed = re.sub(r',\s*([}\]])', r'\1', text)
+    fixed = _TRAILING_COMMA_RE.sub(r'\1', text)
     try:
         return json.loads(fixed)
     except json.JSONDecodeError:
@@ -138,7 +251,105 @@ def _parse_llm_json(text: str) -> dict:
     raise json.JSONDecodeError("Cannot parse LLM response as JSON", text, 0)
 
 
-def _get_usd_cny_rate_static(db: Session) -> Decimal:
+def _holding_max_tokens(entry: Dict[str, Any]) -> int:
+    """LLM output budget for one daily holding analysis."""
+    if entry["weight_pct"] < MINOR_HOLDING_WEIGHT_PCT:
+        return MINOR_HOLDING_MAX_TOKENS
+    return HOLDING_MAX_TOKENS
+
+
+def _holding_ai_cache_key(prompt: str, entry: Dict[str, Any]) -> str:
+    """Cache key for a daily holding analysis: the position, its prompt, template and budget."""
+    raw = json.dumps(
+        [
+            "daily_holding", entry["symbol"], entry["market"], entry.get("tier"),
+            DAILY_HOLDING_SYSTEM_PROMPT, prompt, _holding_max_tokens(entry),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _match_batch_results(
+    entries: List[Dict[str, Any]], items: List[Dict[str, Any]]
+) -> List[Optional[Dict[str, Any]]]:
+    """Line up batched LLM results with ``entries`` (None where missing).
+
+    Items are placed by their 1-based ``index`` (the HOLDING header number);
+    items without a usable index fall back to ``symbol`` when exactly one
+    entry has it, so the same symbol held in two markets or tiers never
+    receives the other's analysis.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    positions: Dict[str, List[int]] = {}
+    for i, entry in enumerate(entries):
+        positions.setdefault(entry["symbol"], []).append(i)
+    for item in items:
+        try:
+            i = int(item.get("index")) - 1
+        except (TypeError, ValueError):
+            i = -1
+        if not 0 <= i < len(entries):
+            candidates = positions.get(str(item.get("symbol")), [])
+            if len(candidates) != 1:
+                continue
+            i = candidates[0]
+        if results[i] is None:
+            results[i] = item
+    return results
+
+
+def _fmt_signed(value: float, decimals: int = 1) -> str:
+    """Format a number with an explicit sign, e.g. ``+1.2`` / ``-0.5``."""
+    return f"{value:+.{decimals}f}"
+
+
+def _run_async(coro):
+    """Run a coroutine to completion from synchronous report code.
+
+    Report generation blocks on the DB session, so it must not be driven
+    from inside a running event loop; callers in async code should use
+    ``asyncio.to_thread(gen.generate)`` instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("Report generation cannot run inside an event loop")
+
+
+async def _gather_bounded(llm: LLMClient, coros: list, limit: Optional[int] = None) -> list:
+    """Gather LLM coroutines over one connection pool, at most ``limit`` in flight.
+
+    Exceptions are returned in place of results, as with
+    ``asyncio.gather(..., return_exceptions=True)``.
+    """
+    semaphore = asyncio.Semaphore(limit or get_settings().llm_max_concurrency)
+
+    async def _bounded(coro):
+        async with semaphore:
+            return await coro
+
+    async with llm.pooled():
+        return await asyncio.gather(*(_bounded(c) for c in coros), return_exceptions=True)
+
+
+def _cached_analyzer_report(analyzer) -> Any:
+    """Return ``analyzer.analyze()``, reusing the report within one report_run().
+
+    Only for analyzers whose output does not depend on the user.
+    """
+    run = _REPORT_RUN.get()
+    if run is None:
+        return analyzer.analyze()
+    report = run.analyzer_reports.get(analyzer.name)
+    if report is None:
+        report = run.analyzer_reports[analyzer.name] = analyzer.analyze()
+    return report
+
+
+def _get_usd_cny_rate_static(db: Session) -> float:
     """Get latest USD/CNY rate from MarketIndicatorSnapshot."""
     row = (
         db.query(MarketIndicatorSnapshot)
@@ -147,107 +358,282 @@ def _get_usd_cny_rate_static(db: Session) -> Decimal:
         .first()
     )
     if row and row.value:
-        return Decimal(str(row.value))
-    return Decimal("7.25")  # sensible fallback
+        return float(row.value)
+    return 7.25  # sensible fallback
 
 
-def _get_latest_price_cn_etf_static(db: Session, symbol: str) -> Optional[Decimal]:
-    """Try FundNavSnapshot first, then DailyQuote for CN ETFs."""
-    ts_code = _symbol_to_ts_code(symbol)
-    nav = (
-        db.query(FundNavSnapshot)
-        .filter(FundNavSnapshot.ts_code == ts_code)
-        .order_by(desc(FundNavSnapshot.nav_date))
-        .first()
-    )
-    if nav and nav.unit_nav:
-        return Decimal(str(nav.unit_nav))
+def _cny_factor_static(market: Market, symbol: str, usd_cny: float) -> float:
+    """Return the multiplier that converts a local-currency value to CNY."""
+    if symbol == "CASH" or market == Market.CN:
+        return 1.0
+    if market == Market.US:
+        return usd_cny
+    if market == Market.HK:
+        return float(HKD_CNY_RATE)
+    return 1.0
 
-    quote = (
-        db.query(DailyQuote)
-        .filter(
-            DailyQuote.symbol == symbol,
-            DailyQuote.market == Market.CN,
-        )
-        .order_by(desc(DailyQuote.trade_date))
-        .first()
+
+def _top_n_per_key(db: Session, columns: list, partition_by: list, order_by, *criteria, n: int = 1):
+    """Return ``columns`` rows limited to the first ``n`` per partition.
+
+    Uses ``ROW_NUMBER() OVER (PARTITION BY ...)`` so the latest rows for
+    many keys come back in one round-trip. Rows are ordered by partition,
+    then by rank. The partition + date lookups used here are served by
+    composite indexes: daily_quotes (symbol, market, trade_date),
+    fund_nav_snapshots (ts_code, nav_date) and fundamental_snapshots
+    (symbol, market, snapshot_date).
+    """
+    rn = sa_func.row_number().over(partition_by=partition_by, order_by=order_by).label("rn")
+    sub = db.query(*columns, rn).filter(*criteria).subquery()
+    return (
+        db.query(*[sub.c[col.key] for col in columns])
+        .filter(sub.c.rn <= n)
+        .order_by(*[sub.c[col.key] for col in partition_by], sub.c.rn)
+        .all()
     )
-    if quote and quote.close:
-        return Decimal(str(quote.close))
 
-    return None
 
+def _latest_per_key(db: Session, model, partition_by: list, order_by, *criteria) -> list:
+    """Return the latest ``model`` entity per partition in one windowed query."""
+    rn = sa_func.row_number().over(partition_by=partition_by, order_by=order_by).label("rn")
+    sub = db.query(model, rn).filter(*criteria).subquery()
+    latest = aliased(model, sub)
+    return db.query(latest).filter(sub.c.rn == 1).all()
 
-def _get_latest_price_static(db: Session, holding: Holding) -> Decimal:
-    """Return latest price for a holding. Fallback to avg_cost."""
-    if holding.symbol == "CASH":
-        return Decimal("1")
 
-    if holding.market == Market.CN and _is_cn_etf(holding.symbol):
-        price = _get_latest_price_cn_etf_static(db, holding.symbol)
-        if price is not None:
-            return price
+def _get_latest_quotes_bulk(
+    db: Session,
+    pairs: Iterable[Tuple[str, Market]],
+    n: int = 1,
+    as_of: Optional[date] = None,
+) -> Dict[Tuple[str, Market], list]:
+    """Get the latest ``n`` DailyQuote (trade_date, close) rows per (symbol, market).
 
-    quote = (
-        db.query(DailyQuote)
-        .filter(
-            DailyQuote.symbol == holding.symbol,
-            DailyQuote.market == holding.market,
-        )
-        .order_by(desc(DailyQuote.trade_date))
-        .first()
+    Each list is ordered newest first. With ``as_of``, only quotes on or
+    before that date are considered.
+    """
+    pairs = list(set(pairs))
+    if not pairs:
+        return {}
+    criteria = [tuple_(DailyQuote.symbol, DailyQuote.market).in_(pairs)]
+    if as_of is not None:
+        criteria.append(DailyQuote.trade_date <= as_of)
+    rows = _top_n_per_key(
+        db,
+        [DailyQuote.symbol, DailyQuote.market, DailyQuote.trade_date, DailyQuote.close],
+        [DailyQuote.symbol, DailyQuote.market],
+        DailyQuote.trade_date.desc(),
+        *criteria,
+        n=n,
     )
-    if quote and quote.close:
-        return Decimal(str(quote.close))
+    result: Dict[Tuple[str, Market], list] = {}
+    for row in rows:
+        result.setdefault((row.symbol, row.market), []).append(row)
+    return result
 
-    return Decimal(str(holding.avg_cost))
 
+def _get_latest_navs_bulk(
+    db: Session, symbols: Iterable[str], as_of: Optional[date] = None
+) -> Dict[str, float]:
+    """Get the latest non-zero unit NAV per CN ETF symbol, optionally as of a date."""
+    ts_codes = {_symbol_to_ts_code(s): s for s in symbols}
+    if not ts_codes:
+        return {}
+    criteria = [FundNavSnapshot.ts_code.in_(list(ts_codes))]
+    if as_of is not None:
+        criteria.append(FundNavSnapshot.nav_date <= as_of)
+    rows = _top_n_per_key(
+        db,
+        [FundNavSnapshot.ts_code, FundNavSnapshot.unit_nav],
+        [FundNavSnapshot.ts_code],
+        FundNavSnapshot.nav_date.desc(),
+        *criteria,
+    )
+    return {ts_codes[r.ts_code]: float(r.unit_nav) for r in rows if r.unit_nav}
 
-def _to_cny_static(value: Decimal, market: Market, symbol: str, usd_cny: Decimal) -> Decimal:
-    """Convert a value in local currency to CNY."""
-    if symbol == "CASH" or market == Market.CN:
-        return value
-    if market == Market.US:
-        return value * usd_cny
-    if market == Market.HK:
-        return value * HKD_CNY_RATE
-    return value
 
+def _get_latest_prices_bulk(
+    db: Session, holdings: List[Holding]
+) -> Dict[Tuple[str, Market], float]:
+    """Latest price per holding, keyed by (symbol, market).
 
-def _get_stock_name_static(db: Session, symbol: str, market: Market) -> str:
-    """Get stock name from FundamentalSnapshot or fallback to THEME_MAP/symbol."""
-    if symbol == "CASH":
-        return "现金"
+    CN ETFs prefer the latest unit NAV, then the latest close; anything
+    without data falls back to avg_cost (CASH is always 1.0).
 
-    market_value = market.value if isinstance(market, Market) else market
-    fundamental = (
-        db.query(FundamentalSnapshot)
-        .filter(
-            FundamentalSnapshot.symbol == symbol,
-            FundamentalSnapshot.market == market_value,
+    Inside report_run(), prices already looked up by an earlier report of
+    the run are reused; only the remaining pairs are queried.
+    """
+    run = _REPORT_RUN.get()
+    market_prices: Dict[Tuple[str, Market], Optional[float]] = {}
+    pairs: List[Tuple[str, Market]] = []
+    for key in {(h.symbol, h.market) for h in holdings if h.symbol != "CASH"}:
+        if run is not None and key in run.latest_prices:
+            market_prices[key] = run.latest_prices[key]
+        else:
+            market_prices[key] = None
+            pairs.append(key)
+
+    if pairs:
+        navs = _get_latest_navs_bulk(
+            db, {s for s, m in pairs if m == Market.CN and _is_cn_etf(s)}
         )
-        .order_by(FundamentalSnapshot.snapshot_date.desc())
-        .first()
+        quotes = _get_latest_quotes_bulk(db, pairs)
+        for key in pairs:
+            if key[1] == Market.CN and key[0] in navs:
+                market_prices[key] = navs[key[0]]
+            elif key in quotes and quotes[key][0].close:
+                market_prices[key] = float(quotes[key][0].close)
+        if run is not None:
+            run.latest_prices.update({key: market_prices[key] for key in pairs})
+
+    prices: Dict[Tuple[str, Market], float] = {}
+    for h in holdings:
+        key = (h.symbol, h.market)
+        if h.symbol == "CASH":
+            prices[key] = 1.0
+        elif market_prices[key] is not None:
+            prices[key] = market_prices[key]
+        else:
+            prices[key] = float(h.avg_cost)
+    return prices
+
+
+def _latest_and_as_of_per_key(
+    db: Session, columns: list, partition_by: list, date_col, as_of: date, *criteria
+) -> Dict[tuple, tuple]:
+    """Latest row and latest row on or before ``as_of`` per partition, in one query.
+
+    Partitioning also by ``date_col <= as_of`` makes ROW_NUMBER() rank both
+    sides of the cut separately, so a single sort yields both rows. Values
+    are ``(latest, as_of_row)``; ``as_of_row`` is None when every row is
+    newer than ``as_of``.
+    """
+    on_or_before = (date_col <= as_of).label("on_or_before")
+    rows = _top_n_per_key(
+        db, [*columns, on_or_before], [*partition_by, on_or_before], date_col.desc(), *criteria
     )
-    if fundamental and fundamental.name:
-        return fundamental.name
+    result: Dict[tuple, tuple] = {}
+    for row in rows:
+        key = tuple(getattr(row, col.key) for col in partition_by)
+        latest, at = result.get(key, (None, None))
+        result[key] = (latest or row, row) if row.on_or_before else (row, at)
+    return result
 
-    return THEME_MAP.get(symbol, symbol)
 
+def _get_prices_with_as_of_bulk(
+    db: Session, holdings: List[Holding], as_of: date
+) -> Tuple[Dict[Tuple[str, Market], float], Dict[Tuple[str, Market], float]]:
+    """Current and ``as_of`` prices keyed by (symbol, market), one query per table.
 
-def _get_latest_fundamental_static(
-    db: Session, symbol: str, market_value: str
-) -> Optional[FundamentalSnapshot]:
-    """Get the latest fundamental snapshot for a symbol."""
-    return (
-        db.query(FundamentalSnapshot)
-        .filter(
-            FundamentalSnapshot.symbol == symbol,
-            FundamentalSnapshot.market == market_value,
+    Current prices follow _get_latest_prices_bulk (CN ETF NAV, then close,
+    then avg_cost). ``as_of`` prices are the close at or just before the
+    date, NAV first; symbols with no such price are left out.
+    """
+    pairs = {(h.symbol, h.market) for h in holdings if h.symbol != "CASH"}
+    ts_codes = {
+        _symbol_to_ts_code(s): s for s, m in pairs if m == Market.CN and _is_cn_etf(s)
+    }
+    navs: Dict[str, tuple] = {}
+    if ts_codes:
+        nav_rows = _latest_and_as_of_per_key(
+            db,
+            [FundNavSnapshot.ts_code, FundNavSnapshot.unit_nav],
+            [FundNavSnapshot.ts_code],
+            FundNavSnapshot.nav_date,
+            as_of,
+            FundNavSnapshot.ts_code.in_(list(ts_codes)),
         )
-        .order_by(FundamentalSnapshot.snapshot_date.desc())
-        .first()
+        navs = {ts_codes[code]: rows for (code,), rows in nav_rows.items()}
+    quotes: Dict[tuple, tuple] = {}
+    if pairs:
+        quotes = _latest_and_as_of_per_key(
+            db,
+            [DailyQuote.symbol, DailyQuote.market, DailyQuote.close],
+            [DailyQuote.symbol, DailyQuote.market],
+            DailyQuote.trade_date,
+            as_of,
+            tuple_(DailyQuote.symbol, DailyQuote.market).in_(list(pairs)),
+        )
+
+    def _pick(nav_row, quote_row) -> Optional[float]:
+        if nav_row is not None and nav_row.unit_nav:
+            return float(nav_row.unit_nav)
+        if quote_row is not None and quote_row.close:
+            return float(quote_row.close)
+        return None
+
+    current: Dict[Tuple[str, Market], float] = {}
+    at_date: Dict[Tuple[str, Market], float] = {}
+    for h in holdings:
+        key = (h.symbol, h.market)
+        if h.symbol == "CASH":
+            current[key] = 1.0
+            continue
+        nav_latest, nav_at = navs.get(h.symbol, (None, None)) if h.market == Market.CN else (None, None)
+        quote_latest, quote_at = quotes.get(key, (None, None))
+        price = _pick(nav_latest, quote_latest)
+        current[key] = price if price is not None else float(h.avg_cost)
+        price = _pick(nav_at, quote_at)
+        if price is not None:
+            at_date[key] = price
+    return current, at_date
+
+
+def _get_stock_names_bulk(
+    db: Session,
+    pairs: Iterable[Tuple[str, Market]],
+    fundamentals: Optional[Dict[Tuple[str, str], Optional[FundamentalSnapshot]]] = None,
+) -> Dict[Tuple[str, Market], str]:
+    """Display names from the latest FundamentalSnapshot, keyed by (symbol, market).
+
+    Falls back to THEME_MAP, then the symbol itself (CASH is "现金").
+
+    With ``fundamentals`` (from _get_latest_fundamentals_bulk), names are
+    read from those snapshots instead of being queried.
+    """
+    pairs = set(pairs)
+    lookup = [
+        (s, m.value if isinstance(m, Market) else m) for s, m in pairs if s != "CASH"
+    ]
+    fundamental_names: Dict[Tuple[str, str], Optional[str]] = {}
+    if fundamentals is not None:
+        fundamental_names = {key: f.name for key, f in fundamentals.items() if f is not None}
+    elif lookup:
+        rows = _top_n_per_key(
+            db,
+            [FundamentalSnapshot.symbol, FundamentalSnapshot.market, FundamentalSnapshot.name],
+            [FundamentalSnapshot.symbol, FundamentalSnapshot.market],
+            FundamentalSnapshot.snapshot_date.desc(),
+            tuple_(FundamentalSnapshot.symbol, FundamentalSnapshot.market).in_(lookup),
+        )
+        fundamental_names = {(r.symbol, r.market): r.name for r in rows}
+
+    names: Dict[Tuple[str, Market], str] = {}
+    for symbol, market in pairs:
+        if symbol == "CASH":
+            names[(symbol, market)] = "现金"
+            continue
+        market_value = market.value if isinstance(market, Market) else market
+        names[(symbol, market)] = (
+            fundamental_names.get((symbol, market_value)) or THEME_MAP.get(symbol, symbol)
+        )
+    return names
+
+
+def _get_latest_fundamentals_bulk(
+    db: Session, pairs: Iterable[Tuple[str, str]]
+) -> Dict[Tuple[str, str], FundamentalSnapshot]:
+    """Latest fundamental snapshot per symbol, keyed by (symbol, market_value)."""
+    pairs = list(set(pairs))
+    if not pairs:
+        return {}
+    rows = _latest_per_key(
+        db, FundamentalSnapshot,
+        [FundamentalSnapshot.symbol, FundamentalSnapshot.market],
+        FundamentalSnapshot.snapshot_date.desc(),
+        tuple_(FundamentalSnapshot.symbol, FundamentalSnapshot.market).in_(pairs),
     )
+    return {(f.symbol, f.market): f for f in rows}
 
 
 def _get_recent_quotes_static(
@@ -307,10 +693,15 @@ def _detect_opportunity(
     return signals
 
 
-def _scan_opportunities_static(
+async def _scan_opportunities_async(
     db: Session, llm: LLMClient, user_id: Optional[int] = None
 ) -> List[Dict[str, Any]]:
-    """Scan watchlist items for investment opportunities."""
+    """Scan watchlist items for investment opportunities.
+
+    DB reads run first on the calling thread, batched across all watchlist
+    items; the per-item LLM calls are then issued concurrently, so this can
+    overlap with other LLM work.
+    """
     query = db.query(Watchlist)
     if user_id is not None:
         query = query.filter(Watchlist.user_id == user_id)
@@ -318,14 +709,27 @@ def _scan_opportunities_static(
     if not watchlist_items:
         return []
 
-    opportunities: List[Dict[str, Any]] = []
+    def _market_value(item: Watchlist) -> str:
+        return item.market.value if isinstance(item.market, Market) else item.market
+
+    fund_pairs = [(item.symbol, _market_value(item)) for item in watchlist_items]
+    fundamentals = _get_latest_fundamentals_bulk(db, fund_pairs)
+    pe_histories = _get_pe_histories_bulk(db, fund_pairs)
+    quotes_by_key = _get_quotes_for_period_bulk(
+        db, [(item.symbol, Market(item.market)) for item in watchlist_items], 60
+    )
+    nb_holdings = _get_northbound_holdings_bulk(
+        db, [item.symbol for item in watchlist_items if item.market == Market.CN], days=28
+    )
+
+    candidates: list = []
 
     for item in watchlist_items:
-        market_value = item.market.value if isinstance(item.market, Market) else item.market
-        fundamental = _get_latest_fundamental_static(db, item.symbol, market_value)
+        market_value = _market_value(item)
+        fundamental = fundamentals.get((item.symbol, market_value))
 
         # Get 60-day quotes for more comprehensive analysis
-        quotes_60d = _get_quotes_for_period(db, item.symbol, item.market, 60)
+        quotes_60d = quotes_by_key.get((item.symbol, Market(item.market)), [])
 
         # Current price
         price = None
@@ -367,18 +771,14 @@ def _scan_opportunities_static(
 
         # === Enhanced data collection for AI ===
 
-        # Technical indicators
-        change_5d = _calc_price_change(quotes_60d, 5)
-        change_20d = _calc_price_change(quotes_60d, 20)
-        ma20 = _calc_moving_average(quotes_60d, 20)
-        ma60 = _calc_moving_average(quotes_60d, 60)
-        volume_change = _calc_volume_change(quotes_60d)
-        high_60d, low_60d = _get_high_low_60d(quotes_60d)
+        # Technical indicators, from one array pass over the quotes
+        indicators = _compute_indicators(_quotes_to_array(quotes_60d))
 
         # PE percentile
         pe_percentile = None
-        if pe and pe > 0:
-            pe_percentile = _get_pe_percentile(db, item.symbol, market_value, pe)
+        pe_history = pe_histories.get((item.symbol, market_value))
+        if pe and pe > 0 and pe_history is not None:
+            pe_percentile = _rank_percentile(pe_history, pe, min_count=5)
 
         # PB ratio
         pb = float(fundamental.pb_ratio) if fundamental and fundamental.pb_ratio else None
@@ -386,30 +786,23 @@ def _scan_opportunities_static(
         # Analyst rating
         analyst_rating = fundamental.analyst_rating if fundamental else None
 
-        # Sector data
-        sector_name = item.theme  # Use watchlist theme as sector proxy
-        sector_perf = _get_sector_performance_static(db, sector_name) if sector_name else None
-        sector_flow = _get_sector_flow_static(db, sector_name, days=14) if sector_name else None
-
         # Northbound holding (for A-shares)
-        nb_holding = None
-        if item.market == Market.CN:
-            nb_holding = _get_northbound_holding_static(db, item.symbol, days=28)
+        nb_holding = nb_holdings.get(item.symbol) if item.market == Market.CN else None
 
         # Pack enhanced data
         enhanced_data = {
-            "change_5d": change_5d,
-            "change_20d": change_20d,
-            "ma20": ma20,
-            "ma60": ma60,
-            "volume_change": volume_change,
-            "high_60d": high_60d,
-            "low_60d": low_60d,
+            "change_5d": indicators["change_5d"],
+            "change_20d": indicators["change_20d"],
+            "ma20": indicators["ma20"],
+            "ma60": indicators["ma60"],
+            "volume_change": indicators["volume_change"],
+            "high_60d": indicators["high_60d"],
+            "low_60d": indicators["low_60d"],
             "pe_percentile": pe_percentile,
             "pb": pb,
             "analyst_rating": analyst_rating,
-            "sector_perf": sector_perf,
-            "sector_flow": sector_flow,
+            "sector_perf": None,  # filled below from the batched sector lookup
+            "sector_flow": None,
             "nb_holding": nb_holding,
         }
 
@@ -425,11 +818,29 @@ def _scan_opportunities_static(
             "current_price": price,
         }
 
-        # Try to enrich with AI
-        ai_result = _get_opportunity_ai_static(
-            llm, opp_entry, item, fundamental, pe, revenue_growth, change_30d, opp_signals,
-            enhanced_data
+        candidates.append((
+            opp_entry, item, fundamental, pe, revenue_growth, change_30d, opp_signals,
+            enhanced_data,
+        ))
+
+    # Sector data, using each watchlist theme as sector proxy
+    sectors = _get_sectors_bulk(db, {c[1].theme for c in candidates if c[1].theme}, days=14)
+
+    opportunities: List[Dict[str, Any]] = []
+    ai_calls: list = []
+    for opp_entry, item, *ai_args, enhanced_data in candidates:
+        enhanced_data["sector_perf"], enhanced_data["sector_flow"] = sectors.get(
+            item.theme, (None, None)
         )
+        opportunities.append(opp_entry)
+        ai_calls.append(_get_opportunity_ai_static(llm, opp_entry, item, *ai_args, enhanced_data))
+
+    # Try to enrich with AI
+    ai_results = await _gather_bounded(llm, ai_calls)
+    for opp_entry, ai_result in zip(opportunities, ai_results):
+        if isinstance(ai_result, Exception):
+            logger.warning("Opportunity AI failed for %s: %s", opp_entry["symbol"], ai_result)
+            continue
         if ai_result:
             opp_entry["reason"] = ai_result.get("reason", "")
             opp_entry["detail"] = ai_result.get("detail", "")
@@ -438,12 +849,10 @@ def _scan_opportunities_static(
             if ai_signal_type:
                 opp_entry["signal_type"] = ai_signal_type
 
-        opportunities.append(opp_entry)
-
     return opportunities
 
 
-def _get_opportunity_ai_static(
+async def _get_opportunity_ai_static(
     llm: LLMClient,
     opp_entry: Dict[str, Any],
     item: Watchlist,
@@ -554,14 +963,12 @@ def _get_opportunity_ai_static(
     user_msg = "\n".join(lines)
 
     try:
-        raw = asyncio.run(
-            llm.chat_with_system(
-                OPPORTUNITY_SYSTEM_PROMPT, user_msg, model=ModelChoice.FAST,
-                max_tokens=4000,
-            )
+        raw = await llm.chat_with_system(
+            OPPORTUNITY_SYSTEM_PROMPT, user_msg, model=ModelChoice.FAST,
+            max_tokens=4000,
         )
         return _parse_llm_json(raw)
-    except (LLMError, json.JSONDecodeError, ValueError, RuntimeError, SyntaxError) as e:
+    except (LLMError, json.JSONDecodeError, ValueError, SyntaxError) as e:
         logger.warning("Failed to get opportunity AI for %s: %s", opp_entry["symbol"], e)
         return None
 
@@ -570,103 +977,144 @@ def _get_opportunity_ai_static(
 # Enhanced Data Fetching Helpers
 # ======================================================================
 
-def _get_quotes_for_period(
-    db: Session, symbol: str, market: Market, days: int
-) -> List[DailyQuote]:
-    """Get quotes for a specified period, sorted ascending by date."""
+
+def _get_quotes_for_period_bulk(
+    db: Session, pairs: Iterable[Tuple[str, Market]], days: int
+) -> Dict[Tuple[str, Market], list]:
+    """Quotes of the last ``days`` days per pair, ascending by date, keyed by (symbol, market).
+
+    Rows carry only close/high/low/volume (enough for _quotes_to_array)
+    and are streamed from the cursor rather than loaded as ORM entities.
+    """
+    pairs = list(set(pairs))
+    if not pairs:
+        return {}
     since = date.today() - timedelta(days=days)
-    return (
-        db.query(DailyQuote)
+    rows = (
+        db.query(
+            DailyQuote.symbol, DailyQuote.market,
+            DailyQuote.close, DailyQuote.high, DailyQuote.low, DailyQuote.volume,
+        )
         .filter(
-            DailyQuote.symbol == symbol,
-            DailyQuote.market == market,
+            tuple_(DailyQuote.symbol, DailyQuote.market).in_(pairs),
             DailyQuote.trade_date >= since,
         )
-        .order_by(DailyQuote.trade_date.asc())
-        .all()
+        .order_by(DailyQuote.symbol, DailyQuote.market, DailyQuote.trade_date.asc())
+        .yield_per(500)
     )
+    result: Dict[Tuple[str, Market], list] = {}
+    for q in rows:
+        result.setdefault((q.symbol, q.market), []).append(q)
+    return result
 
 
-def _calc_price_change(quotes: List[DailyQuote], days: int) -> Optional[float]:
-    """Calculate price change over N trading days."""
-    if len(quotes) < 2:
-        return None
-    # Find quote closest to N days ago
-    target_idx = max(0, len(quotes) - days - 1)
-    old_close = quotes[target_idx].close
-    new_close = quotes[-1].close
-    if old_close is None or new_close is None or old_close == 0:
-        return None
-    return float((new_close - old_close) / old_close) * 100
+def _percentile(db: Session, query, current: float, min_count: int = 1) -> Optional[int]:
+    """Percentile rank of ``current`` within a single-column history query.
+
+    Null and zero values are ignored. Returns None when fewer than
+    ``min_count`` values remain.
+    """
+    values = pd.read_sql_query(query.statement, db.connection()).iloc[:, 0]
+    return _rank_percentile(values, current, min_count=min_count)
 
 
-def _calc_moving_average(quotes: List[DailyQuote], period: int) -> Optional[float]:
-    """Calculate simple moving average for the last N periods."""
-    if len(quotes) < period:
-        return None
-    recent = quotes[-period:]
-    closes = [float(q.close) for q in recent if q.close is not None]
-    if len(closes) < period:
+def _rank_percentile(values: pd.Series, current: float, min_count: int = 1) -> Optional[int]:
+    """Percentile rank of ``current`` within already-loaded history values."""
+    values = values.dropna().astype(float)
+    values = values[values != 0]
+    if len(values) < min_count:
         return None
-    return sum(closes) / len(closes)
+    return int((values <= current).mean() * 100)
 
 
-def _calc_volume_change(quotes: List[DailyQuote]) -> Optional[float]:
-    """Calculate volume change: recent 5-day avg vs previous 20-day avg."""
-    if len(quotes) < 25:
-        return None
-    recent_5 = quotes[-5:]
-    prev_20 = quotes[-25:-5]
-    recent_vol = sum(q.volume or 0 for q in recent_5) / 5
-    prev_vol = sum(q.volume or 0 for q in prev_20) / 20
-    if prev_vol == 0:
-        return None
-    return float((recent_vol - prev_vol) / prev_vol) * 100
+def _quotes_to_array(quotes: List[DailyQuote]) -> np.ndarray:
+    """Pack date-ascending quotes into an (n, 4) array of close, high, low, volume.
+
+    Missing prices become NaN; missing volume counts as 0.
+    """
+    return np.array(
+        [
+            (
+                np.nan if q.close is None else float(q.close),
+                np.nan if q.high is None else float(q.high),
+                np.nan if q.low is None else float(q.low),
+                float(q.volume or 0),
+            )
+            for q in quotes
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+
+
+def _compute_indicators(arr: np.ndarray) -> Dict[str, Optional[float]]:
+    """Price and volume indicators for one symbol's recent quotes.
+
+    Takes the output of _quotes_to_array and returns 5/20/60-day change
+    (%), MA20/MA60, 5d-vs-20d volume change (%) and the period high/low.
+    """
+    close, high, low, volume = arr.T
+    n = len(close)
+
+    def _change(days: int) -> Optional[float]:
+        if n < 2:
+            return None
+        old, new = close[max(0, n - days - 1)], close[-1]
+        if np.isnan(old) or np.isnan(new) or old == 0:
+            return None
+        return float((new - old) / old) * 100
+
+    def _ma(period: int) -> Optional[float]:
+        if n < period:
+            return None
+        window = close[-period:]
+        if np.isnan(window).any():
+            return None
+        return float(window.mean())
 
+    volume_change = None
+    if n >= 25:
+        recent_vol = volume[-5:].sum() / 5
+        prev_vol = volume[-25:-5].sum() / 20
+        if prev_vol != 0:
+            volume_change = float((recent_vol - prev_vol) / prev_vol) * 100
 
-def _get_high_low_60d(quotes: List[DailyQuote]) -> tuple:
-    """Get 60-day high and low prices."""
-    if not quotes:
-        return None, None
-    highs = [float(q.high) for q in quotes if q.high is not None]
-    lows = [float(q.low) for q in quotes if q.low is not None]
-    return (max(highs) if highs else None, min(lows) if lows else None)
+    highs = high[~np.isnan(high)]
+    lows = low[~np.isnan(low)]
+    return {
+        "change_5d": _change(5),
+        "change_20d": _change(20),
+        "change_60d": _change(60),
+        "ma20": _ma(20),
+        "ma60": _ma(60),
+        "volume_change": volume_change,
+        "high_60d": float(highs.max()) if highs.size else None,
+        "low_60d": float(lows.min()) if lows.size else None,
+    }
 
 
-def _get_pe_percentile(
-    db: Session, symbol: str, market_value: str, current_pe: float
-) -> Optional[int]:
-    """Calculate PE percentile over the past year."""
+def _get_pe_histories_bulk(
+    db: Session, pairs: Iterable[Tuple[str, str]]
+) -> Dict[Tuple[str, str], pd.Series]:
+    """Past-year positive PE history per symbol, keyed by (symbol, market_value)."""
+    pairs = list(set(pairs))
+    if not pairs:
+        return {}
     since = date.today() - timedelta(days=365)
-    snapshots = (
-        db.query(FundamentalSnapshot.pe_ratio)
+    query = (
+        db.query(FundamentalSnapshot.symbol, FundamentalSnapshot.market, FundamentalSnapshot.pe_ratio)
         .filter(
-            FundamentalSnapshot.symbol == symbol,
-            FundamentalSnapshot.market == market_value,
+            tuple_(FundamentalSnapshot.symbol, FundamentalSnapshot.market).in_(pairs),
             FundamentalSnapshot.snapshot_date >= since,
             FundamentalSnapshot.pe_ratio.isnot(None),
             FundamentalSnapshot.pe_ratio > 0,
         )
-        .all()
     )
-    if len(snapshots) < 5:
-        return None
-    pe_values = sorted([float(s.pe_ratio) for s in snapshots])
-    count_below = sum(1 for pe in pe_values if pe <= current_pe)
-    return int(count_below / len(pe_values) * 100)
-
-
-def _get_fund_nav_static(db: Session, symbol: str) -> Optional[Dict[str, Any]]:
-    """Get latest ETF/fund NAV data."""
-    ts_code = _symbol_to_ts_code(symbol)
-    nav = (
-        db.query(FundNavSnapshot)
-        .filter(FundNavSnapshot.ts_code == ts_code)
-        .order_by(FundNavSnapshot.nav_date.desc())
-        .first()
-    )
-    if not nav:
-        return None
+    df = pd.read_sql_query(query.statement, db.connection())
+    return {key: group["pe_ratio"] for key, group in df.groupby(["symbol", "market"])}
+
+
+def _fund_nav_to_dict(nav: FundNavSnapshot) -> Dict[str, Any]:
+    """Serialize a FundNavSnapshot row for prompt building."""
     return {
         "unit_nav": float(nav.unit_nav) if nav.unit_nav else None,
         "accum_nav": float(nav.accum_nav) if nav.accum_nav else None,
@@ -674,20 +1122,45 @@ def _get_fund_nav_static(db: Session, symbol: str) -> Optional[Dict[str, Any]]:
     }
 
 
-def _get_northbound_holding_static(
-    db: Session, symbol: str, days: int = 14
-) -> Optional[Dict[str, Any]]:
-    """Get northbound holding data for an A-share stock."""
+def _get_fund_navs_bulk(db: Session, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest ETF/fund NAV data per symbol, keyed by symbol."""
+    ts_codes = {_symbol_to_ts_code(s): s for s in symbols}
+    if not ts_codes:
+        return {}
+    rows = _latest_per_key(
+        db, FundNavSnapshot, [FundNavSnapshot.ts_code], FundNavSnapshot.nav_date.desc(),
+        FundNavSnapshot.ts_code.in_(list(ts_codes)),
+    )
+    return {ts_codes[nav.ts_code]: _fund_nav_to_dict(nav) for nav in rows}
+
+
+def _get_northbound_holdings_bulk(
+    db: Session, symbols: Iterable[str], days: int = 14
+) -> Dict[str, Dict[str, Any]]:
+    """Recent northbound holding summary per A-share symbol, keyed by symbol."""
+    symbols = list(set(symbols))
+    if not symbols:
+        return {}
     since = date.today() - timedelta(days=days)
-    holdings = (
+    rows = (
         db.query(NorthboundHolding)
         .filter(
-            NorthboundHolding.symbol == symbol,
+            NorthboundHolding.symbol.in_(symbols),
             NorthboundHolding.trade_date >= since,
         )
-        .order_by(NorthboundHolding.trade_date.asc())
+        .order_by(NorthboundHolding.symbol, NorthboundHolding.trade_date.asc())
         .all()
     )
+    by_symbol: Dict[str, List[NorthboundHolding]] = {}
+    for row in rows:
+        by_symbol.setdefault(row.symbol, []).append(row)
+    return {sym: _summarize_northbound_holding(rows) for sym, rows in by_symbol.items()}
+
+
+def _summarize_northbound_holding(
+    holdings: List[NorthboundHolding],
+) -> Optional[Dict[str, Any]]:
+    """Summarize date-ascending northbound holding rows for one stock."""
     if not holdings:
         return None
     latest = holdings[-1]
@@ -705,24 +1178,44 @@ def _get_northbound_holding_static(
     }
 
 
-def _get_sector_for_holding(db: Session, symbol: str) -> Optional[str]:
-    """Get sector/industry for a holding based on theme mapping or sector data."""
+def _get_signals_by_symbol_bulk(
+    db: Session, symbols: Iterable[str], limit: int = 5, days: int = 30
+) -> Dict[str, List[Signal]]:
+    """Get up to ``limit`` most recent related signals per symbol with one query.
+
+    The OR'ed ``related_symbols`` LIKE filters run as a single scan over the
+    last ``days`` days, then rows are bucketed in Python by exact membership
+    of the symbol.
+    """
+    symbols = list(set(symbols))
+    if not symbols:
+        return {}
+    since = datetime.now() - timedelta(days=days)
+    rows = (
+        db.query(Signal)
+        .filter(
+            Signal.created_at >= since,
+            or_(*[Signal.related_symbols.contains(s) for s in symbols]),
+        )
+        .order_by(Signal.created_at.desc())
+        .all()
+    )
+    by_symbol: Dict[str, List[Signal]] = {s: [] for s in symbols}
+    for sig in rows:
+        for symbol in sig.related_symbols or []:
+            bucket = by_symbol.get(symbol)
+            if bucket is not None and len(bucket) < limit:
+                bucket.append(sig)
+    return by_symbol
+
+
+def _get_sector_for_holding(symbol: str) -> Optional[str]:
+    """Get the theme of a holding from THEME_MAP."""
     return THEME_MAP.get(symbol)
 
 
-def _get_sector_performance_static(
-    db: Session, sector_name: str
-) -> Optional[Dict[str, Any]]:
-    """Get sector performance data for the current week."""
-    # Find sector by name
-    sector = (
-        db.query(SectorSnapshot)
-        .filter(SectorSnapshot.name.contains(sector_name))
-        .order_by(SectorSnapshot.snapshot_date.desc())
-        .first()
-    )
-    if not sector:
-        return None
+def _summarize_sector_performance(sector: SectorSnapshot) -> Dict[str, Any]:
+    """Summarize the latest snapshot of a sector."""
     return {
         "name": sector.name,
         "change_pct": float(sector.change_pct) if sector.change_pct else None,
@@ -730,20 +1223,8 @@ def _get_sector_performance_static(
     }
 
 
-def _get_sector_flow_static(
-    db: Session, sector_name: str, days: int = 14
-) -> Optional[Dict[str, Any]]:
-    """Get sector fund flow data."""
-    since = date.today() - timedelta(days=days)
-    flows = (
-        db.query(SectorFlowSnapshot)
-        .filter(
-            SectorFlowSnapshot.name.contains(sector_name),
-            SectorFlowSnapshot.snapshot_date >= since,
-        )
-        .order_by(SectorFlowSnapshot.snapshot_date.desc())
-        .all()
-    )
+def _summarize_sector_flow(flows: List[SectorFlowSnapshot]) -> Optional[Dict[str, Any]]:
+    """Summarize date-descending sector flow rows: latest flow and its streak."""
     if not flows:
         return None
     latest = flows[0]
@@ -763,6 +1244,50 @@ def _get_sector_flow_static(
     }
 
 
+def _get_sectors_bulk(
+    db: Session, sector_names: Iterable[str], days: int = 14
+) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Latest sector performance and recent fund flow per theme keyword.
+
+    Returns ``(performance, flow)`` per theme. Themes resolve to exact sector
+    names through THEME_SECTORS, so each table is read with one ``IN`` on
+    its name index.
+    """
+    sector_names = set(sector_names)
+    if not sector_names:
+        return {}
+    names_by_theme = {s: THEME_SECTORS.get(s, (s,)) for s in sector_names}
+    all_names = {n for names in names_by_theme.values() for n in names}
+
+    rows = _latest_per_key(
+        db, SectorSnapshot, [SectorSnapshot.name], SectorSnapshot.snapshot_date.desc(),
+        SectorSnapshot.name.in_(all_names),
+    )
+    latest_by_name: Dict[str, SectorSnapshot] = {row.name: row for row in rows}
+
+    since = date.today() - timedelta(days=days)
+    flows: List[SectorFlowSnapshot] = (
+        db.query(SectorFlowSnapshot)
+        .filter(
+            SectorFlowSnapshot.name.in_(all_names),
+            SectorFlowSnapshot.snapshot_date >= since,
+        )
+        .order_by(SectorFlowSnapshot.snapshot_date.desc())
+        .all()
+    )
+
+    result = {}
+    for sector_name in sector_names:
+        names = set(names_by_theme[sector_name])
+        candidates = [latest_by_name[n] for n in names if n in latest_by_name]
+        sector = max(candidates, key=lambda r: r.snapshot_date, default=None)
+        result[sector_name] = (
+            _summarize_sector_performance(sector) if sector else None,
+            _summarize_sector_flow([f for f in flows if f.name in names]),
+        )
+    return result
+
+
 def _get_yield_spread_static(db: Session) -> Optional[Dict[str, Any]]:
     """Get latest treasury yield spread data."""
     latest = (
@@ -772,21 +1297,20 @@ def _get_yield_spread_static(db: Session) -> Optional[Dict[str, Any]]:
     )
     if not latest:
         return None
-    # Get 6-month history for trend
+    # Count inverted days over the last 6 months for trend
     since = date.today() - timedelta(days=180)
-    history = (
-        db.query(YieldSpreadRecord)
-        .filter(YieldSpreadRecord.date >= since)
-        .order_by(YieldSpreadRecord.date.asc())
-        .all()
+    inverted_days = (
+        db.query(sa_func.count())
+        .select_from(YieldSpreadRecord)
+        .filter(YieldSpreadRecord.date >= since, YieldSpreadRecord.spread < 0)
+        .scalar()
     )
-    inverted_months = sum(1 for r in history if r.spread < 0) if history else 0
     return {
         "dgs2": float(latest.dgs2),
         "dgs10": float(latest.dgs10),
         "spread": float(latest.spread),
         "is_inverted": latest.spread < 0,
-        "inverted_months": inverted_months // 20,  # Approx trading days per month
+        "inverted_months": inverted_days // 20,  # Approx trading days per month
     }
 
 
@@ -830,22 +1354,18 @@ def _get_index_valuations_static(db: Session) -> List[Dict[str, Any]]:
         if not latest:
             continue
         # Calculate percentile
-        since = date.today() - timedelta(days=365)
-        history = (
-            db.query(IndexValuationSnapshot.pe)
-            .filter(
-                IndexValuationSnapshot.ts_code == ts_code,
-                IndexValuationSnapshot.trade_date >= since,
-                IndexValuationSnapshot.pe.isnot(None),
-            )
-            .all()
-        )
         pe_percentile = None
-        if history and latest.pe:
-            pe_values = sorted([float(h.pe) for h in history if h.pe])
-            if pe_values:
-                count_below = sum(1 for pe in pe_values if pe <= float(latest.pe))
-                pe_percentile = int(count_below / len(pe_values) * 100)
+        if latest.pe:
+            since = date.today() - timedelta(days=365)
+            history = (
+                db.query(IndexValuationSnapshot.pe)
+                .filter(
+                    IndexValuationSnapshot.ts_code == ts_code,
+                    IndexValuationSnapshot.trade_date >= since,
+                    IndexValuationSnapshot.pe.isnot(None),
+                )
+            )
+            pe_percentile = _percentile(db, history, float(latest.pe))
         result.append({
             "ts_code": ts_code,
             "name": latest.name,
@@ -986,22 +1506,18 @@ def _get_commodity_data_static(db: Session) -> List[Dict[str, Any]]:
         if not latest:
             continue
         # Get 60-day history for percentile
-        since = date.today() - timedelta(days=60)
-        history = (
-            db.query(MarketIndicatorSnapshot.value)
-            .filter(
-                MarketIndicatorSnapshot.symbol == symbol,
-                MarketIndicatorSnapshot.date >= since,
-                MarketIndicatorSnapshot.value.isnot(None),
-            )
-            .all()
-        )
         percentile = None
-        if history and latest.value:
-            values = sorted([float(h.value) for h in history if h.value])
-            if values:
-                count_below = sum(1 for v in values if v <= float(latest.value))
-                percentile = int(count_below / len(values) * 100)
+        if latest.value:
+            since = date.today() - timedelta(days=60)
+            history = (
+                db.query(MarketIndicatorSnapshot.value)
+                .filter(
+                    MarketIndicatorSnapshot.symbol == symbol,
+                    MarketIndicatorSnapshot.date >= since,
+                    MarketIndicatorSnapshot.value.isnot(None),
+                )
+            )
+            percentile = _percentile(db, history, float(latest.value))
         result.append({
             "symbol": symbol,
             "name": name,
@@ -1035,13 +1551,21 @@ class DailyReportGenerator:
     def __init__(self, db: Session, user_id: Optional[int] = None):
         self.db = db
         self.user_id = user_id
-        self._llm = LLMClient()
-        self._usd_cny: Optional[Decimal] = None
+        settings = get_settings()
+        self._llm = LLMClient(cache_ttl=settings.llm_cache_ttl, cache_path=settings.llm_cache_path)
+        self._usd_cny: Optional[float] = None
+        self._fx_cache: Dict[Tuple[Market, str], float] = {}
+        self._holding_ctx: Dict[Tuple[str, Market], Dict[str, Any]] = {}
+        # Latest snapshot per looked-up (symbol, market_value); None if there is none
+        self._fundamentals: Dict[Tuple[str, str], Optional[FundamentalSnapshot]] = {}
 
     def generate(self) -> int:
         """Generate a daily report and save to DB. Returns report ID."""
         now = datetime.now()
         self._usd_cny = _get_usd_cny_rate_static(self.db)
+        self._fx_cache.clear()
+        self._holding_ctx.clear()
+        self._fundamentals.clear()
 
         # 1. Build holdings data with P&L
         holdings_data, total_value_cny, cash_pct = self._build_holdings_data()
@@ -1050,30 +1574,35 @@ class DailyReportGenerator:
         self._enrich_today_change(holdings_data)
 
         # 3. Sort by today_change_pct ascending (worst first)
-        holdings_data.sort(key=lambda h: h.get("today_change_pct") or 0)
-
-        # 4. AI commentary for each holding
-        self._enrich_with_ai(holdings_data, total_value_cny)
-
-        # 5. Scan opportunities (watchlist + related sectors)
-        opportunities = _scan_opportunities_static(self.db, self._llm, user_id=self.user_id)
+        change_keys = [h["today_change_pct"] or 0.0 for h in holdings_data]
+        order = sorted(range(len(holdings_data)), key=change_keys.__getitem__)
+        holdings_data[:] = [holdings_data[i] for i in order]
 
-        # 6. Generate portfolio summary with AI
-        today_pnl = sum(h.get("today_pnl", 0) for h in holdings_data)
-        today_pnl_pct = (today_pnl / float(total_value_cny) * 100) if total_value_cny else 0
-        total_pnl = sum(h.get("total_pnl", 0) for h in holdings_data)
-        total_pnl_pct = (total_pnl / float(total_value_cny) * 100) if total_value_cny else 0
-
-        ai_summary = self._generate_summary(holdings_data, today_pnl, today_pnl_pct)
+        # 4. Portfolio totals
+        today_pnl = total_pnl = 0.0
+        holdings_count = 0
+        for h in holdings_data:
+            today_pnl += h["today_pnl"]
+            total_pnl += h["total_pnl"]
+            if h["symbol"] != "CASH":
+                holdings_count += 1
+        today_pnl_pct = (today_pnl / total_value_cny * 100) if total_value_cny else 0
+        total_pnl_pct = (total_pnl / total_value_cny * 100) if total_value_cny else 0
+
+        # 5. AI commentary per holding, opportunity scan (watchlist + related
+        #    sectors) and portfolio summary
+        opportunities, ai_summary = _run_async(
+            self._run_ai(holdings_data, total_value_cny, today_pnl, today_pnl_pct)
+        )
 
         content = {
             "portfolio_summary": {
-                "total_value_cny": round(float(total_value_cny), 2),
+                "total_value_cny": round(total_value_cny, 2),
                 "today_pnl": round(today_pnl, 2),
                 "today_pnl_pct": round(today_pnl_pct, 2),
                 "total_pnl": round(total_pnl, 2),
                 "total_pnl_pct": round(total_pnl_pct, 2),
-                "holdings_count": len([h for h in holdings_data if h["symbol"] != "CASH"]),
+                "holdings_count": holdings_count,
                 "cash_pct": round(cash_pct, 2),
                 "ai_summary": ai_summary,
             },
@@ -1090,10 +1619,28 @@ class DailyReportGenerator:
             user_id=self.user_id,
         )
         self.db.add(report)
+        self.db.flush()
+        # Read the PK before commit expires the instance, so no reload SELECT is needed
+        report_id = report.id
         self.db.commit()
-        self.db.refresh(report)
-        logger.info(f"Daily report generated, id={report.id}")
-        return report.id
+        logger.info(f"Daily report generated, id={report_id}")
+        return report_id
+
+    def _cny_factor(self, market: Market, symbol: str) -> float:
+        """Memoized CNY conversion multiplier for the current report run."""
+        key = (market, symbol)
+        factor = self._fx_cache.get(key)
+        if factor is None:
+            factor = self._fx_cache[key] = _cny_factor_static(market, symbol, self._usd_cny)
+        return factor
+
+    def _load_fundamentals(self, pairs: List[Tuple[str, Market]]) -> None:
+        """Fetch latest fundamentals for pairs not yet in ``self._fundamentals``."""
+        missing = [(s, m.value) for s, m in pairs if (s, m.value) not in self._fundamentals]
+        if not missing:
+            return
+        self._fundamentals.update(dict.fromkeys(missing))
+        self._fundamentals.update(_get_latest_fundamentals_bulk(self.db, missing))
 
     # ------------------------------------------------------------------
     # Holdings data
@@ -1110,64 +1657,69 @@ class DailyReportGenerator:
             query = query.filter(Holding.user_id == self.user_id)
         holdings = query.all()
 
-        holdings_data: List[Dict[str, Any]] = []
-        total_value_cny = Decimal("0")
-        cash_value_cny = Decimal("0")
-
-        # First pass: compute market values
-        position_values: List[tuple] = []  # (holding, price, qty, avg_cost, value_cny)
-        for h in holdings:
-            price = _get_latest_price_static(self.db, h)
-            qty = Decimal(str(h.quantity))
-            avg_cost = Decimal(str(h.avg_cost))
-            local_value = price * qty
-            value_cny = _to_cny_static(local_value, h.market, h.symbol, self._usd_cny)
-            total_value_cny += value_cny
-            if h.symbol == "CASH":
-                cash_value_cny += value_cny
-            position_values.append((h, price, qty, avg_cost, value_cny))
-
-        if total_value_cny == 0:
-            total_value_cny = Decimal("1")
-
-        cash_pct = float(cash_value_cny / total_value_cny * 100)
-
-        # Second pass: build data dicts with weight
-        for h, price, qty, avg_cost, value_cny in position_values:
-            weight_pct = float(value_cny / total_value_cny * 100)
-            pnl_local = (price - avg_cost) * qty
-            pnl_pct = float((price - avg_cost) / avg_cost * 100) if avg_cost else 0.0
-
-            # Convert total_pnl to CNY for consistent aggregation
-            total_pnl_cny = float(_to_cny_static(pnl_local, h.market, h.symbol, self._usd_cny))
+        # Bulk lookups instead of a price and a name query per holding. The
+        # fundamentals that supply names are kept for the AI prompts.
+        prices = _get_latest_prices_bulk(self.db, holdings)
+        self._load_fundamentals([(h.symbol, h.market) for h in holdings if h.symbol != "CASH"])
+        names = _get_stock_names_bulk(
+            self.db, [(h.symbol, h.market) for h in holdings], fundamentals=self._fundamentals
+        )
 
-            name = _get_stock_name_static(self.db, h.symbol, h.market)
+        # Position math on float64 arrays; Decimal DB values are converted here
+        n = len(holdings)
+        price = np.fromiter((prices[(h.symbol, h.market)] for h in holdings), np.float64, n)
+        qty = np.fromiter((h.quantity for h in holdings), np.float64, n)
+        avg_cost = np.fromiter((h.avg_cost for h in holdings), np.float64, n)
+        fx = np.fromiter((self._cny_factor(h.market, h.symbol) for h in holdings), np.float64, n)
+        is_cash = np.fromiter((h.symbol == "CASH" for h in holdings), bool, n)
+
+        value_cny = price * qty * fx
+        total_value_cny = float(value_cny.sum()) or 1.0
+        cash_pct = float(value_cny[is_cash].sum() / total_value_cny * 100)
+
+        weight_pct = value_cny / total_value_cny * 100
+        # total_pnl in CNY for consistent aggregation
+        total_pnl_cny = (price - avg_cost) * qty * fx
+        safe_cost = np.where(avg_cost != 0, avg_cost, 1.0)
+        pnl_pct = np.where(avg_cost != 0, (price - avg_cost) / safe_cost * 100, 0.0)
+
+        # Unset stop-loss / take-profit prices are NaN, so their comparisons are False
+        stop_loss = np.fromiter(
+            (h.stop_loss_price or np.nan for h in holdings), np.float64, n
+        )
+        take_profit = np.fromiter(
+            (h.take_profit_price or np.nan for h in holdings), np.float64, n
+        )
+        near_stop_loss = (price > 0) & (price <= stop_loss * 1.05)
+        near_take_profit = (price > 0) & (price >= take_profit * 0.95)
 
-            near_stop = False
-            near_tp = False
-            if h.stop_loss_price and float(price) > 0:
-                near_stop = float(price) <= float(h.stop_loss_price) * 1.05
-            if h.take_profit_price and float(price) > 0:
-                near_tp = float(price) >= float(h.take_profit_price) * 0.95
+        holdings_data: List[Dict[str, Any]] = []
+        for h, p, q, c, w, pnl, pct, sl, tp, near_stop, near_tp in zip(
+            holdings, price.tolist(), qty.tolist(), avg_cost.tolist(),
+            weight_pct.tolist(), total_pnl_cny.tolist(), pnl_pct.tolist(),
+            stop_loss.tolist(), take_profit.tolist(),
+            near_stop_loss.tolist(), near_take_profit.tolist(),
+        ):
+            name = names[(h.symbol, h.market)]
 
             entry: Dict[str, Any] = {
                 "symbol": h.symbol,
                 "name": name,
                 "market": h.market.value,
                 "tier": h.tier.value,
-                "weight_pct": round(weight_pct, 2),
-                "quantity": float(qty),
-                "avg_cost": float(avg_cost),
-                "current_price": float(price),
+                "weight_pct": round(w, 2),
+                "quantity": q,
+                "avg_cost": c,
+                "current_price": p,
                 "today_change_pct": None,  # filled later
                 "today_pnl": 0,  # filled later
-                "total_pnl": round(total_pnl_cny, 2),
-                "total_pnl_pct": round(pnl_pct, 2),
+                "total_pnl": round(pnl, 2),
+                "total_pnl_pct": round(pct, 2),
                 "action": "hold",  # default, overridden by AI
                 "ai_comment": "",
                 "ai_detail": "",
-                "stop_loss_price": float(h.stop_loss_price) if h.stop_loss_price else None,
-                "take_profit_price": float(h.take_profit_price) if h.take_profit_price else None,
+                "stop_loss_price": None if np.isnan(sl) else sl,
+                "take_profit_price": None if np.isnan(tp) else tp,
                 "near_stop_loss": near_stop,
                 "near_take_profit": near_tp,
             }
@@ -1181,6 +1733,11 @@ class DailyReportGenerator:
 
     def _enrich_today_change(self, holdings_data: List[Dict[str, Any]]) -> None:
         """For each holding, compute today_change_pct and today_pnl from latest 2 quotes."""
+        latest_two = _get_latest_quotes_bulk(
+            self.db,
+            [(e["symbol"], Market(e["market"])) for e in holdings_data if e["symbol"] != "CASH"],
+            n=2,
+        )
         for entry in holdings_data:
             if entry["symbol"] == "CASH":
                 entry["today_change_pct"] = 0.0
@@ -1188,55 +1745,111 @@ class DailyReportGenerator:
                 continue
 
             market_enum = Market(entry["market"])
-            quotes = (
-                self.db.query(DailyQuote)
-                .filter(
-                    DailyQuote.symbol == entry["symbol"],
-                    DailyQuote.market == market_enum,
-                )
-                .order_by(desc(DailyQuote.trade_date))
-                .limit(2)
-                .all()
-            )
+            quotes = latest_two.get((entry["symbol"], market_enum), [])
 
             if len(quotes) >= 2 and quotes[0].close and quotes[1].close:
-                latest_close = Decimal(str(quotes[0].close))
-                prev_close = Decimal(str(quotes[1].close))
-                if prev_close != 0:
-                    change_pct = float((latest_close - prev_close) / prev_close * 100)
-                    entry["today_change_pct"] = round(change_pct, 2)
-                    # today_pnl = (current - prev) * quantity, converted to CNY
-                    pnl_local = (latest_close - prev_close) * Decimal(str(entry["quantity"]))
-                    pnl_cny = float(_to_cny_static(pnl_local, market_enum, entry["symbol"], self._usd_cny))
-                    entry["today_pnl"] = round(pnl_cny, 2)
+                latest_close = float(quotes[0].close)
+                prev_close = float(quotes[1].close)
+                change_pct = (latest_close - prev_close) / prev_close * 100
+                entry["today_change_pct"] = round(change_pct, 2)
+                # today_pnl = (current - prev) * quantity, converted to CNY
+                pnl_cny = (
+                    (latest_close - prev_close) * entry["quantity"]
+                    * self._cny_factor(market_enum, entry["symbol"])
+                )
+                entry["today_pnl"] = round(pnl_cny, 2)
 
     # ------------------------------------------------------------------
     # AI enrichment
     # ------------------------------------------------------------------
 
-    def _enrich_with_ai(self, holdings_data: List[Dict[str, Any]], total_value_cny: Decimal) -> None:
-        """Add AI commentary to each non-CASH holding."""
+    async def _run_ai(
+        self,
+        holdings_data: List[Dict[str, Any]],
+        total_value_cny: float,
+        today_pnl: float,
+        today_pnl_pct: float,
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """Run all LLM work for the report on one event loop and connection pool.
+
+        Holding commentary (which also yields the portfolio summary) and
+        the opportunity scan are independent, so they run concurrently.
+        Returns ``(opportunities, ai_summary)``; the summary falls back to a
+        template when the LLM gives none.
+        """
+        summary_context = _daily_summary_context(holdings_data, today_pnl, today_pnl_pct)
+        async with self._llm.pooled():
+            ai_summary, opportunities = await asyncio.gather(
+                self._enrich_with_ai(holdings_data, total_value_cny, summary_context),
+                _scan_opportunities_async(self.db, self._llm, user_id=self.user_id),
+            )
+        return opportunities, ai_summary or _daily_summary_template(today_pnl, today_pnl_pct)
+
+    async def _enrich_with_ai(
+        self,
+        holdings_data: List[Dict[str, Any]],
+        total_value_cny: float,
+        summary_context: Optional[str] = None,
+    ) -> Optional[str]:
+        """Add AI commentary to each non-CASH holding.
+
+        With ``summary_context`` (from _daily_summary_context), the first
+        batched prompt also asks for the portfolio summary, which is
+        returned; otherwise returns None.
+        """
         non_cash = [h for h in holdings_data if h["symbol"] != "CASH"]
         if not non_cash:
-            return
-
-        async def _run_all():
-            tasks = []
-            for entry in non_cash:
-                tasks.append(self._get_holding_ai(entry))
-            return await asyncio.gather(*tasks, return_exceptions=True)
-
-        try:
-            results = asyncio.run(_run_all())
-        except RuntimeError:
-            # If already in an async context, use a new event loop
-            loop = asyncio.new_event_loop()
-            try:
-                results = loop.run_until_complete(_run_all())
-            finally:
-                loop.close()
+            return None
 
-        for entry, result in zip(non_cash, results):
+        # All DB work happens here, before any LLM call is awaited
+        self._prefetch_holding_context(non_cash)
+        # Prompts, cache keys and results are by position in non_cash: the same
+        # symbol may be held in more than one market or tier
+        prompts = [self._build_holding_prompt(e) for e in non_cash]
+
+        # Holdings whose prompt is unchanged since an earlier run reuse that analysis
+        settings = get_settings()
+        cache_keys = [_holding_ai_cache_key(p, e) for p, e in zip(prompts, non_cash)]
+        results: Dict[int, Any] = {}
+        for j, key in enumerate(cache_keys):
+            hit = self._llm.cached(key)
+            if hit is not None:
+                results[j] = json.loads(hit)
+        pending = [j for j in range(len(non_cash)) if j not in results]
+
+        per_prompt = settings.llm_holdings_per_prompt or len(pending) or 1
+        chunks = [pending[i:i + per_prompt] for i in range(0, len(pending), per_prompt)]
+        if not chunks and summary_context is not None:
+            chunks = [[]]  # every holding was reused; still ask for the summary
+        chunk_results = await _gather_bounded(
+            self._llm,
+            [
+                self._get_holdings_ai_batch(
+                    [non_cash[j] for j in c], [prompts[j] for j in c],
+                    summary_context if i == 0 else None,
+                )
+                for i, c in enumerate(chunks)
+            ],
+        )
+        summary: Optional[str] = None
+        for i, (chunk, chunk_result) in enumerate(zip(chunks, chunk_results)):
+            if isinstance(chunk_result, Exception):
+                results.update({j: chunk_result for j in chunk})
+                continue
+            chunk_items, chunk_summary = chunk_result
+            for j, result in zip(chunk, chunk_items):
+                results[j] = result
+                if result:
+                    self._llm.remember(
+                        cache_keys[j],
+                        json.dumps(result, ensure_ascii=False),
+                        ttl=settings.llm_holding_cache_ttl,
+                    )
+            if i == 0:
+                summary = chunk_summary
+
+        for j, entry in enumerate(non_cash):
+            result = results.get(j)
             if isinstance(result, Exception):
                 logger.warning("AI enrichment failed for %s: %s", entry["symbol"], result)
                 continue
@@ -1246,63 +1859,150 @@ class DailyReportGenerator:
                 if action in ("hold", "add", "reduce", "sell"):
                     entry["action"] = action
                 entry["ai_detail"] = result.get("ai_detail", "")
+        return summary
 
-    async def _get_holding_ai(self, entry: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    async def _get_holding_ai(
+        self, entry: Dict[str, Any], user_msg: str
+    ) -> Optional[Dict[str, str]]:
         """Call LLM for a single holding and return parsed JSON dict."""
+        try:
+            raw = await self._llm.chat_with_system(
+                DAILY_HOLDING_SYSTEM_PROMPT, user_msg, model=ModelChoice.FAST,
+                max_tokens=_holding_max_tokens(entry),
+            )
+            return _parse_llm_json(raw)
+        except (LLMError, json.JSONDecodeError, ValueError, SyntaxError) as e:
+            logger.warning("Failed to get AI for %s: %s", entry["symbol"], e)
+            return None
+
+    async def _get_holdings_ai_batch(
+        self,
+        entries: List[Dict[str, Any]],
+        prompts: List[str],
+        summary_context: Optional[str] = None,
+    ) -> Tuple[List[Optional[Dict[str, str]]], Optional[str]]:
+        """Call LLM once for several holdings; results are in ``entries`` order.
+
+        ``prompts`` holds each entry's prompt from _build_holding_prompt, in
+        the same order.
+        With ``summary_context`` the same call also asks for the portfolio
+        summary. Returns ``(results, portfolio_summary or None)``.
+
+        Holdings missing from the batched answer (or all of them, if it
+        can't be parsed) are retried one by one via ``_get_holding_ai``.
+        """
+        if len(entries) == 1 and summary_context is None:
+            return [await self._get_holding_ai(entries[0], prompts[0])], None
+
+        blocks = [
+            f"=== HOLDING {i}: {entry['symbol']} ===\n{prompt}"
+            for i, (entry, prompt) in enumerate(zip(entries, prompts), 1)
+        ]
+        system_prompt = DAILY_HOLDINGS_BATCH_SYSTEM_PROMPT
+        max_tokens = sum(_holding_max_tokens(e) for e in entries)
+        if summary_context is not None:
+            blocks.append(f"=== PORTFOLIO ===\n{summary_context}")
+            system_prompt = DAILY_HOLDINGS_SUMMARY_BATCH_SYSTEM_PROMPT
+            max_tokens += SUMMARY_MAX_TOKENS
+        items: List[Dict[str, str]] = []
+        summary: Optional[str] = None
+        try:
+            raw = await self._llm.chat_with_system(
+                system_prompt, "\n\n".join(blocks),
+                model=ModelChoice.FAST,
+                max_tokens=max_tokens,
+            )
+            parsed = _parse_llm_json(raw)
+            items = [item for item in parsed.get("results", []) if isinstance(item, dict)]
+            if summary_context is not None:
+                summary = str(parsed.get("portfolio_summary") or "").strip() or None
+        except (LLMError, json.JSONDecodeError, ValueError, SyntaxError) as e:
+            logger.warning(
+                "Batched AI failed for %s: %s", ", ".join(x["symbol"] for x in entries), e
+            )
+
+        results = _match_batch_results(entries, items)
+        for i, entry in enumerate(entries):
+            if results[i] is None:
+                results[i] = await self._get_holding_ai(entry, prompts[i])
+        return results, summary
+
+    def _prefetch_holding_context(self, entries: List[Dict[str, Any]]) -> None:
+        """Bulk-load the per-holding DB context used by _build_holding_prompt.
+
+        One query per data kind for all holdings, instead of one per
+        holding inside each AI task.
+        """
+        pairs = [(e["symbol"], Market(e["market"])) for e in entries]
+        cn_etfs, cn_stocks = _split_cn_symbols(pairs)
+
+        quotes = _get_quotes_for_period_bulk(self.db, pairs, 60)
+        self._load_fundamentals(pairs)
+        pe_histories = _get_pe_histories_bulk(self.db, [(s, m.value) for s, m in pairs])
+        navs = _get_fund_navs_bulk(self.db, cn_etfs)
+        nb_holdings = _get_northbound_holdings_bulk(self.db, cn_stocks, days=14)
+        signals = _get_signals_by_symbol_bulk(self.db, [s for s, _ in pairs])
+
+        self._holding_ctx.update({
+            (symbol, market): {
+                "indicators": _compute_indicators(_quotes_to_array(quotes.get((symbol, market), []))),
+                "fundamental": self._fundamentals.get((symbol, market.value)),
+                "pe_history": pe_histories.get((symbol, market.value)),
+                "nav": navs.get(symbol),
+                "nb_holding": nb_holdings.get(symbol),
+                "signals": signals.get(symbol, []),
+            }
+            for symbol, market in pairs
+        })
+
+    def _build_holding_prompt(self, entry: Dict[str, Any]) -> str:
+        """Build the LLM user prompt for a single holding from DB context."""
         symbol = entry["symbol"]
         market_enum = Market(entry["market"])
         market_value = entry["market"]
+        ctx = self._holding_ctx.get((symbol, market_enum))
+        if ctx is None:
+            self._prefetch_holding_context([entry])
+            ctx = self._holding_ctx[(symbol, market_enum)]
 
-        # Fetch related signals
-        signals = (
-            self.db.query(Signal)
-            .filter(Signal.related_symbols.contains(symbol))
-            .limit(5)
-            .all()
-        )
-
-        # Get 60-day quotes for technical analysis
-        quotes = _get_quotes_for_period(self.db, symbol, market_enum, 60)
+        # Related signals
+        signals = ctx["signals"]
 
-        # Calculate price changes
-        change_5d = _calc_price_change(quotes, 5)
-        change_20d = _calc_price_change(quotes, 20)
-        ma20 = _calc_moving_average(quotes, 20)
-        volume_change = _calc_volume_change(quotes)
-        high_60d, low_60d = _get_high_low_60d(quotes)
+        # 60-day technical indicators
+        indicators = ctx["indicators"]
+        change_5d = indicators["change_5d"]
+        change_20d = indicators["change_20d"]
+        ma20 = indicators["ma20"]
+        volume_change = indicators["volume_change"]
+        high_60d, low_60d = indicators["high_60d"], indicators["low_60d"]
 
-        # Get fundamentals
-        fundamental = _get_latest_fundamental_static(self.db, symbol, market_value)
+        # Fundamentals
+        fundamental = ctx["fundamental"]
         pe = float(fundamental.pe_ratio) if fundamental and fundamental.pe_ratio else None
         pb = float(fundamental.pb_ratio) if fundamental and fundamental.pb_ratio else None
         analyst_rating = fundamental.analyst_rating if fundamental else None
 
         # PE percentile (if we have PE)
         pe_percentile = None
-        if pe and pe > 0:
-            pe_percentile = _get_pe_percentile(self.db, symbol, market_value, pe)
-
-        # ETF NAV data (for CN ETFs)
-        nav_data = None
-        if market_enum == Market.CN and _is_cn_etf(symbol):
-            nav_data = _get_fund_nav_static(self.db, symbol)
+        pe_history = ctx["pe_history"]
+        if pe and pe > 0 and pe_history is not None:
+            pe_percentile = _rank_percentile(pe_history, pe, min_count=5)
 
-        # Northbound holding (for A-shares)
-        nb_holding = None
-        if market_enum == Market.CN and not _is_cn_etf(symbol):
-            nb_holding = _get_northbound_holding_static(self.db, symbol, days=14)
+        # ETF NAV data (CN ETFs) and northbound holding (A-shares)
+        nav_data = ctx["nav"]
+        nb_holding = ctx["nb_holding"]
 
         # Build user prompt with enriched data
         lines = [
             f"持仓: {entry['name']} ({symbol}.{market_value})",
             f"市场: {market_value} | 层级: {entry['tier']} | 仓位占比: {entry['weight_pct']}%",
             f"数量: {int(entry['quantity'])} | 均成本: {entry['avg_cost']:.2f} | 现价: {entry['current_price']:.2f}",
-            f"总盈亏: {'+' if entry['total_pnl'] >= 0 else ''}{entry['total_pnl']:.0f} ({'+' if entry['total_pnl_pct'] >= 0 else ''}{entry['total_pnl_pct']:.1f}%)",
+            f"总盈亏: {_fmt_signed(entry['total_pnl'], 0)} ({_fmt_signed(entry['total_pnl_pct'])}%)",
         ]
 
         # Today's change
         if entry.get("today_change_pct") is not None:
-            lines.append(f"今日涨跌: {'+' if entry['today_change_pct'] >= 0 else ''}{entry['today_change_pct']:.1f}%")
+            lines.append(f"今日涨跌: {_fmt_signed(entry['today_change_pct'])}%")
 
         # Technical data
         tech_parts = []
@@ -1367,72 +2067,172 @@ class DailyReportGenerator:
             for sig in signals:
                 lines.append(f"  - [{sig.severity.value}] {sig.title}: {sig.description}")
 
-        user_msg = "\n".join(lines)
+        if entry["weight_pct"] < MINOR_HOLDING_WEIGHT_PCT:
+            lines.append("(仓位较小，ai_detail 请简要，200字以内)")
 
-        try:
-            raw = await self._llm.chat_with_system(
-                DAILY_HOLDING_SYSTEM_PROMPT, user_msg, model=ModelChoice.FAST,
-                max_tokens=4000,
-            )
-            return _parse_llm_json(raw)
-        except (LLMError, json.JSONDecodeError, ValueError, SyntaxError) as e:
-            logger.warning("Failed to get AI for %s: %s", entry["symbol"], e)
-            return None
+        return "\n".join(lines)
 
-    # ------------------------------------------------------------------
-    # Summary generation
-    # ------------------------------------------------------------------
 
-    def _generate_summary(
-        self, holdings_data: List[Dict[str, Any]], today_pnl: float, today_pnl_pct: float
-    ) -> str:
-        """Generate a one-line AI summary for the portfolio. Falls back to template."""
-        # Build context for LLM
-        lines = [
-            f"今日组合盈亏: {'+' if today_pnl >= 0 else ''}{today_pnl:.0f}元 ({'+' if today_pnl_pct >= 0 else ''}{today_pnl_pct:.1f}%)",
-            "持仓概况:",
-        ]
-        for h in holdings_data:
-            if h["symbol"] == "CASH":
-                continue
-            change_str = (
-                f"{'+' if h.get('today_change_pct', 0) >= 0 else ''}{h.get('today_change_pct', 0):.1f}%"
-                if h.get("today_change_pct") is not None
-                else "N/A"
-            )
-            lines.append(f"  {h['name']}({h['symbol']}): 今日{change_str}, 仓位{h['weight_pct']:.1f}%")
+def _daily_summary_template(today_pnl: float, today_pnl_pct: float) -> str:
+    """One-line portfolio summary used when no AI summary is available."""
+    direction = "上涨" if today_pnl >= 0 else "下跌"
+    return f"今日持仓整体{direction}{abs(today_pnl_pct):.1f}%，盈亏{_fmt_signed(today_pnl, 0)}元"
 
-        user_msg = "\n".join(lines)
 
-        try:
-            raw = asyncio.run(
-                self._llm.chat_with_system(
-                    DAILY_SUMMARY_SYSTEM_PROMPT, user_msg, model=ModelChoice.FAST
-                )
-            )
-            summary = raw.strip().strip('"').strip("'")
-            if summary:
-                return summary
-        except (LLMError, RuntimeError) as e:
-            logger.warning("Failed to generate AI summary: %s", e)
+def _daily_summary_context(
+    holdings_data: List[Dict[str, Any]], today_pnl: float, today_pnl_pct: float
+) -> Optional[str]:
+    """Portfolio overview for the AI summary, or None for small portfolios."""
+    non_cash = [h for h in holdings_data if h["symbol"] != "CASH"]
+    if len(non_cash) < SUMMARY_AI_MIN_HOLDINGS:
+        return None
 
-        # Fallback template
-        direction = "上涨" if today_pnl >= 0 else "下跌"
-        return f"今日持仓整体{direction}{abs(today_pnl_pct):.1f}%，盈亏{'+' if today_pnl >= 0 else ''}{today_pnl:.0f}元"
+    lines = [
+        f"今日组合盈亏: {_fmt_signed(today_pnl, 0)}元 ({_fmt_signed(today_pnl_pct)}%)",
+        "持仓概况:",
+    ]
+    for h in non_cash:
+        change = h.get("today_change_pct")
+        change_str = f"{_fmt_signed(change)}%" if change is not None else "N/A"
+        lines.append(f"  {h['name']}({h['symbol']}): 今日{change_str}, 仓位{h['weight_pct']:.1f}%")
+    return "\n".join(lines)
 
 
 # ======================================================================
 # WeeklyReportGenerator
 # ======================================================================
 
+def _weekly_technical_section(
+    indicators: Dict[str, Optional[float]], current_price: Optional[float]
+) -> str:
+    """Technical-trend block of the weekly holding prompt (60-day history)."""
+    change_parts = [
+        f"{days}日:{indicators[f'change_{days}d']:+.1f}%"
+        for days in (5, 20, 60)
+        if indicators[f"change_{days}d"] is not None
+    ]
+    ma20, ma60 = indicators["ma20"], indicators["ma60"]
+    volume_change = indicators["volume_change"]
+    high_60d, low_60d = indicators["high_60d"], indicators["low_60d"]
+
+    lines = ["== 技术面 =="]
+    if change_parts:
+        lines.append("价格走势: " + ", ".join(change_parts))
+    if ma20 is not None and ma60 is not None and current_price:
+        ma_status = "多头排列" if current_price > ma20 > ma60 else ("空头排列" if current_price < ma20 < ma60 else "震荡")
+        lines.append(f"均线: MA20={ma20:.2f}, MA60={ma60:.2f} ({ma_status})")
+    if volume_change is not None:
+        vol_desc = "放量" if volume_change > 30 else ("缩量" if volume_change < -30 else "平稳")
+        lines.append(f"成交量: 近5日vs前20日 {volume_change:+.0f}% ({vol_desc})")
+    if high_60d is not None and low_60d is not None and current_price:
+        position = (current_price - low_60d) / (high_60d - low_60d) * 100 if high_60d != low_60d else 50
+        lines.append(f"60日区间: {low_60d:.2f}-{high_60d:.2f} (当前{position:.0f}%位置)")
+    return "\n".join(lines)
+
+
+def _weekly_fundamental_section(ctx: Dict[str, Any], current_price: Optional[float]) -> str:
+    """Fundamentals (PE percentile, target price, ETF NAV) block of the weekly holding prompt."""
+    fundamental = ctx["fundamental"]
+    pe = float(fundamental.pe_ratio) if fundamental and fundamental.pe_ratio else None
+    pb = float(fundamental.pb_ratio) if fundamental and fundamental.pb_ratio else None
+    revenue_growth = float(fundamental.revenue_growth) if fundamental and fundamental.revenue_growth else None
+    target_price = float(fundamental.target_price) if fundamental and fundamental.target_price else None
+    analyst_rating = fundamental.analyst_rating if fundamental else None
+
+    lines = ["== 基本面 =="]
+    if pe is not None:
+        pe_str = f"PE: {pe:.1f}"
+        if ctx["pe_percentile"] is not None:
+            pe_str += f" (历史{ctx['pe_percentile']}%分位)"
+        lines.append(pe_str)
+    if pb is not None:
+        lines.append(f"PB: {pb:.2f}")
+    if revenue_growth is not None:
+        lines.append(f"营收增长: {revenue_growth * 100:.1f}%")
+    if target_price and current_price:
+        upside = (target_price - current_price) / current_price * 100
+        lines.append(f"目标价: {target_price:.2f} (空间{upside:+.1f}%)")
+    if analyst_rating:
+        lines.append(f"分析师评级: {analyst_rating}")
+
+    # ETF NAV (CN ETFs)
+    nav_data = ctx["nav"]
+    nav = nav_data.get("unit_nav") if nav_data else None
+    if nav and current_price:
+        premium = (current_price - nav) / nav * 100 if nav > 0 else 0
+        lines.append(f"基金净值: {nav:.4f} ({'溢价' if premium >= 0 else '折价'}{abs(premium):.2f}%)")
+    return "\n".join(lines)
+
+
+def _weekly_sector_section(
+    sector_perf: Optional[Dict[str, Any]], sector_flow: Optional[Dict[str, Any]]
+) -> str:
+    """Sector block of the weekly holding prompt, or "" without sector data."""
+    if not (sector_perf or sector_flow):
+        return ""
+    lines = ["== 所属板块 =="]
+    if sector_perf:
+        lines.append(f"板块涨跌: {sector_perf.get('change_pct', 0):.1f}%")
+        if sector_perf.get("leading_stock"):
+            lines.append(f"领涨股: {sector_perf['leading_stock']}")
+    if sector_flow:
+        flow = sector_flow.get("net_inflow", 0)
+        direction = sector_flow.get("direction", "")
+        consecutive = sector_flow.get("consecutive_weeks", 0)
+        lines.append(f"板块资金: {'流入' if flow > 0 else '流出'}{abs(flow):.1f}亿, 连续{consecutive}周{direction}")
+    return "\n".join(lines)
+
+
+def _weekly_northbound_section(nb_holding: Optional[Dict[str, Any]]) -> str:
+    """Northbound-holding block (A-shares, 28-day change), or ""."""
+    if not nb_holding:
+        return ""
+    lines = ["== 北向资金 =="]
+    if nb_holding.get("holding"):
+        lines.append(f"持股量: {nb_holding['holding'] / 10000:.0f}万股")
+    if nb_holding.get("change_pct") is not None:
+        change_pct = nb_holding["change_pct"]
+        lines.append(f"28日变化: {'增持' if change_pct > 0 else '减持'}{abs(change_pct):.1f}%")
+    return "\n".join(lines)
+
+
+def _weekly_signals_section(signals: list) -> str:
+    """This week's signal block, or "" without signals."""
+    if not signals:
+        return ""
+    return "\n".join(
+        ["== 本周信号 =="]
+        + [f"  - [{sig.severity.value}] {sig.title}: {sig.description}" for sig in signals]
+    )
+
+
+@dataclass
+class _WeeklyPosition:
+    """Per-holding values shared by the weekly summary and holdings review.
+
+    Plain floats: every figure is rounded to 2 decimals for display only.
+    """
+
+    holding: Any  # Holding row from _collect_positions (selected columns only)
+    name: str
+    qty: float
+    avg_cost: float
+    current_price: float
+    current_value_cny: float
+    week_start_price: float  # falls back to current_price when unknown
+    fx: float  # local currency -> CNY multiplier
+
+
 class WeeklyReportGenerator:
     """Generates pre-stored weekly reports with macro context and strategic analysis."""
 
     def __init__(self, db: Session, user_id: Optional[int] = None):
         self.db = db
         self.user_id = user_id
-        self._llm = LLMClient()
-        self._usd_cny: Optional[Decimal] = None
+        settings = get_settings()
+        self._llm = LLMClient(cache_ttl=settings.llm_cache_ttl, cache_path=settings.llm_cache_path)
+        self._usd_cny: Optional[float] = None
+        self._holding_ctx: Dict[Tuple[str, Market], Dict[str, Any]] = {}
 
     def generate(self) -> int:
         """Generate a weekly report and save to DB. Returns report ID."""
@@ -1441,32 +2241,36 @@ class WeeklyReportGenerator:
         week_start = week_end - timedelta(days=week_end.weekday())  # Monday
 
         self._usd_cny = _get_usd_cny_rate_static(self.db)
+        self._holding_ctx.clear()
 
-        # 1. Build week summary
-        week_summary = self._build_week_summary(week_start, week_end)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # 2. Macro + capital flow (run analyzers) and 5. risk alerts (from
+            # PortfolioHealthAnalyzer) are DB-only and independent of the rest,
+            # so they run on worker threads while holdings are reviewed here
+            macro_future = self._submit_section(pool, self._build_macro_capital, week_start, week_end)
+            risk_future = self._submit_section(pool, self._build_risk_alerts)
 
-        # 2. Macro + capital flow (run analyzers)
-        macro_capital = self._build_macro_capital(week_start, week_end)
+            # Active holdings with prices, names and CNY values, shared by steps 1 and 3
+            positions, cash_cny = self._collect_positions(week_start)
 
-        # 3. Holdings medium/long-term review
-        holdings = self._build_holdings_review(week_start)
+            # 1. Build week summary
+            week_summary = self._build_week_summary(positions, cash_cny, week_start, week_end)
 
-        # 4. Opportunities (reuse shared helper)
-        opportunities = _scan_opportunities_static(self.db, self._llm, user_id=self.user_id)
-
-        # 5. Risk alerts (from PortfolioHealthAnalyzer)
-        risk_alerts = self._build_risk_alerts()
+            # 3. Holdings medium/long-term review
+            holdings = self._build_holdings_review(positions, cash_cny)
 
+            # 3. Holding AI reviews, 4. opportunities (reuse shared helper) and
+            # 7. the AI summary for the week
+            opportunities, week_summary["ai_summary"] = _run_async(
+                self._run_ai(week_summary, holdings, macro_future)
+            )
 
+            macro_capital = macro_future.result()
+            risk_alerts = risk_future.result()
 
         # 6. Next week events (placeholder)
         next_week_events: List[Dict[str, Any]] = []
 
-        # 7. AI summary for the week
-        week_summary["ai_summary"] = self._generate_week_summary_ai(
-            week_summary, macro_capital, holdings
-        )
-
         content = {
             "week_summary": week_summary,
             "macro_capital": macro_capital,
@@ -1491,125 +2295,188 @@ class WeeklyReportGenerator:
             user_id=self.user_id,
         )
         self.db.add(report)
+        self.db.flush()
+        # Read the PK before commit expires the instance, so no reload SELECT is needed
+        report_id = report.id
         self.db.commit()
-        self.db.refresh(report)
-        logger.info(f"Weekly report generated, id={report.id}")
-        return report.id
+        logger.info(f"Weekly report generated, id={report_id}")
+        return report_id
+
+    async def _run_ai(
+        self,
+        week_summary: Dict[str, Any],
+        holdings: List[Dict[str, Any]],
+        macro_future: Future,
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """Run all LLM work for the report on one event loop and connection pool.
+
+        Holding reviews and the opportunity scan start right away; the week
+        summary waits for the macro section from its worker thread. Returns
+        ``(opportunities, ai_summary)``.
+        """
+        async def _summary() -> str:
+            macro_capital = await asyncio.wrap_future(macro_future)
+            return await self._generate_week_summary_ai(week_summary, macro_capital, holdings)
+
+        async with self._llm.pooled():
+            _, opportunities, ai_summary = await asyncio.gather(
+                self._enrich_holdings_weekly_ai(holdings),
+                _scan_opportunities_async(self.db, self._llm, user_id=self.user_id),
+                _summary(),
+            )
+            return opportunities, ai_summary
+
+    def _submit_section(self, pool: ThreadPoolExecutor, builder, *args) -> Future:
+        """Run a DB-only section builder on ``pool`` with its own session.
+
+        Sessions are not thread-safe, so the worker never touches ``self.db``.
+        The worker runs in a copy of the caller's context, so it joins the
+        caller's report_run(). With ``report_parallel_sections`` off the
+        builder runs inline.
+        """
+        if not get_settings().report_parallel_sections:
+            future: Future = Future()
+            try:
+                future.set_result(builder(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        def _run():
+            with Session(bind=self.db.get_bind(), autoflush=False) as db:
+                return builder(*args, db=db)
+
+        return pool.submit(contextvars.copy_context().run, _run)
 
     # ------------------------------------------------------------------
     # Week summary
     # ------------------------------------------------------------------
 
-    def _build_week_summary(self, week_start: date, week_end: date) -> Dict[str, Any]:
-        """Build the week_summary section with P&L and best/worst holdings."""
-        query = self.db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
+    def _collect_positions(self, week_start: date) -> Tuple[List[_WeeklyPosition], float]:
+        """Load active holdings once with batched price/name lookups.
+
+        Returns the non-cash positions (in query order) and the CASH total.
+        """
+        # Plain rows of the columns the weekly builders read; no ORM hydration
+        query = self.db.query(
+            Holding.symbol, Holding.market, Holding.tier, Holding.quantity,
+            Holding.avg_cost, Holding.stop_loss_price, Holding.take_profit_price,
+        ).filter(Holding.status == HoldingStatus.ACTIVE)
         if self.user_id is not None:
             query = query.filter(Holding.user_id == self.user_id)
         holdings = query.all()
 
-        total_week_pnl_cny = Decimal("0")
-        total_current_value_cny = Decimal("0")
-        best_holding: Optional[Dict[str, Any]] = None
-        worst_holding: Optional[Dict[str, Any]] = None
+        pairs = [(h.symbol, h.market) for h in holdings if h.symbol != "CASH"]
+        prices, start_prices = _get_prices_with_as_of_bulk(self.db, holdings, week_start)
+        names = _get_stock_names_bulk(self.db, pairs)
 
+        fx_cache: Dict[Tuple[Market, str], float] = {}
+        cash_cny = 0.0
+        positions: List[_WeeklyPosition] = []
         for h in holdings:
+            qty = float(h.quantity)
             if h.symbol == "CASH":
-                qty = Decimal(str(h.quantity))
-                total_current_value_cny += qty
+                cash_cny += qty
                 continue
+            key = (h.symbol, h.market)
+            current_price = prices[key]
+            fx_key = (h.market, h.symbol)
+            if fx_key not in fx_cache:
+                fx_cache[fx_key] = _cny_factor_static(h.market, h.symbol, self._usd_cny)
+            fx = fx_cache[fx_key]
+            start_price = start_prices.get(key)
+            positions.append(_WeeklyPosition(
+                holding=h,
+                name=names[key],
+                qty=qty,
+                avg_cost=float(h.avg_cost),
+                current_price=current_price,
+                current_value_cny=current_price * qty * fx,
+                week_start_price=start_price if start_price is not None else current_price,
+                fx=fx,
+            ))
+        return positions, cash_cny
+
+    def _build_week_summary(
+        self,
+        positions: List[_WeeklyPosition],
+        cash_cny: float,
+        week_start: date,
+        week_end: date,
+    ) -> Dict[str, Any]:
+        """Build the week_summary section with P&L and best/worst holdings."""
+        total_week_pnl_cny = 0.0
+        total_current_value_cny = cash_cny
+        week_change_pcts: List[float] = []
 
-            qty = Decimal(str(h.quantity))
-            current_price = _get_latest_price_static(self.db, h)
-            current_value_local = current_price * qty
-            current_value_cny = _to_cny_static(current_value_local, h.market, h.symbol, self._usd_cny)
-            total_current_value_cny += current_value_cny
-
-            # Get price at week_start
-            week_start_price = self._get_price_at_date(h.symbol, h.market, week_start)
-            if week_start_price is None:
-                week_start_price = current_price  # fallback: no change
+        for pos in positions:
+            current_price = pos.current_price
+            week_start_price = pos.week_start_price
+            total_current_value_cny += pos.current_value_cny
 
-            if week_start_price and week_start_price != 0:
-                week_change_pct = float((current_price - week_start_price) / week_start_price * 100)
+            if week_start_price:
+                week_change_pct = (current_price - week_start_price) / week_start_price * 100
             else:
                 week_change_pct = 0.0
 
-            week_pnl_local = (current_price - week_start_price) * qty
-            week_pnl_cny = _to_cny_static(week_pnl_local, h.market, h.symbol, self._usd_cny)
+            week_pnl_local = (current_price - week_start_price) * pos.qty
+            week_pnl_cny = week_pnl_local * pos.fx
             total_week_pnl_cny += week_pnl_cny
+            week_change_pcts.append(week_change_pct)
 
-            name = _get_stock_name_static(self.db, h.symbol, h.market)
-
-            if best_holding is None or week_change_pct > best_holding["pnl_pct"]:
-                best_holding = {"symbol": h.symbol, "name": name, "pnl_pct": round(week_change_pct, 2)}
-            if worst_holding is None or week_change_pct < worst_holding["pnl_pct"]:
-                worst_holding = {"symbol": h.symbol, "name": name, "pnl_pct": round(week_change_pct, 2)}
+        best_holding: Optional[Dict[str, Any]] = None
+        worst_holding: Optional[Dict[str, Any]] = None
+        if week_change_pcts:
+            pcts = np.asarray(week_change_pcts, dtype=np.float64)
+            bi, wi = int(pcts.argmax()), int(pcts.argmin())
+            best_holding = {"symbol": positions[bi].holding.symbol, "pnl_pct": round(float(pcts[bi]), 2)}
+            worst_holding = {"symbol": positions[wi].holding.symbol, "pnl_pct": round(float(pcts[wi]), 2)}
 
         week_pnl_pct = (
-            float(total_week_pnl_cny / total_current_value_cny * 100)
+            total_week_pnl_cny / total_current_value_cny * 100
             if total_current_value_cny else 0.0
         )
 
         return {
             "week_start": week_start.isoformat(),
             "week_end": week_end.isoformat(),
-            "week_pnl": round(float(total_week_pnl_cny), 2),
+            "week_pnl": round(total_week_pnl_cny, 2),
             "week_pnl_pct": round(week_pnl_pct, 2),
-            "best_holding": (
-                {"symbol": best_holding["symbol"], "pnl_pct": best_holding["pnl_pct"]}
-                if best_holding else None
-            ),
-            "worst_holding": (
-                {"symbol": worst_holding["symbol"], "pnl_pct": worst_holding["pnl_pct"]}
-                if worst_holding else None
-            ),
+            "best_holding": best_holding,
+            "worst_holding": worst_holding,
             "ai_summary": "",  # filled later
         }
 
-    def _get_price_at_date(
-        self, symbol: str, market: Market, target_date: date
-    ) -> Optional[Decimal]:
-        """Get the closing price at or just before a given date."""
-        if _is_cn_etf(symbol) and market == Market.CN:
-            ts_code = _symbol_to_ts_code(symbol)
-            nav = (
-                self.db.query(FundNavSnapshot)
-                .filter(
-                    FundNavSnapshot.ts_code == ts_code,
-                    FundNavSnapshot.nav_date <= target_date,
-                )
-                .order_by(desc(FundNavSnapshot.nav_date))
-                .first()
-            )
-            if nav and nav.unit_nav:
-                return Decimal(str(nav.unit_nav))
-
-        quote = (
-            self.db.query(DailyQuote)
-            .filter(
-                DailyQuote.symbol == symbol,
-                DailyQuote.market == market,
-                DailyQuote.trade_date <= target_date,
-            )
-            .order_by(desc(DailyQuote.trade_date))
-            .first()
-        )
-        if quote and quote.close:
-            return Decimal(str(quote.close))
-        return None
-
     # ------------------------------------------------------------------
     # Macro + capital flow
     # ------------------------------------------------------------------
 
-    def _build_macro_capital(self, week_start: date, week_end: date) -> Dict[str, Any]:
-        """Build macro_capital section using analyzers and DB queries."""
+    def _build_macro_capital(
+        self, week_start: date, week_end: date, db: Optional[Session] = None
+    ) -> Dict[str, Any]:
+        """Build macro_capital section using analyzers and DB queries.
+
+        ``db`` overrides the generator's session (used from a worker thread).
+        The capital-flow half runs on its own worker and session while the
+        macro half runs here.
+        """
+        db = db or self.db
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            capital_future = self._submit_section(
+                pool, self._build_capital_flow, week_start, week_end
+            )
+            macro = self._build_macro(db)
+            capital = capital_future.result()
+
+        return {**macro, **capital}
+
+    def _build_macro(self, db: Session) -> Dict[str, Any]:
+        """Macro half of macro_capital: environment scores plus yield/breadth/valuation data."""
         from src.analyzers.market_environment import MarketEnvironmentAnalyzer
-        from src.analyzers.capital_flow import CapitalFlowAnalyzer
 
         # Run market environment analyzer
-        market_env = MarketEnvironmentAnalyzer(self.db)
-        env_report = market_env.analyze()
+        env_report = _cached_analyzer_report(MarketEnvironmentAnalyzer(db))
 
         us_score = env_report.data.get("us_macro", {}).get("score") if env_report.data else None
         cn_score = env_report.data.get("china_macro", {}).get("score") if env_report.data else None
@@ -1618,22 +2485,43 @@ class WeeklyReportGenerator:
         us_summary = ""
         cn_summary = ""
         if env_report.details:
-            us_parts = [d for d in env_report.details if d.startswith("[US宏观]") or d.startswith("[利差]") or d.startswith("[CPI]") or d.startswith("[失业率]") or d.startswith("[VIX]")]
-            cn_parts = [d for d in env_report.details if d.startswith("[中国宏观]") or d.startswith("[PMI]") or d.startswith("[流动性]") or d.startswith("[Shibor") or d.startswith("[新增贷款]")]
-            if us_parts:
-                us_summary = "；".join(us_parts[:3])
-            if cn_parts:
-                cn_summary = "；".join(cn_parts[:3])
+            details = env_report.details
+            us_summary = "；".join(islice((d for d in details if d.startswith(US_MACRO_PREFIXES)), 3))
+            cn_summary = "；".join(islice((d for d in details if d.startswith(CN_MACRO_PREFIXES)), 3))
+
+        return {
+            "us_score": us_score,
+            "cn_score": cn_score,
+            "us_summary": us_summary,
+            "cn_summary": cn_summary,
+            # Yield spread (treasury 10Y-2Y)
+            "yield_spread": _get_yield_spread_static(db),
+            # Market breadth (advance/decline)
+            "market_breadth": _get_market_breadth_static(db),
+            # Index valuations (CSI 300, ChiNext) with PE percentile
+            "index_valuations": _get_index_valuations_static(db),
+            # Detailed macro data (US + CN)
+            "macro_data": _get_macro_data_static(db),
+            # Commodity data with percentiles
+            "commodities": _get_commodity_data_static(db),
+        }
+
+    def _build_capital_flow(
+        self, week_start: date, week_end: date, db: Optional[Session] = None
+    ) -> Dict[str, Any]:
+        """Capital-flow half of macro_capital: northbound, sector flow and key events."""
+        from src.analyzers.capital_flow import CapitalFlowAnalyzer
+
+        db = db or self.db
 
         # Run capital flow analyzer
-        capital_flow = CapitalFlowAnalyzer(self.db)
-        cf_report = capital_flow.analyze()
+        cf_report = _cached_analyzer_report(CapitalFlowAnalyzer(db))
 
         nb_data = cf_report.data.get("northbound", {}) if cf_report.data else {}
         sf_data = cf_report.data.get("sector_flow", {}) if cf_report.data else {}
 
         # Northbound trading volume data (from TuShare, not net flow)
-        nb_flow_detail = _get_northbound_flow_static(self.db, days=28)
+        nb_flow_detail = _get_northbound_flow_static(db, days=28)
         northbound_trend = nb_flow_detail.get("activity", "数据不足")
 
         # Sector flow: top5 inflow / outflow from capital flow analyzer
@@ -1647,62 +2535,23 @@ class WeeklyReportGenerator:
         ]
 
         # Key events: HIGH/CRITICAL signals this week
-        key_events = self._get_key_events(week_start, week_end)
-
-        # === NEW: Enhanced macro data ===
-
-        # Yield spread (treasury 10Y-2Y)
-        yield_spread = _get_yield_spread_static(self.db)
-
-        # Market breadth (advance/decline)
-        market_breadth = _get_market_breadth_static(self.db)
-
-        # Index valuations (CSI 300, ChiNext) with PE percentile
-        index_valuations = _get_index_valuations_static(self.db)
-
-        # Detailed macro data (US + CN)
-        macro_data = _get_macro_data_static(self.db)
-
-        # Commodity data with percentiles
-        commodity_data = _get_commodity_data_static(self.db)
+        key_events = self._get_key_events(week_start, week_end, db)
 
         return {
-            "us_score": us_score,
-            "cn_score": cn_score,
-            "us_summary": us_summary,
-            "cn_summary": cn_summary,
             "northbound_weekly_flow": nb_flow_detail.get("today_volume", 0),
             "northbound_trend": northbound_trend,
             "northbound_detail": nb_flow_detail,
             "sector_inflow_top5": sector_inflow_top5,
             "sector_outflow_top5": sector_outflow_top5,
             "key_events": key_events,
-            # Enhanced data
-            "yield_spread": yield_spread,
-            "market_breadth": market_breadth,
-            "index_valuations": index_valuations,
-            "macro_data": macro_data,
-            "commodities": commodity_data,
         }
 
-    def _get_weekly_northbound_flow(self, week_start: date, week_end: date) -> float:
-        """Get average daily northbound trading volume for the given week."""
-        flows = (
-            self.db.query(NorthboundFlow.net_flow)
-            .filter(
-                NorthboundFlow.trade_date >= week_start,
-                NorthboundFlow.trade_date <= week_end,
-            )
-            .all()
-        )
-        if not flows:
-            return 0.0
-        return sum(float(f[0]) for f in flows) / len(flows)
-
-    def _get_key_events(self, week_start: date, week_end: date) -> List[str]:
+    def _get_key_events(
+        self, week_start: date, week_end: date, db: Optional[Session] = None
+    ) -> List[str]:
         """Extract titles of HIGH/CRITICAL signals from the current week."""
         query = (
-            self.db.query(Signal)
+            (db or self.db).query(Signal.title)
             .filter(
                 Signal.severity.in_([SignalSeverity.HIGH, SignalSeverity.CRITICAL]),
                 Signal.created_at >= datetime.combine(week_start, datetime.min.time()),
@@ -1711,76 +2560,52 @@ class WeeklyReportGenerator:
         )
         if self.user_id is not None:
             query = query.filter(Signal.user_id == self.user_id)
-        signals = query.order_by(desc(Signal.created_at)).limit(10).all()
-        return [s.title for s in signals]
+        return [title for (title,) in query.order_by(desc(Signal.created_at)).limit(10)]
 
     # ------------------------------------------------------------------
     # Holdings review (weekly perspective)
     # ------------------------------------------------------------------
 
-    def _build_holdings_review(self, week_start: date) -> List[Dict[str, Any]]:
+    def _build_holdings_review(
+        self, positions: List[_WeeklyPosition], cash_cny: float
+    ) -> List[Dict[str, Any]]:
         """Build holdings review with weekly change and medium-term AI commentary."""
-        query = self.db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
-        if self.user_id is not None:
-            query = query.filter(Holding.user_id == self.user_id)
-        holdings = query.all()
-
-        # First pass: compute total value for weight calculation
-        total_value_cny = Decimal("0")
-        position_data: List[tuple] = []
-        for h in holdings:
-            if h.symbol == "CASH":
-                qty = Decimal(str(h.quantity))
-                total_value_cny += qty
-                continue
-
-            current_price = _get_latest_price_static(self.db, h)
-            qty = Decimal(str(h.quantity))
-            avg_cost = Decimal(str(h.avg_cost))
-            current_value_local = current_price * qty
-            current_value_cny = _to_cny_static(current_value_local, h.market, h.symbol, self._usd_cny)
-            total_value_cny += current_value_cny
-
-            week_start_price = self._get_price_at_date(h.symbol, h.market, week_start)
-            if week_start_price is None:
-                week_start_price = current_price
-
-            position_data.append((h, current_price, qty, avg_cost, current_value_cny, week_start_price))
-
-        if total_value_cny == 0:
-            total_value_cny = Decimal("1")
+        values = np.fromiter(
+            (p.current_value_cny for p in positions), dtype=np.float64, count=len(positions)
+        )
+        total_value_cny = cash_cny + float(values.sum())
+        weights = values / (total_value_cny or 1.0) * 100
 
-        # Second pass: build entries
         entries: List[Dict[str, Any]] = []
-        for h, current_price, qty, avg_cost, current_value_cny, week_start_price in position_data:
-            weight_pct = float(current_value_cny / total_value_cny * 100)
-            total_pnl_pct = float((current_price - avg_cost) / avg_cost * 100) if avg_cost else 0.0
+        for pos, weight_pct in zip(positions, weights.tolist()):
+            h = pos.holding
+            current_price, qty, avg_cost = pos.current_price, pos.qty, pos.avg_cost
+            current_value_cny, week_start_price = pos.current_value_cny, pos.week_start_price
+            total_pnl_pct = (current_price - avg_cost) / avg_cost * 100 if avg_cost else 0.0
 
             # Calculate total P&L in CNY
             pnl_local = (current_price - avg_cost) * qty
-            total_pnl_cny = float(_to_cny_static(pnl_local, h.market, h.symbol, self._usd_cny))
+            total_pnl_cny = pnl_local * pos.fx
 
             # Week P&L
-            if week_start_price and week_start_price != 0:
-                week_change_pct = float((current_price - week_start_price) / week_start_price * 100)
+            if week_start_price:
+                week_change_pct = (current_price - week_start_price) / week_start_price * 100
                 week_pnl_local = (current_price - week_start_price) * qty
-                week_pnl_cny = float(_to_cny_static(week_pnl_local, h.market, h.symbol, self._usd_cny))
+                week_pnl_cny = week_pnl_local * pos.fx
             else:
                 week_change_pct = 0.0
                 week_pnl_cny = 0.0
 
-            name = _get_stock_name_static(self.db, h.symbol, h.market)
-
             entry: Dict[str, Any] = {
                 "symbol": h.symbol,
-                "name": name,
+                "name": pos.name,
                 "market": h.market.value,
                 "tier": h.tier.value,
-                "quantity": float(qty),
-                "avg_cost": float(avg_cost),
-                "current_price": float(current_price),
-                "week_start_price": float(week_start_price) if week_start_price else None,
-                "market_value_cny": round(float(current_value_cny), 2),
+                "quantity": qty,
+                "avg_cost": avg_cost,
+                "current_price": current_price,
+                "week_start_price": week_start_price or None,
+                "market_value_cny": round(current_value_cny, 2),
                 "weight_pct": round(weight_pct, 2),
                 "week_change_pct": round(week_change_pct, 2),
                 "week_pnl": round(week_pnl_cny, 2),
@@ -1794,33 +2619,36 @@ class WeeklyReportGenerator:
             }
             entries.append(entry)
 
-        # Sort by week_change_pct ascending (worst first)
+        # Sort by week_change_pct ascending (worst first); AI enrichment
+        # happens later in _run_ai
         entries.sort(key=lambda e: e.get("week_change_pct", 0))
-
-        # AI enrichment for each holding (using QUALITY model)
-        self._enrich_holdings_weekly_ai(entries)
-
         return entries
 
-    def _enrich_holdings_weekly_ai(self, holdings_data: List[Dict[str, Any]]) -> None:
-        """Add weekly AI commentary to each holding using QUALITY model."""
-        if not holdings_data:
+    async def _enrich_holdings_weekly_ai(self, holdings_data: List[Dict[str, Any]]) -> None:
+        """Add weekly AI commentary to each holding using QUALITY model.
+
+        Positions under WEEKLY_AI_MIN_WEIGHT_PCT (or with no quantity) get a
+        template comment instead of an LLM call.
+        """
+        to_enrich = []
+        for entry in holdings_data:
+            if entry["quantity"] and entry["weight_pct"] >= WEEKLY_AI_MIN_WEIGHT_PCT:
+                to_enrich.append(entry)
+            else:
+                entry["ai_comment"] = MINOR_POSITION_COMMENT
+        if not to_enrich:
             return
 
-        async def _run_all():
-            tasks = [self._get_weekly_holding_ai(entry) for entry in holdings_data]
-            return await asyncio.gather(*tasks, return_exceptions=True)
+        # All DB work happens here, before any LLM call is awaited
+        self._prefetch_holding_context(to_enrich)
+        prompts = [self._build_weekly_holding_prompt(e) for e in to_enrich]
 
-        try:
-            results = asyncio.run(_run_all())
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            try:
-                results = loop.run_until_complete(_run_all())
-            finally:
-                loop.close()
+        results = await _gather_bounded(self._llm, [
+            self._get_weekly_holding_ai(entry, user_msg)
+            for entry, user_msg in zip(to_enrich, prompts)
+        ])
 
-        for entry, result in zip(holdings_data, results):
+        for entry, result in zip(to_enrich, results):
             if isinstance(result, Exception):
                 logger.warning("Weekly AI enrichment failed for %s: %s", entry["symbol"], result)
                 continue
@@ -1831,156 +2659,83 @@ class WeeklyReportGenerator:
                     entry["action"] = action
                 entry["ai_detail"] = result.get("ai_detail", "")
 
-    async def _get_weekly_holding_ai(self, entry: Dict[str, Any]) -> Optional[Dict[str, str]]:
-        """Call LLM for a single holding's weekly review (QUALITY model)."""
-        symbol = entry["symbol"]
-        market_enum = Market(entry["market"])
-        market_value = entry["market"]
-
-        signals = (
-            self.db.query(Signal)
-            .filter(Signal.related_symbols.contains(symbol))
-            .limit(5)
-            .all()
-        )
-
-        # Get 60-day quotes for technical analysis (more history for weekly)
-        quotes = _get_quotes_for_period(self.db, symbol, market_enum, 60)
+    def _prefetch_holding_context(self, entries: List[Dict[str, Any]]) -> None:
+        """Bulk-load the per-holding DB context used by _build_weekly_holding_prompt.
 
-        # Calculate price changes
-        change_5d = _calc_price_change(quotes, 5)
-        change_20d = _calc_price_change(quotes, 20)
-        change_60d = _calc_price_change(quotes, 60)
-        ma20 = _calc_moving_average(quotes, 20)
-        ma60 = _calc_moving_average(quotes, 60)
-        volume_change = _calc_volume_change(quotes)
-        high_60d, low_60d = _get_high_low_60d(quotes)
+        One query per data kind for all holdings, sectors included; the
+        PE percentile is computed here as well.
+        """
+        pairs = [(e["symbol"], Market(e["market"])) for e in entries]
+        fund_pairs = [(s, m.value) for s, m in pairs]
+        cn_etfs, cn_stocks = _split_cn_symbols(pairs)
+
+        quotes = _get_quotes_for_period_bulk(self.db, pairs, 60)
+        fundamentals = _get_latest_fundamentals_bulk(self.db, fund_pairs)
+        pe_histories = _get_pe_histories_bulk(self.db, fund_pairs)
+        navs = _get_fund_navs_bulk(self.db, cn_etfs)
+        nb_holdings = _get_northbound_holdings_bulk(self.db, cn_stocks, days=28)
+        signals = _get_signals_by_symbol_bulk(self.db, [s for s, _ in pairs])
+        sector_names = {s: _get_sector_for_holding(s) for s, _ in pairs}
+        sectors = _get_sectors_bulk(self.db, filter(None, sector_names.values()), days=14)
+
+        for symbol, market in pairs:
+            sector_perf, sector_flow = sectors.get(sector_names[symbol], (None, None))
+            holding_quotes = quotes.get((symbol, market), [])
+            fundamental = fundamentals.get((symbol, market.value))
+            pe = float(fundamental.pe_ratio) if fundamental and fundamental.pe_ratio else None
+            pe_history = pe_histories.get((symbol, market.value))
+            self._holding_ctx[(symbol, market)] = {
+                "indicators": _compute_indicators(_quotes_to_array(holding_quotes)),
+                "last_close": holding_quotes[-1].close if holding_quotes else None,
+                "fundamental": fundamental,
+                "pe_percentile": (
+                    _rank_percentile(pe_history, pe, min_count=5)
+                    if pe and pe > 0 and pe_history is not None else None
+                ),
+                "nav": navs.get(symbol),
+                "nb_holding": nb_holdings.get(symbol),
+                "signals": signals.get(symbol, []),
+                "sector_perf": sector_perf,
+                "sector_flow": sector_flow,
+            }
 
-        # Get fundamentals
-        fundamental = _get_latest_fundamental_static(self.db, symbol, market_value)
-        pe = float(fundamental.pe_ratio) if fundamental and fundamental.pe_ratio else None
-        pb = float(fundamental.pb_ratio) if fundamental and fundamental.pb_ratio else None
-        revenue_growth = float(fundamental.revenue_growth) if fundamental and fundamental.revenue_growth else None
-        target_price = float(fundamental.target_price) if fundamental and fundamental.target_price else None
-        analyst_rating = fundamental.analyst_rating if fundamental else None
+    def _build_weekly_holding_prompt(self, entry: Dict[str, Any]) -> str:
+        """Build the weekly review prompt for one holding from its prefetched context.
 
-        # PE percentile
-        pe_percentile = None
-        if pe and pe > 0:
-            pe_percentile = _get_pe_percentile(self.db, symbol, market_value, pe)
-
-        # ETF NAV data
-        nav_data = None
-        if market_enum == Market.CN and _is_cn_etf(symbol):
-            nav_data = _get_fund_nav_static(self.db, symbol)
-
-        # Northbound holding (for A-shares, longer period for weekly)
-        nb_holding = None
-        if market_enum == Market.CN and not _is_cn_etf(symbol):
-            nb_holding = _get_northbound_holding_static(self.db, symbol, days=28)
-
-        # Sector data
-        sector_name = _get_sector_for_holding(self.db, symbol)
-        sector_perf = None
-        sector_flow = None
-        if sector_name:
-            sector_perf = _get_sector_performance_static(self.db, sector_name)
-            sector_flow = _get_sector_flow_static(self.db, sector_name, days=14)
+        Each section is joined once; optional sections are empty strings and
+        are dropped before the final join.
+        """
+        symbol = entry["symbol"]
+        market_value = entry["market"]
+        key = (symbol, Market(market_value))
+        ctx = self._holding_ctx.get(key)
+        if ctx is None:
+            self._prefetch_holding_context([entry])
+            ctx = self._holding_ctx[key]
 
         # Current price (approximate from entry or quotes)
-        current_price = quotes[-1].close if quotes and quotes[-1].close else None
+        current_price = float(ctx["last_close"]) if ctx["last_close"] else None
 
-        # Build enriched prompt
-        lines = [
+        header = "\n".join((
             f"持仓: {entry['name']} ({symbol}.{market_value})",
             f"市场: {market_value} | 层级: {entry['tier']} | 仓位占比: {entry['weight_pct']}%",
-            f"本周涨跌: {'+' if entry['week_change_pct'] >= 0 else ''}{entry['week_change_pct']:.1f}%",
-            f"总盈亏: {'+' if entry['total_pnl_pct'] >= 0 else ''}{entry['total_pnl_pct']:.1f}%",
-        ]
-
-        # Technical trends
-        lines.append("")
-        lines.append("== 技术面 ==")
-        trend_parts = []
-        if change_5d is not None:
-            trend_parts.append(f"5日:{change_5d:+.1f}%")
-        if change_20d is not None:
-            trend_parts.append(f"20日:{change_20d:+.1f}%")
-        if change_60d is not None:
-            trend_parts.append(f"60日:{change_60d:+.1f}%")
-        if trend_parts:
-            lines.append("价格走势: " + ", ".join(trend_parts))
-
-        if ma20 is not None and ma60 is not None and current_price:
-            ma_status = "多头排列" if current_price > ma20 > ma60 else ("空头排列" if current_price < ma20 < ma60 else "震荡")
-            lines.append(f"均线: MA20={ma20:.2f}, MA60={ma60:.2f} ({ma_status})")
-
-        if volume_change is not None:
-            vol_desc = "放量" if volume_change > 30 else ("缩量" if volume_change < -30 else "平稳")
-            lines.append(f"成交量: 近5日vs前20日 {volume_change:+.0f}% ({vol_desc})")
-
-        if high_60d is not None and low_60d is not None and current_price:
-            position = (float(current_price) - low_60d) / (high_60d - low_60d) * 100 if high_60d != low_60d else 50
-            lines.append(f"60日区间: {low_60d:.2f}-{high_60d:.2f} (当前{position:.0f}%位置)")
-
-        # Fundamentals
-        lines.append("")
-        lines.append("== 基本面 ==")
-        if pe is not None:
-            pe_str = f"PE: {pe:.1f}"
-            if pe_percentile is not None:
-                pe_str += f" (历史{pe_percentile}%分位)"
-            lines.append(pe_str)
-        if pb is not None:
-            lines.append(f"PB: {pb:.2f}")
-        if revenue_growth is not None:
-            lines.append(f"营收增长: {revenue_growth * 100:.1f}%")
-        if target_price and current_price:
-            upside = (target_price - float(current_price)) / float(current_price) * 100
-            lines.append(f"目标价: {target_price:.2f} (空间{upside:+.1f}%)")
-        if analyst_rating:
-            lines.append(f"分析师评级: {analyst_rating}")
-
-        # ETF NAV
-        if nav_data:
-            nav = nav_data.get("unit_nav")
-            if nav and current_price:
-                premium = (float(current_price) - nav) / nav * 100 if nav > 0 else 0
-                lines.append(f"基金净值: {nav:.4f} ({'溢价' if premium >= 0 else '折价'}{abs(premium):.2f}%)")
-
-        # Sector context
-        if sector_perf or sector_flow:
-            lines.append("")
-            lines.append("== 所属板块 ==")
-            if sector_perf:
-                lines.append(f"板块涨跌: {sector_perf.get('change_pct', 0):.1f}%")
-                if sector_perf.get("leading_stock"):
-                    lines.append(f"领涨股: {sector_perf['leading_stock']}")
-            if sector_flow:
-                flow = sector_flow.get("net_inflow", 0)
-                direction = sector_flow.get("direction", "")
-                consecutive = sector_flow.get("consecutive_weeks", 0)
-                lines.append(f"板块资金: {'流入' if flow > 0 else '流出'}{abs(flow):.1f}亿, 连续{consecutive}周{direction}")
-
-        # Northbound holding
-        if nb_holding:
-            lines.append("")
-            lines.append("== 北向资金 ==")
-            if nb_holding.get("holding"):
-                lines.append(f"持股量: {nb_holding['holding'] / 10000:.0f}万股")
-            if nb_holding.get("change_pct") is not None:
-                change_pct = nb_holding["change_pct"]
-                lines.append(f"28日变化: {'增持' if change_pct > 0 else '减持'}{abs(change_pct):.1f}%")
-
-        # Signals
-        if signals:
-            lines.append("")
-            lines.append("== 本周信号 ==")
-            for sig in signals:
-                lines.append(f"  - [{sig.severity.value}] {sig.title}: {sig.description}")
-
-        user_msg = "\n".join(lines)
+            f"本周涨跌: {_fmt_signed(entry['week_change_pct'])}%",
+            f"总盈亏: {_fmt_signed(entry['total_pnl_pct'])}%",
+        ))
+        sections = (
+            header,
+            _weekly_technical_section(ctx["indicators"], current_price),
+            _weekly_fundamental_section(ctx, current_price),
+            _weekly_sector_section(ctx["sector_perf"], ctx["sector_flow"]),
+            _weekly_northbound_section(ctx["nb_holding"]),
+            _weekly_signals_section(ctx["signals"]),
+        )
+        return "\n\n".join(s for s in sections if s)
 
+    async def _get_weekly_holding_ai(
+        self, entry: Dict[str, Any], user_msg: str
+    ) -> Optional[Dict[str, str]]:
+        """Call LLM for a single holding's weekly review (QUALITY model)."""
         try:
             raw = await self._llm.chat_with_system(
                 WEEKLY_HOLDING_SYSTEM_PROMPT, user_msg, model=ModelChoice.QUALITY,
@@ -1995,11 +2750,11 @@ class WeeklyReportGenerator:
     # Risk alerts
     # ------------------------------------------------------------------
 
-    def _build_risk_alerts(self) -> List[Dict[str, Any]]:
+    def _build_risk_alerts(self, db: Optional[Session] = None) -> List[Dict[str, Any]]:
         """Build risk alerts from PortfolioHealthAnalyzer."""
         from src.analyzers.portfolio_health import PortfolioHealthAnalyzer
 
-        analyzer = PortfolioHealthAnalyzer(self.db, user_id=self.user_id)
+        analyzer = PortfolioHealthAnalyzer(db or self.db, user_id=self.user_id)
         report = analyzer.analyze()
 
         alerts: List[Dict[str, Any]] = []
@@ -2041,7 +2796,7 @@ class WeeklyReportGenerator:
     # Weekly AI summary
     # ------------------------------------------------------------------
 
-    def _generate_week_summary_ai(
+    async def _generate_week_summary_ai(
         self,
         week_summary: Dict[str, Any],
         macro_capital: Dict[str, Any],
@@ -2049,14 +2804,14 @@ class WeeklyReportGenerator:
     ) -> str:
         """Generate AI summary for the week using QUALITY model."""
         lines = [
-            f"本周盈亏: {'+' if week_summary['week_pnl'] >= 0 else ''}{week_summary['week_pnl']:.0f}元 ({'+' if week_summary['week_pnl_pct'] >= 0 else ''}{week_summary['week_pnl_pct']:.1f}%)",
+            f"本周盈亏: {_fmt_signed(week_summary['week_pnl'], 0)}元 ({_fmt_signed(week_summary['week_pnl_pct'])}%)",
         ]
         if week_summary.get("best_holding"):
             bh = week_summary["best_holding"]
-            lines.append(f"最佳持仓: {bh['symbol']} ({'+' if bh['pnl_pct'] >= 0 else ''}{bh['pnl_pct']:.1f}%)")
+            lines.append(f"最佳持仓: {bh['symbol']} ({_fmt_signed(bh['pnl_pct'])}%)")
         if week_summary.get("worst_holding"):
             wh = week_summary["worst_holding"]
-            lines.append(f"最差持仓: {wh['symbol']} ({'+' if wh['pnl_pct'] >= 0 else ''}{wh['pnl_pct']:.1f}%)")
+            lines.append(f"最差持仓: {wh['symbol']} ({_fmt_signed(wh['pnl_pct'])}%)")
 
         # Macro scores
         lines.append("")
@@ -2092,7 +2847,7 @@ class WeeklyReportGenerator:
             )
             vol_change = nb_detail.get("vol_change_pct", 0)
             lines.append(
-                f"日环比: {'+' if vol_change >= 0 else ''}{vol_change:.1f}%, "
+                f"日环比: {_fmt_signed(vol_change)}%, "
                 f"5日均量{nb_detail.get('avg_5d_volume', 0):.1f}亿, "
                 f"活跃度: {nb_detail.get('activity', '未知')}"
             )
@@ -2131,22 +2886,20 @@ class WeeklyReportGenerator:
         lines.append("== 持仓概况 ==")
         for h in holdings[:5]:
             lines.append(
-                f"  {h['name']}({h['symbol']}): 本周{'+' if h['week_change_pct'] >= 0 else ''}{h['week_change_pct']:.1f}%, "
+                f"  {h['name']}({h['symbol']}): 本周{_fmt_signed(h['week_change_pct'])}%, "
                 f"仓位{h['weight_pct']:.1f}%"
             )
 
         user_msg = "\n".join(lines)
 
         try:
-            raw = asyncio.run(
-                self._llm.chat_with_system(
-                    WEEKLY_SUMMARY_SYSTEM_PROMPT, user_msg, model=ModelChoice.QUALITY
-                )
+            raw = await self._llm.chat_with_system(
+                WEEKLY_SUMMARY_SYSTEM_PROMPT, user_msg, model=ModelChoice.QUALITY
             )
             summary = raw.strip().strip('"').strip("'")
             if summary:
                 return summary
-        except (LLMError, RuntimeError) as e:
+        except LLMError as e:
             logger.warning("Failed to generate weekly AI summary: %s", e)
 
         # Fallback template
@@ -1,11 +1,12 @@
 """Storage service: maps collector outputs to DB upserts."""
 import logging
 from datetime import date
-from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.mysql import Insert, insert as mysql_insert
+
+from src.config import get_settings
 
 from src.db.models_market_data import (
     CnMacroRecord,
@@ -23,38 +24,103 @@ from src.db.models_market_data import (
 
 logger = logging.getLogger(__name__)
 
+# Parameterized upsert per (model, key columns); rows are bound at execute
+# time, so SQLAlchemy compiles each statement once and the driver sends
+# every page as one multi-row INSERT
+_UPSERT_STMTS: Dict[tuple, Insert] = {}
+
+
+def _upsert_statement(model, index_elements: Tuple[str, ...]) -> Insert:
+    """INSERT ... ON DUPLICATE KEY UPDATE for ``model`` without bound values."""
+    key = (model, index_elements)
+    stmt = _UPSERT_STMTS.get(key)
+    if stmt is None:
+        insert = mysql_insert(model)
+        update_cols = {
+            c.name: insert.inserted[c.name]
+            for c in model.__table__.columns
+            if c.name not in index_elements and c.name not in ("id", "created_at")
+        }
+        stmt = _UPSERT_STMTS[key] = insert.on_duplicate_key_update(**update_cols)
+    return stmt
+
+
+# TuShare fetch_all key -> (model, key columns, fields copied as-is,
+# fields where a zero means "no data" and is stored as NULL)
+_TUSHARE_TABLES = (
+    ("index_valuations", IndexValuationSnapshot, ("ts_code", "trade_date"),
+     ("ts_code", "name", "trade_date", "total_mv"), ("pe", "pb")),
+    ("fund_navs", FundNavSnapshot, ("ts_code", "nav_date"),
+     ("ts_code", "nav_date"), ("unit_nav", "accum_nav", "adj_nav")),
+)
+
+
+def _tushare_rows(items: list, fields: Tuple[str, ...], nullable: Tuple[str, ...]) -> List[dict]:
+    """Rows for ``items`` with ``fields`` copied and zero ``nullable`` fields as NULL."""
+    return [{
+        **{f: getattr(item, f) for f in fields},
+        **{f: getattr(item, f) or None for f in nullable},
+    } for item in items]
+
 
 class StorageService:
-    """Persists collector outputs to the database via upserts."""
+    """Persists collector outputs to the database via upserts.
+
+    Each store_* call commits on its own. Used as a context manager, the
+    calls inside the block share one transaction that is committed on exit
+    (rolled back on error); each upsert runs in a savepoint, so a failed
+    store does not undo the others.
+    """
 
     def __init__(self, db: Session):
         self.db = db
+        self._batched = False
+        self._today: Optional[date] = None
+
+    def set_tick_date(self, tick_date: Optional[date]) -> None:
+        """Pin the snapshot date stamped on rows (None = today at each call).
+
+        Lets one collection run store every snapshot under the same date,
+        even if it runs past midnight.
+        """
+        self._today = tick_date
+
+    def __enter__(self) -> "StorageService":
+        self._batched = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._batched = False
+        if exc_type is None:
+            self.db.commit()
+        else:
+            self.db.rollback()
 
     def _mysql_upsert(self, model, rows: List[dict], index_elements: List[str]) -> int:
         """Generic MySQL upsert using INSERT ... ON DUPLICATE KEY UPDATE."""
         if not rows:
             return 0
-        stmt = mysql_insert(model).values(rows)
-        update_cols = {
-            c.name: stmt.inserted[c.name]
-            for c in model.__table__.columns
-            if c.name not in index_elements and c.name not in ("id", "created_at")
-        }
-        stmt = stmt.on_duplicate_key_update(**update_cols)
-        self.db.execute(stmt)
-        self.db.commit()
+        stmt = _upsert_statement(model, tuple(index_elements))
+        # Page large row sets so one executemany batch stays under max_allowed_packet
+        page_size = get_settings().storage_upsert_page_size or len(rows)
+        pages = [rows[i:i + page_size] for i in range(0, len(rows), page_size)]
+        if self._batched:
+            with self.db.begin_nested():
+                for page in pages:
+                    self.db.execute(stmt, page)
+        else:
+            for page in pages:
+                self.db.execute(stmt, page)
+            self.db.commit()
         return len(rows)
 
     def store_fred_data(self, series_data: Dict[str, list]) -> int:
         """Store FRED MacroDataPoint objects."""
-        rows = []
-        for series_id, points in series_data.items():
-            for p in points:
-                rows.append({
-                    "series_id": p.series_id,
-                    "date": p.date,
-                    "value": p.value,
-                })
+        rows = [{
+            "series_id": p.series_id,
+            "date": p.date,
+            "value": p.value,
+        } for points in series_data.values() for p in points]
         return self._mysql_upsert(MacroData, rows, ["series_id", "date"])
 
     def store_yield_spread(self, spread) -> int:
@@ -83,144 +149,98 @@ class StorageService:
 
     def store_cn_macro(self, data: Dict[str, list]) -> int:
         """Store CnMacroData objects grouped by category."""
-        rows = []
-        for category, points in data.items():
-            for p in points:
-                rows.append({
-                    "indicator": p.indicator,
-                    "date": p.date,
-                    "value": p.value,
-                    "yoy_change": p.yoy_change,
-                })
+        rows = [{
+            "indicator": p.indicator,
+            "date": p.date,
+            "value": p.value,
+            "yoy_change": p.yoy_change,
+        } for points in data.values() for p in points]
         return self._mysql_upsert(CnMacroRecord, rows, ["indicator", "date"])
 
     def store_sectors(self, data: Dict[str, list]) -> int:
         """Store SectorData objects. data keys are 'industry'/'concept'."""
-        today = date.today()
-        rows = []
-        for sector_type, sectors in data.items():
-            for s in sectors:
-                rows.append({
-                    "snapshot_date": today,
-                    "sector_type": sector_type,
-                    "code": s.code,
-                    "name": s.name,
-                    "stock_count": s.stock_count,
-                    "avg_price": s.avg_price,
-                    "change_pct": s.change_pct,
-                    "volume": s.volume,
-                    "amount": s.amount,
-                    "leading_stock": s.leading_stock,
-                })
+        today = self._today or date.today()
+        rows = [{
+            "snapshot_date": today,
+            "sector_type": sector_type,
+            "code": s.code,
+            "name": s.name,
+            "stock_count": s.stock_count,
+            "avg_price": s.avg_price,
+            "change_pct": s.change_pct,
+            "volume": s.volume,
+            "amount": s.amount,
+            "leading_stock": s.leading_stock,
+        } for sector_type, sectors in data.items() for s in sectors]
         return self._mysql_upsert(SectorSnapshot, rows, ["snapshot_date", "sector_type", "code"])
 
     def store_market_indicators(self, indicators: list) -> int:
         """Store MarketIndicator objects. Skips entries with no data."""
-        rows = []
-        for ind in indicators:
-            if ind.value is None or ind.date is None:
-                continue
-            rows.append({
-                "symbol": ind.symbol,
-                "name": ind.name,
-                "value": Decimal(str(ind.value)),
-                "change_pct": Decimal(str(ind.change_pct)) if ind.change_pct is not None else None,
-                "date": ind.date,
-            })
+        rows = [{
+            "symbol": ind.symbol,
+            "name": ind.name,
+            "value": ind.value,
+            "change_pct": ind.change_pct,
+            "date": ind.date,
+        } for ind in indicators if ind.value is not None and ind.date is not None]
         return self._mysql_upsert(MarketIndicatorSnapshot, rows, ["symbol", "date"])
 
     def store_fundamentals(self, fundamentals: list) -> int:
         """Store FundamentalData objects."""
-        today = date.today()
-        rows = []
-        for f in fundamentals:
-            if f is None:
-                continue
-            rows.append({
-                "symbol": f.symbol,
-                "market": f.market,
-                "snapshot_date": today,
-                "name": f.name,
-                "market_cap": Decimal(str(f.market_cap)) if f.market_cap else None,
-                "pe_ratio": Decimal(str(f.pe_ratio)) if f.pe_ratio else None,
-                "pb_ratio": Decimal(str(f.pb_ratio)) if f.pb_ratio else None,
-                "revenue": Decimal(str(f.revenue)) if f.revenue else None,
-                "net_income": Decimal(str(f.net_income)) if f.net_income else None,
-                "revenue_growth": Decimal(str(f.revenue_growth)) if f.revenue_growth else None,
-                "profit_margin": Decimal(str(f.profit_margin)) if f.profit_margin else None,
-                "analyst_rating": f.analyst_rating,
-                "target_price": Decimal(str(f.target_price)) if f.target_price else None,
-            })
+        today = self._today or date.today()
+        # Collector floats bind straight to the DECIMAL columns; zeros are stored as NULL
+        rows = [{
+            "symbol": f.symbol,
+            "market": f.market,
+            "snapshot_date": today,
+            "name": f.name,
+            "market_cap": f.market_cap or None,
+            "pe_ratio": f.pe_ratio or None,
+            "pb_ratio": f.pb_ratio or None,
+            "revenue": f.revenue or None,
+            "net_income": f.net_income or None,
+            "revenue_growth": f.revenue_growth or None,
+            "profit_margin": f.profit_margin or None,
+            "analyst_rating": f.analyst_rating,
+            "target_price": f.target_price or None,
+        } for f in fundamentals if f is not None]
         return self._mysql_upsert(FundamentalSnapshot, rows, ["symbol", "snapshot_date"])
 
     def store_sector_flows(self, data: Dict[str, list]) -> int:
         """Store SectorFlowData objects. data keys are 'industry'/'concept'."""
-        today = date.today()
-        rows = []
-        for sector_type, flows in data.items():
-            for f in flows:
-                rows.append({
-                    "snapshot_date": today,
-                    "sector_type": sector_type,
-                    "code": f.code,
-                    "name": f.name,
-                    "main_net_inflow": f.main_net_inflow,
-                    "super_large_inflow": f.super_large_inflow,
-                    "large_inflow": f.large_inflow,
-                    "medium_inflow": f.medium_inflow,
-                    "small_inflow": f.small_inflow,
-                    "main_pct": f.main_pct,
-                })
+        today = self._today or date.today()
+        rows = [{
+            "snapshot_date": today,
+            "sector_type": sector_type,
+            "code": f.code,
+            "name": f.name,
+            "main_net_inflow": f.main_net_inflow,
+            "super_large_inflow": f.super_large_inflow,
+            "large_inflow": f.large_inflow,
+            "medium_inflow": f.medium_inflow,
+            "small_inflow": f.small_inflow,
+            "main_pct": f.main_pct,
+        } for sector_type, flows in data.items() for f in flows]
         return self._mysql_upsert(SectorFlowSnapshot, rows, ["snapshot_date", "sector_type", "code"])
 
     def store_market_breadth(self, breadth_data: list) -> int:
         """Store MarketBreadthData objects."""
-        today = date.today()
-        rows = []
-        for b in breadth_data:
-            rows.append({
-                "snapshot_date": today,
-                "index_code": b.index_code,
-                "index_name": b.index_name,
-                "close": Decimal(str(b.close)),
-                "change_pct": Decimal(str(b.change_pct)),
-                "advancing": b.advancing,
-                "declining": b.declining,
-                "unchanged": b.unchanged,
-            })
+        today = self._today or date.today()
+        rows = [{
+            "snapshot_date": today,
+            "index_code": b.index_code,
+            "index_name": b.index_name,
+            "close": b.close,
+            "change_pct": b.change_pct,
+            "advancing": b.advancing,
+            "declining": b.declining,
+            "unchanged": b.unchanged,
+        } for b in breadth_data]
         return self._mysql_upsert(MarketBreadthSnapshot, rows, ["snapshot_date", "index_code"])
 
     def store_tushare_data(self, data: dict) -> int:
         """Store TuShare fetch_all output (index valuations + fund NAVs)."""
-        total = 0
-
-        # Index valuations
-        index_vals = data.get("index_valuations", [])
-        if index_vals:
-            rows = []
-            for v in index_vals:
-                rows.append({
-                    "ts_code": v.ts_code,
-                    "name": v.name,
-                    "trade_date": v.trade_date,
-                    "pe": Decimal(str(v.pe)) if v.pe else None,
-                    "pb": Decimal(str(v.pb)) if v.pb else None,
-                    "total_mv": v.total_mv,
-                })
-            total += self._mysql_upsert(IndexValuationSnapshot, rows, ["ts_code", "trade_date"])
-
-        # Fund NAVs
-        fund_navs = data.get("fund_navs", [])
-        if fund_navs:
-            rows = []
-            for n in fund_navs:
-                rows.append({
-                    "ts_code": n.ts_code,
-                    "nav_date": n.nav_date,
-                    "unit_nav": Decimal(str(n.unit_nav)) if n.unit_nav else None,
-                    "accum_nav": Decimal(str(n.accum_nav)) if n.accum_nav else None,
-                    "adj_nav": Decimal(str(n.adj_nav)) if n.adj_nav else None,
-                })
-            total += self._mysql_upsert(FundNavSnapshot, rows, ["ts_code", "nav_date"])
-
-        return total
+        return sum(
+            self._mysql_upsert(model, _tushare_rows(data.get(key, []), fields, nullable), index_elements)
+            for key, model, index_elements, fields, nullable in _TUSHARE_TABLES
+        )
@@ -1,5 +1,7 @@
 """Telegram notification service."""
+import asyncio
 import logging
+from typing import List
 
 from src.db.models import Signal, SignalSeverity
 
@@ -14,6 +16,12 @@ SEVERITY_EMOJI = {
     SignalSeverity.CRITICAL: "🔴",
 }
 
+# (emoji, upper-case label) per severity, built once instead of per message
+SEVERITY_DISPLAY = {
+    severity: (emoji, severity.value.upper())
+    for severity, emoji in SEVERITY_EMOJI.items()
+}
+
 
 def format_signal_message(signal: Signal) -> str:
     """
@@ -25,30 +33,22 @@ def format_signal_message(signal: Signal) -> str:
     Returns:
         Formatted message string.
     """
-    emoji = SEVERITY_EMOJI.get(signal.severity, "📊")
-    severity_name = signal.severity.value.upper()
+    emoji, severity_name = SEVERITY_DISPLAY.get(signal.severity, ("📊", "UNKNOWN"))
 
-    lines = [
+    symbols = ", ".join(signal.related_symbols) if signal.related_symbols else None
+    parts = (
         f"{emoji} *{signal.title}*",
         "",
         f"📊 Severity: {severity_name}",
-    ]
-
-    if signal.sector:
-        lines.append(f"📁 Sector: {signal.sector}")
-
-    lines.append("")
-    lines.append(signal.description)
-
-    if signal.related_symbols:
-        symbols = ", ".join(signal.related_symbols)
-        lines.append("")
-        lines.append(f"🏷️ Symbols: {symbols}")
-
-    lines.append("")
-    lines.append(f"_Source: {signal.source}_")
-
-    return "\n".join(lines)
+        f"📁 Sector: {signal.sector}" if signal.sector else None,
+        "",
+        signal.description,
+        "" if symbols is not None else None,
+        f"🏷️ Symbols: {symbols}" if symbols is not None else None,
+        "",
+        f"_Source: {signal.source}_",
+    )
+    return "\n".join(p for p in parts if p is not None)
 
 
 class TelegramService:
@@ -64,21 +64,29 @@ class TelegramService:
         self._token = settings.telegram_bot_token
         self._chat_id = settings.telegram_chat_id
         self._enabled = settings.telegram_enabled
+        self._max_concurrency = settings.telegram_max_concurrency
         self._bot = None
+        self._bot_loop = None
 
     def is_enabled(self) -> bool:
         """Check if Telegram notifications are enabled."""
         return bool(self._enabled and self._token and self._chat_id)
 
     async def _get_bot(self):
-        """Get or create bot instance."""
-        if self._bot is None:
+        """Get or create the bot instance for the running event loop.
+
+        A Bot's HTTP client is bound to the loop it was first used on, so a
+        call from a new loop (e.g. the next ``asyncio.run`` tick) gets a new Bot.
+        """
+        loop = asyncio.get_running_loop()
+        if self._bot is None or self._bot_loop is not loop:
             try:
                 from telegram import Bot
-                self._bot = Bot(token=self._token)
             except ImportError:
                 logger.warning("python-telegram-bot not installed")
                 return None
+            self._bot = Bot(token=self._token)
+            self._bot_loop = loop
         return self._bot
 
     async def send_signal(self, signal: Signal) -> bool:
@@ -108,13 +116,38 @@ class TelegramService:
                 parse_mode="Markdown",
             )
 
-            logger.info(f"Sent Telegram notification for signal {signal.id}")
+            logger.info("Sent Telegram notification for signal %s", signal.id)
             return True
 
         except Exception as e:
-            logger.error(f"Error sending Telegram notification: {e}")
+            logger.error("Error sending Telegram notification: %s", e)
             return False
 
+    async def send_signals(self, signals: List[Signal]) -> List[bool]:
+        """
+        Send several signal notifications concurrently.
+
+        At most ``telegram_max_concurrency`` sends are in flight at once,
+        which keeps a burst of signals well under Telegram's rate limit.
+
+        Args:
+            signals: The signals to send.
+
+        Returns:
+            One success flag per signal, in input order.
+        """
+        if not self.is_enabled():
+            logger.debug("Telegram notifications disabled")
+            return [False] * len(signals)
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def _bounded(signal: Signal) -> bool:
+            async with semaphore:
+                return await self.send_signal(signal)
+
+        return list(await asyncio.gather(*(_bounded(s) for s in signals)))
+
     async def send_message(self, text: str) -> bool:
         """
         Send a custom message via Telegram.
@@ -141,7 +174,7 @@ class TelegramService:
             return True
 
         except Exception as e:
-            logger.error(f"Error sending Telegram message: {e}")
+            logger.error("Error sending Telegram message: %s", e)
             return False
 
 
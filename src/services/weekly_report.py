@@ -7,17 +7,21 @@ Supports:
 """
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
+from src.config import get_settings
+from src.services.llm_client import LLMClient, ModelChoice
+
 from src.db.models import (
     Holding, HoldingStatus, Tier, Market,
     Signal, SignalType, SignalSeverity, SignalStatus,
-    DailyQuote,
 )
 
 logger = logging.getLogger(__name__)
@@ -108,6 +112,24 @@ class WeeklyReport:
     action_items: List[ActionItem]
 
 
+@dataclass
+class _PortfolioContext:
+    """Active holdings with values and per-tier totals, computed once per report."""
+    holdings: List[Holding]
+    values: Dict[int, Decimal]
+    total: Decimal
+    tier_values: Dict[Tier, Decimal]
+    tier_holdings: Dict[Tier, List[Holding]]
+    tier_pcts: Dict[Tier, Decimal] = field(init=False)
+
+    def __post_init__(self):
+        # Allocation percentages shared by the summary, risk and action builders
+        self.tier_pcts = {
+            tier: (value / self.total * 100) if self.total else Decimal("0")
+            for tier, value in self.tier_values.items()
+        }
+
+
 @dataclass
 class AnalyzerSection:
     """One section from a ReportAnalyzer."""
@@ -139,6 +161,19 @@ class EnhancedReport:
 class ReportService:
     """Generate daily briefs, full weekly reports, and legacy weekly reports."""
 
+    def __init__(self):
+        settings = get_settings()
+        # One client for the service's lifetime. With llm_cache_ttl set, the
+        # same brief requested again (e.g. as JSON, then Markdown) reuses its
+        # advice instead of another LLM round-trip. No pooled() block: the
+        # API shares this service across worker threads, each on its own loop
+        self._llm = LLMClient(
+            model=ModelChoice.FAST,
+            cache_ttl=settings.llm_cache_ttl,
+            cache_path=settings.llm_cache_path,
+        )
+        self._prompt_cache_key = settings.llm_prompt_cache_key or None
+
     # ------------------------------------------------------------------
     # New enhanced report methods
     # ------------------------------------------------------------------
@@ -151,12 +186,12 @@ class ReportService:
         from src.analyzers.commodity import CommodityAnalyzer
 
         daily_analyzers = [
-            MarketEnvironmentAnalyzer(db),
-            CapitalFlowAnalyzer(db),
-            CommodityAnalyzer(db),
+            MarketEnvironmentAnalyzer,
+            CapitalFlowAnalyzer,
+            CommodityAnalyzer,
         ]
 
-        sections = self._run_analyzers(daily_analyzers)
+        sections = self._run_analyzers(db, daily_analyzers)
 
         # Generate short LLM advice
         ai_advice = self._safe_llm_advice(sections, report_type="daily")
@@ -178,39 +213,42 @@ class ReportService:
         from src.analyzers.watchlist_analyzer import WatchlistAnalyzer
 
         all_analyzers = [
-            MarketEnvironmentAnalyzer(db),
-            CapitalFlowAnalyzer(db),
-            PortfolioHealthAnalyzer(db, user_id=user_id),
-            CommodityAnalyzer(db),
-            WatchlistAnalyzer(db, user_id=user_id),
+            MarketEnvironmentAnalyzer,
+            CapitalFlowAnalyzer,
+            partial(PortfolioHealthAnalyzer, user_id=user_id),
+            CommodityAnalyzer,
+            partial(WatchlistAnalyzer, user_id=user_id),
         ]
 
-        sections = self._run_analyzers(all_analyzers)
+        sections = self._run_analyzers(db, all_analyzers)
 
-        # Build legacy data for backward compatibility
-        portfolio_summary = self._build_portfolio_summary(db, user_id=user_id)
-        signal_summary = self._build_signal_summary(db, user_id=user_id)
-        risk_alerts = self._build_risk_alerts(db, user_id=user_id)
+        # The advice only needs the analyzer sections, so request it on a worker
+        # thread while the legacy data below is built on the caller's session
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            advice_future = pool.submit(self._safe_llm_advice, sections, "weekly")
 
-        holdings_query = db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
-        if user_id is not None:
-            holdings_query = holdings_query.filter(Holding.user_id == user_id)
-        holdings = holdings_query.all()
-        week_ago = datetime.now() - timedelta(days=7)
-        signals_query = db.query(Signal).filter(
-            Signal.severity == SignalSeverity.CRITICAL,
-            Signal.status == SignalStatus.ACTIVE,
-            Signal.created_at >= week_ago,
-        )
-        if user_id is not None:
-            signals_query = signals_query.filter(Signal.user_id == user_id)
-        critical_signals = signals_query.all()
-        action_items = self._build_action_items(
-            db, holdings=holdings, critical_signals=critical_signals,
-        )
+            # One holdings query and valuation shared by every legacy builder
+            ctx = self._portfolio_context(db, self._load_holdings(db, user_id))
+
+            # Build legacy data for backward compatibility
+            portfolio_summary = self._build_portfolio_summary(db, ctx=ctx)
+            signal_summary = self._build_signal_summary(db, user_id=user_id)
+            risk_alerts = self._build_risk_alerts(db, ctx=ctx)
+
+            week_ago = datetime.now() - timedelta(days=7)
+            signals_query = db.query(Signal).filter(
+                Signal.severity == SignalSeverity.CRITICAL,
+                Signal.status == SignalStatus.ACTIVE,
+                Signal.created_at >= week_ago,
+            )
+            if user_id is not None:
+                signals_query = signals_query.filter(Signal.user_id == user_id)
+            critical_signals = signals_query.all()
+            action_items = self._build_action_items(
+                db, critical_signals=critical_signals, ctx=ctx,
+            )
 
-        # Generate full LLM advice
-        ai_advice = self._safe_llm_advice(sections, report_type="weekly")
+            ai_advice = advice_future.result()
 
         return EnhancedReport(
             report_date=date.today(),
@@ -229,15 +267,14 @@ class ReportService:
 
     def generate_report(self, db: Session, user_id: Optional[int] = None) -> WeeklyReport:
         """Generate a full weekly report (legacy format)."""
-        portfolio_summary = self._build_portfolio_summary(db, user_id=user_id)
+        # One holdings query and valuation shared by every builder
+        ctx = self._portfolio_context(db, self._load_holdings(db, user_id))
+
+        portfolio_summary = self._build_portfolio_summary(db, ctx=ctx)
         signal_summary = self._build_signal_summary(db, user_id=user_id)
-        risk_alerts = self._build_risk_alerts(db, user_id=user_id)
+        risk_alerts = self._build_risk_alerts(db, ctx=ctx)
 
         # Gather info for action items
-        holdings_query = db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
-        if user_id is not None:
-            holdings_query = holdings_query.filter(Holding.user_id == user_id)
-        holdings = holdings_query.all()
         week_ago = datetime.now() - timedelta(days=7)
         signals_query = db.query(Signal).filter(
             Signal.severity == SignalSeverity.CRITICAL,
@@ -249,7 +286,7 @@ class ReportService:
         critical_signals = signals_query.all()
 
         action_items = self._build_action_items(
-            db, holdings=holdings, critical_signals=critical_signals
+            db, critical_signals=critical_signals, ctx=ctx
         )
 
         return WeeklyReport(
@@ -264,35 +301,48 @@ class ReportService:
     # Analyzer runner
     # ------------------------------------------------------------------
 
-    def _run_analyzers(self, analyzers) -> List[AnalyzerSection]:
-        """Run a list of ReportAnalyzers and collect AnalyzerSection results.
+    def _run_analyzers(
+        self, db: Session, factories: List[Callable[[Session], object]]
+    ) -> List[AnalyzerSection]:
+        """Build ReportAnalyzers from ``factories`` and collect their sections in order.
 
-        Each analyzer is called independently; if one fails the rest still run.
+        Analyzers are independent and DB-bound, so with
+        ``report_parallel_sections`` on each one is built and run on a worker
+        thread with its own session (sessions are not thread-safe).
         """
-        sections: List[AnalyzerSection] = []
-        for analyzer in analyzers:
-            try:
-                report = analyzer.analyze()
-                sections.append(AnalyzerSection(
-                    name=report.section_name,
-                    rating=report.rating,
-                    score=report.score,
-                    summary=report.summary,
-                    details=report.details,
-                    recommendations=report.recommendations,
-                    data=report.data,
-                ))
-            except Exception:
-                logger.exception("Analyzer %s failed", getattr(analyzer, "name", type(analyzer).__name__))
-                sections.append(AnalyzerSection(
-                    name=getattr(analyzer, "name", type(analyzer).__name__),
-                    rating=None,
-                    score=None,
-                    summary="分析器运行出错，数据暂不可用。",
-                    details=[],
-                    recommendations=[],
-                ))
-        return sections
+        if len(factories) < 2 or not get_settings().report_parallel_sections:
+            return [self._run_analyzer(factory(db)) for factory in factories]
+
+        def _run(factory):
+            with Session(bind=db.get_bind(), autoflush=False) as worker_db:
+                return self._run_analyzer(factory(worker_db))
+
+        with ThreadPoolExecutor(max_workers=len(factories)) as pool:
+            return list(pool.map(_run, factories))
+
+    def _run_analyzer(self, analyzer) -> AnalyzerSection:
+        """Run one ReportAnalyzer; a failure becomes a placeholder section."""
+        try:
+            report = analyzer.analyze()
+            return AnalyzerSection(
+                name=report.section_name,
+                rating=report.rating,
+                score=report.score,
+                summary=report.summary,
+                details=report.details,
+                recommendations=report.recommendations,
+                data=report.data,
+            )
+        except Exception:
+            logger.exception("Analyzer %s failed", getattr(analyzer, "name", type(analyzer).__name__))
+            return AnalyzerSection(
+                name=getattr(analyzer, "name", type(analyzer).__name__),
+                rating=None,
+                score=None,
+                summary="分析器运行出错，数据暂不可用。",
+                details=[],
+                recommendations=[],
+            )
 
     # ------------------------------------------------------------------
     # LLM advice generation
@@ -312,8 +362,6 @@ class ReportService:
         Returns:
             LLM-generated advice string, or None on failure.
         """
-        from src.services.llm_client import LLMClient, ModelChoice
-
         # Build user message from sections
         user_parts: List[str] = []
         for section in sections:
@@ -339,12 +387,14 @@ class ReportService:
             user_message = f"以下是本周完整市场分析数据，请给出详细投资建议：\n\n{user_message}"
             max_tokens = 3000
 
-        client = LLMClient(model=ModelChoice.FAST)
         messages = [
             {"role": "system", "content": LLM_SYSTEM_PROMPT},
             {"role": "user", "content": user_message},
         ]
-        return await client.chat(messages, model=ModelChoice.FAST, max_tokens=max_tokens)
+        return await self._llm.chat(
+            messages, model=ModelChoice.FAST, max_tokens=max_tokens,
+            prompt_cache_key=self._prompt_cache_key,
+        )
 
     def _safe_llm_advice(
         self,
@@ -362,28 +412,61 @@ class ReportService:
     # Legacy builders
     # ------------------------------------------------------------------
 
-    def _get_holding_value(self, holding: Holding, db: Session) -> Decimal:
-        """Get market value of a holding. Uses latest quote or falls back to cost basis."""
-        quote = (
-            db.query(DailyQuote)
-            .filter(
-                DailyQuote.symbol == holding.symbol,
-                DailyQuote.market == holding.market,
-            )
-            .order_by(DailyQuote.trade_date.desc())
-            .first()
-        )
-        price = quote.close if quote and quote.close else holding.avg_cost
-        return holding.quantity * price
-
-    def _build_portfolio_summary(self, db: Session, user_id: Optional[int] = None) -> PortfolioSummary:
-        """Build three-tier portfolio allocation summary."""
+    def _load_holdings(self, db: Session, user_id: Optional[int] = None) -> List[Holding]:
+        """Active holdings, optionally scoped to one user."""
         query = db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
         if user_id is not None:
             query = query.filter(Holding.user_id == user_id)
-        holdings = query.all()
+        return query.all()
 
-        if not holdings:
+    def _load_latest_quotes(
+        self, db: Session, holdings: List[Holding]
+    ) -> Dict[Tuple[str, Market], Decimal]:
+        """Latest close per (symbol, market) for ``holdings``, in one windowed query."""
+        from src.services.report_generator import _get_latest_quotes_bulk
+
+        rows = _get_latest_quotes_bulk(db, ((h.symbol, h.market) for h in holdings))
+        return {key: quotes[0].close for key, quotes in rows.items() if quotes[0].close}
+
+    def _get_holding_value(
+        self, holding: Holding, quotes: Dict[Tuple[str, Market], Decimal]
+    ) -> Decimal:
+        """Get market value of a holding. Uses latest quote or falls back to cost basis."""
+        price = quotes.get((holding.symbol, holding.market)) or holding.avg_cost
+        return holding.quantity * price
+
+    def _portfolio_context(self, db: Session, holdings: List[Holding]) -> _PortfolioContext:
+        """Value ``holdings`` and bucket them by tier in a single pass."""
+        quotes = self._load_latest_quotes(db, holdings) if holdings else {}
+        values: Dict[int, Decimal] = {}
+        tier_values = {tier: Decimal("0") for tier in Tier}
+        tier_holdings: Dict[Tier, List[Holding]] = {tier: [] for tier in Tier}
+        for h in holdings:
+            value = values[h.id] = self._get_holding_value(h, quotes)
+            tier_values[h.tier] += value
+            tier_holdings[h.tier].append(h)
+        return _PortfolioContext(
+            holdings=holdings,
+            values=values,
+            total=sum(values.values(), Decimal("0")),
+            tier_values=tier_values,
+            tier_holdings=tier_holdings,
+        )
+
+    def _build_portfolio_summary(
+        self,
+        db: Session,
+        user_id: Optional[int] = None,
+        ctx: Optional[_PortfolioContext] = None,
+    ) -> PortfolioSummary:
+        """Build three-tier portfolio allocation summary.
+
+        ``ctx`` is built from the user's holdings when not given.
+        """
+        if ctx is None:
+            ctx = self._portfolio_context(db, self._load_holdings(db, user_id))
+
+        if not ctx.holdings:
             return PortfolioSummary(
                 total_value=Decimal("0"),
                 tiers=[
@@ -399,26 +482,19 @@ class ReportService:
                 ],
             )
 
-        # Calculate per-holding values
-        holding_values = {}
-        for h in holdings:
-            holding_values[h.id] = self._get_holding_value(h, db)
-
-        total_value = sum(holding_values.values())
-
+        total_value = ctx.total
         tier_data = {}
         for tier in Tier:
-            tier_holdings = [h for h in holdings if h.tier == tier]
-            tier_value = sum(holding_values.get(h.id, Decimal("0")) for h in tier_holdings)
+            tier_value = ctx.tier_values[tier]
             target = TIER_TARGETS[tier]
-            actual = (tier_value / total_value * 100) if total_value else Decimal("0")
+            actual = ctx.tier_pcts[tier]
             tier_data[tier] = TierSummary(
                 tier=tier,
                 target_pct=target,
                 actual_pct=actual,
                 deviation_pct=actual - target,
                 market_value=tier_value,
-                holdings_count=len(tier_holdings),
+                holdings_count=len(ctx.tier_holdings[tier]),
             )
 
         return PortfolioSummary(
@@ -455,28 +531,27 @@ class ReportService:
 
         return result
 
-    def _build_risk_alerts(self, db: Session, user_id: Optional[int] = None) -> List[RiskAlert]:
+    def _build_risk_alerts(
+        self,
+        db: Session,
+        user_id: Optional[int] = None,
+        ctx: Optional[_PortfolioContext] = None,
+    ) -> List[RiskAlert]:
         """Build risk alerts for current portfolio."""
-        query = db.query(Holding).filter(Holding.status == HoldingStatus.ACTIVE)
-        if user_id is not None:
-            query = query.filter(Holding.user_id == user_id)
-        holdings = query.all()
+        if ctx is None:
+            ctx = self._portfolio_context(db, self._load_holdings(db, user_id))
+        holdings = ctx.holdings
 
         if not holdings:
             return []
 
         alerts: List[RiskAlert] = []
-
-        # Calculate values
-        holding_values = {}
-        for h in holdings:
-            holding_values[h.id] = self._get_holding_value(h, db)
-        total_value = sum(holding_values.values())
+        total_value = ctx.total
 
         # 1. Concentration risk
         if total_value > 0:
             for h in holdings:
-                pct = holding_values[h.id] / total_value * 100
+                pct = ctx.values[h.id] / total_value * 100
                 if pct >= CONCENTRATION_THRESHOLD_PCT:
                     alerts.append(RiskAlert(
                         level="high",
@@ -496,9 +571,7 @@ class ReportService:
         # 3. Tier deviation
         if total_value > 0:
             for tier in Tier:
-                tier_holdings = [h for h in holdings if h.tier == tier]
-                tier_value = sum(holding_values.get(h.id, Decimal("0")) for h in tier_holdings)
-                actual_pct = tier_value / total_value * 100
+                actual_pct = ctx.tier_pcts[tier]
                 target_pct = TIER_TARGETS[tier]
                 deviation = abs(actual_pct - target_pct)
                 if deviation >= DEVIATION_ALERT_THRESHOLD:
@@ -515,26 +588,23 @@ class ReportService:
         db: Session,
         holdings: Optional[List[Holding]] = None,
         critical_signals: Optional[List[Signal]] = None,
+        ctx: Optional[_PortfolioContext] = None,
     ) -> List[ActionItem]:
-        """Build action items list."""
+        """Build action items list.
+
+        Holdings come from ``ctx`` when given, else ``holdings`` are valued here.
+        """
         items: List[ActionItem] = []
+        if ctx is None and holdings:
+            ctx = self._portfolio_context(db, holdings)
+        holdings = ctx.holdings if ctx else holdings
 
         # Check for rebalance need
         if holdings:
-            holding_values = {}
-            total = Decimal("0")
-            for h in holdings:
-                val = self._get_holding_value(h, db)
-                holding_values[h.id] = val
-                total += val
-
+            total = ctx.total
             if total > 0:
                 for tier in Tier:
-                    tier_value = sum(
-                        holding_values.get(h.id, Decimal("0"))
-                        for h in holdings if h.tier == tier
-                    )
-                    actual = tier_value / total * 100
+                    actual = ctx.tier_pcts[tier]
                     target = TIER_TARGETS[tier]
                     if abs(actual - target) >= DEVIATION_ALERT_THRESHOLD:
                         items.append(ActionItem(
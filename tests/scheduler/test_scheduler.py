@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import MagicMock, patch, call
 from datetime import datetime
 
-from src.scheduler.scheduler import SchedulerService, DEFAULT_SCHEDULE
+from src.scheduler.scheduler import SchedulerService, DEFAULT_SCHEDULE, _prefetch
 
 
 class TestSchedulerService:
@@ -139,6 +139,29 @@ class TestDefaultSchedule:
         service.stop()
 
 
+class TestPrefetch:
+    """Tests for overlapping collector fetches in collection jobs."""
+
+    def test_prefetch_runs_only_configured_collectors(self):
+        """Configured collectors run on the pool with their kwargs; others are skipped."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        configured = MagicMock()
+        configured.is_configured.return_value = True
+        unconfigured = MagicMock()
+        unconfigured.is_configured.return_value = False
+        registry = MagicMock()
+        registry.get.side_effect = {"a": configured, "b": unconfigured, "c": configured}.get
+        registry.run.side_effect = lambda name, **kwargs: (name, kwargs)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fetches = _prefetch(pool, registry, {"a": {"x": 1}, "b": {}, "c": {}, "missing": {}})
+
+            assert set(fetches) == {"a", "c"}
+            assert fetches["a"].result() == ("a", {"x": 1})
+            assert fetches["c"].result() == ("c", {})
+
+
 class TestSchedulerServiceAPI:
     """Tests for the scheduler FastAPI router."""
 
@@ -158,3 +181,47 @@ class TestSchedulerServiceAPI:
         from src.scheduler.scheduler import router
         paths = [r.path for r in router.routes]
         assert any("/jobs/{job_id}" in p for p in paths)
+
+
+class TestQuoteSync:
+    """The AM job's daily-quote sync commits with the rest of the tick."""
+
+    def test_bad_symbol_rolls_back_alone(self):
+        from datetime import date
+        from decimal import Decimal
+        from types import SimpleNamespace
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        import src.db.models_auth  # noqa: F401  (holdings.user_id -> users)
+        from src.db.database import Base
+        from src.db.models import DailyQuote, Holding, Market, Tier
+        from src.scheduler.scheduler import _collect_market_data_am
+
+        engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            for symbol in ("BAD", "GOOD"):
+                db.add(Holding(symbol=symbol, market=Market.US, tier=Tier.CORE,
+                               quantity=Decimal("1"), avg_cost=Decimal("1"),
+                               first_buy_date=date(2025, 1, 1), buy_reason="test"))
+            db.commit()
+
+        def fetch_quotes(symbol, start, end):
+            # trade_date is NOT NULL, so BAD's rows fail on flush
+            trade_date = None if symbol == "BAD" else date(2025, 1, 6)
+            return [SimpleNamespace(trade_date=trade_date, open=1, high=1, low=1, close=2, volume=10)]
+
+        registry = MagicMock()
+        registry.get.return_value = None
+        with patch("src.db.database.SessionLocal", Session), \
+                patch("src.collectors.registry.get_registry", return_value=registry), \
+                patch("src.collectors.structured.yfinance_collector.YFinanceCollector") as collector:
+            collector.return_value.fetch_quotes.side_effect = fetch_quotes
+            _collect_market_data_am()
+
+        with Session() as db:
+            assert [q.symbol for q in db.query(DailyQuote).all()] == ["GOOD"]
@@ -1,6 +1,6 @@
 """Tests for analyzer runner service."""
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 from src.services.analyzer_runner import AnalyzerRunner
 from src.analyzers.base import AnalyzerResult
@@ -68,3 +68,30 @@ class TestAnalyzerRunner:
 
         assert len(all_signals) == 1
         mock_analyzer.analyze.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_notifications_sent_as_one_batch(self, mock_db_session, mock_analyzer):
+        """Notify-worthy signals go out in one batch and are marked sent."""
+        low = MagicMock()
+        low.name = "low_analyzer"
+        low.sector = "test"
+        low.analyze.return_value = [
+            AnalyzerResult(title="Low", description="d", severity=SignalSeverity.LOW)
+        ]
+        telegram = MagicMock()
+        telegram.is_enabled.return_value = True
+        telegram.send_signals = AsyncMock(return_value=[True])
+
+        runner = AnalyzerRunner(mock_db_session, telegram_service=telegram)
+        runner.register_analyzer(mock_analyzer)
+        runner.register_analyzer(low)
+
+        signals = await runner.run_all_with_notifications()
+
+        sent = telegram.send_signals.await_args.args[0]
+        assert [s.title for s in sent] == ["Test Signal"]
+        assert signals[0].telegram_sent is True
+        assert signals[0].telegram_sent_at is not None
+        assert not signals[1].telegram_sent
+        # One commit per created signal, plus one for the sent flags
+        assert mock_db_session.commit.call_count == 3
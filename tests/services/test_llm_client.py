@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
 import pytest
 
-from src.services.llm_client import LLMClient, LLMError, ModelChoice
+from src.services.llm_client import _RESPONSE_CACHE, LLMClient, LLMError, ModelChoice
 
 
 class TestModelChoice:
@@ -117,6 +117,17 @@ class TestChat:
             call_kwargs = mock_post.call_args
             assert call_kwargs[1]["json"]["model"] == ModelChoice.QUALITY
 
+    @pytest.mark.asyncio
+    async def test_chat_sends_prompt_cache_key_only_when_given(self, client):
+        sse_body = _make_sse_response("response")
+        mock_response = httpx.Response(200, text=sse_body, request=httpx.Request("POST", "https://test.example.com"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
+            await client.chat([{"role": "user", "content": "Hi"}])
+            assert "prompt_cache_key" not in mock_post.call_args[1]["json"]
+            await client.chat([{"role": "user", "content": "Hi"}], prompt_cache_key="eam-report")
+            assert mock_post.call_args[1]["json"]["prompt_cache_key"] == "eam-report"
+
     @pytest.mark.asyncio
     async def test_chat_network_error(self, client):
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.ConnectError("fail")):
@@ -163,3 +174,73 @@ class TestChatWithSystem:
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
             await client.chat_with_system("sys", "msg", model=ModelChoice.QUALITY)
             assert mock_post.call_args[1]["json"]["model"] == ModelChoice.QUALITY
+
+
+class TestPooled:
+    @pytest.mark.asyncio
+    async def test_pooled_reuses_one_http_client(self, client):
+        sse_body = _make_sse_response("ok")
+        mock_response = httpx.Response(200, text=sse_body, request=httpx.Request("POST", "https://test.example.com"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response):
+            async with client.pooled():
+                http = client._http
+                assert http is not None
+                async with client.pooled():
+                    assert client._http is http
+                assert await client.chat([{"role": "user", "content": "Hi"}]) == "ok"
+                assert client._http is http
+            assert client._http is None
+            assert http.is_closed
+
+
+class TestResponseCache:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        _RESPONSE_CACHE.clear()
+        yield
+        _RESPONSE_CACHE.clear()
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_hit_cache(self, client):
+        client.cache_ttl = 60
+        sse_body = _make_sse_response("cached")
+        mock_response = httpx.Response(200, text=sse_body, request=httpx.Request("POST", "https://test.example.com"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
+            assert await client.chat_with_system("sys", "msg") == "cached"
+            assert await client.chat_with_system("sys", "msg") == "cached"
+            assert mock_post.call_count == 1
+            await client.chat_with_system("sys", "other")
+            assert mock_post.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled_by_default(self, client):
+        sse_body = _make_sse_response("fresh")
+        mock_response = httpx.Response(200, text=sse_body, request=httpx.Request("POST", "https://test.example.com"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
+            await client.chat_with_system("sys", "msg")
+            await client.chat_with_system("sys", "msg")
+            assert mock_post.call_count == 2
+            assert not _RESPONSE_CACHE
+
+    def test_explicit_ttl_caches_with_responses_off(self, client):
+        client.remember("derived", "value", ttl=60)
+        assert client.cached("derived") == "value"
+
+        client.remember("default", "value")
+        assert client.cached("default") is None
+
+    @pytest.mark.asyncio
+    async def test_disk_cache_survives_memory_reset(self, client, tmp_path):
+        client.cache_ttl = 60
+        client.cache_path = str(tmp_path / "llm_cache.sqlite")
+        sse_body = _make_sse_response("persisted")
+        mock_response = httpx.Response(200, text=sse_body, request=httpx.Request("POST", "https://test.example.com"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response) as mock_post:
+            assert await client.chat_with_system("sys", "msg") == "persisted"
+            _RESPONSE_CACHE.clear()  # simulate a process restart
+            assert await client.chat_with_system("sys", "msg") == "persisted"
+            assert mock_post.call_count == 1
@@ -0,0 +1,455 @@
+"""Tests for report generator helpers."""
+import json
+import threading
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import src.db.models_auth  # noqa: F401  (holdings.user_id -> users)
+from src.db.database import Base
+from src.db.models import (
+    DailyQuote, Holding, Market, Signal, SignalSeverity, SignalType, Tier,
+)
+from src.db.models_market_data import SectorFlowSnapshot, SectorSnapshot
+from src.services.llm_client import _RESPONSE_CACHE
+from src.services.report_generator import (
+    DAILY_HOLDINGS_SUMMARY_BATCH_SYSTEM_PROMPT,
+    HOLDING_MAX_TOKENS,
+    MINOR_HOLDING_MAX_TOKENS,
+    MINOR_POSITION_COMMENT,
+    DailyReportGenerator,
+    WeeklyReportGenerator,
+    report_run,
+    _cached_analyzer_report,
+    _compute_indicators,
+    _daily_summary_context,
+    _daily_summary_template,
+    _fmt_signed,
+    _get_latest_prices_bulk,
+    _get_prices_with_as_of_bulk,
+    _get_sectors_bulk,
+    _get_signals_by_symbol_bulk,
+    _get_stock_names_bulk,
+    _holding_ai_cache_key,
+    _holding_max_tokens,
+    _match_batch_results,
+    _parse_llm_json,
+    _strip_markdown_fences,
+    _quotes_to_array,
+    _weekly_northbound_section,
+    _weekly_sector_section,
+    _weekly_technical_section,
+)
+
+
+# ===== Helpers =====
+
+def _make_quotes(n, start=Decimal("10"), step=Decimal("0.25"), volume=1000):
+    """Build n date-ascending quotes with a steady uptrend."""
+    quotes = []
+    for i in range(n):
+        close = start + step * i
+        quotes.append(DailyQuote(
+            symbol="TEST",
+            market=Market.US,
+            trade_date=date(2025, 1, 1) + timedelta(days=i),
+            close=close,
+            high=close + Decimal("0.5"),
+            low=close - Decimal("0.5"),
+            volume=volume + (i % 7) * 100,
+        ))
+    return quotes
+
+
+class TestComputeIndicators:
+    def test_full_window(self):
+        # Closes 10.00 .. 24.75 in steps of 0.25
+        ind = _compute_indicators(_quotes_to_array(_make_quotes(60)))
+
+        assert ind["change_5d"] == pytest.approx((24.75 - 23.5) / 23.5 * 100)
+        assert ind["change_20d"] == pytest.approx((24.75 - 19.75) / 19.75 * 100)
+        assert ind["change_60d"] == pytest.approx(147.5)
+        assert ind["ma20"] == pytest.approx(22.375)
+        assert ind["ma60"] == pytest.approx(17.375)
+        # Last 5 days average 1240 shares, the 20 before them 1285
+        assert ind["volume_change"] == pytest.approx((1240 - 1285) / 1285 * 100)
+        assert ind["high_60d"] == pytest.approx(25.25)
+        assert ind["low_60d"] == pytest.approx(9.5)
+
+    def test_short_history(self):
+        ind = _compute_indicators(_quotes_to_array(_make_quotes(5)))
+
+        # Changes fall back to the oldest quote; windows longer than the history are None
+        assert ind["change_5d"] == ind["change_20d"] == pytest.approx(10.0)
+        assert ind["ma20"] is None
+        assert ind["ma60"] is None
+        assert ind["volume_change"] is None
+        assert (ind["high_60d"], ind["low_60d"]) == (11.5, 9.5)
+
+    @pytest.mark.parametrize("n", [0, 1])
+    def test_no_change_without_two_quotes(self, n):
+        ind = _compute_indicators(_quotes_to_array(_make_quotes(n)))
+        assert ind["change_5d"] is None
+        assert ind["high_60d"] == (10.5 if n else None)
+
+    def test_missing_close_disables_moving_average(self):
+        quotes = _make_quotes(30)
+        quotes[-3].close = None
+        ind = _compute_indicators(_quotes_to_array(quotes))
+        assert ind["ma20"] is None
+
+    def test_zero_base_close_has_no_change(self):
+        quotes = _make_quotes(10)
+        quotes[0].close = Decimal("0")
+        ind = _compute_indicators(_quotes_to_array(quotes))
+        assert ind["change_20d"] is None
+
+    def test_zero_prior_volume_has_no_volume_change(self):
+        quotes = _make_quotes(25, volume=0)
+        for q in quotes:
+            q.volume = None
+        ind = _compute_indicators(_quotes_to_array(quotes))
+        assert ind["volume_change"] is None
+
+
+class TestFmtSigned:
+    @pytest.mark.parametrize("value, decimals, expected", [
+        (1.234, 1, "+1.2"),
+        (0, 1, "+0.0"),
+        (-0.46, 1, "-0.5"),
+        (1234.5, 0, "+1234"),
+        (-12.0, 0, "-12"),
+    ])
+    def test_formats_with_sign(self, value, decimals, expected):
+        assert _fmt_signed(value, decimals) == expected
+
+
+class TestParseLlmJson:
+    @pytest.mark.parametrize("raw", [
+        '{"action": "hold"}',
+        '```json\n{"action": "hold",}\n```',
+        '```\n{"action": "hold"}```',
+        'Sure! {"action": "hold"} Hope this helps.',
+        "{'action': 'hold'}",
+    ])
+    def test_tolerates_llm_quirks(self, raw):
+        assert _parse_llm_json(raw) == {"action": "hold"}
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("```json\n[1, 2]\n```", "[1, 2]"),
+        ("```\nline one\nline two\n```", "line one\nline two"),
+        ("  plain text  ", "plain text"),
+    ])
+    def test_strip_markdown_fences(self, raw, expected):
+        assert _strip_markdown_fences(raw) == expected
+
+    def test_rejects_non_object(self):
+        with pytest.raises((ValueError, SyntaxError)):
+            _parse_llm_json("no json here")
+
+
+class TestDailySummary:
+    @staticmethod
+    def _holding(symbol, change=1.0):
+        return {"symbol": symbol, "name": symbol, "today_change_pct": change, "weight_pct": 10.0}
+
+    def test_small_portfolio_uses_template_without_llm(self):
+        holdings = [self._holding("AAA"), self._holding("BBB"), self._holding("CASH", None)]
+        assert _daily_summary_context(holdings, -120.0, -0.5) is None
+        assert _daily_summary_template(-120.0, -0.5) == "今日持仓整体下跌0.5%，盈亏-120元"
+
+    async def test_summary_rides_along_with_batched_holdings(self):
+        gen = DailyReportGenerator(db=None)
+        holdings = [self._holding(s) for s in ("AAA", "BBB", "CCC")]
+        context = _daily_summary_context(holdings, 300.0, 1.2)
+        raw = json.dumps({
+            "results": [{"symbol": h["symbol"], "ai_comment": "ok"} for h in holdings],
+            "portfolio_summary": "AI总结",
+        })
+        with patch.object(
+            gen._llm, "chat_with_system", new_callable=AsyncMock, return_value=raw
+        ) as chat:
+            results, summary = await gen._get_holdings_ai_batch(
+                holdings, ["prompt"] * len(holdings), context
+            )
+        chat.assert_awaited_once()
+        assert chat.await_args.args[0] == DAILY_HOLDINGS_SUMMARY_BATCH_SYSTEM_PROMPT
+        assert chat.await_args.args[1].endswith(f"=== PORTFOLIO ===\n{context}")
+        assert [r["ai_comment"] for r in results] == ["ok"] * 3
+        assert summary == "AI总结"
+
+
+class TestBatchResults:
+    def test_same_symbol_in_two_markets_is_matched_by_index(self):
+        entries = [{"symbol": "BABA", "market": "US"}, {"symbol": "BABA", "market": "HK"}]
+        items = [
+            {"index": 2, "symbol": "BABA", "ai_comment": "hk"},
+            {"index": "1", "symbol": "BABA", "ai_comment": "us"},
+        ]
+        assert [r["ai_comment"] for r in _match_batch_results(entries, items)] == ["us", "hk"]
+
+    def test_symbol_fallback_only_when_unambiguous(self):
+        entries = [
+            {"symbol": "AAA", "market": "US"},
+            {"symbol": "BABA", "market": "US"},
+            {"symbol": "BABA", "market": "HK"},
+        ]
+        items = [{"symbol": "AAA", "ai_comment": "a"}, {"symbol": "BABA", "ai_comment": "?"}]
+        results = _match_batch_results(entries, items)
+        assert results[0]["ai_comment"] == "a"
+        assert results[1:] == [None, None]  # retried one by one
+
+    def test_cache_key_separates_markets(self):
+        us = {"symbol": "BABA", "market": "US", "tier": "gamble", "weight_pct": 5.0}
+        hk = {**us, "market": "HK"}
+        assert _holding_ai_cache_key("prompt", us) != _holding_ai_cache_key("prompt", hk)
+
+
+class TestHoldingAiReuse:
+    async def test_unchanged_prompt_reuses_previous_analysis(self):
+        gen = DailyReportGenerator(db=None)
+        gen._llm.cache_ttl = 60
+        raw = '{"ai_comment": "稳健", "action": "hold", "ai_detail": "d"}'
+
+        def _entries():
+            return [{"symbol": "AAA", "market": "US", "weight_pct": 10.0}]
+
+        _RESPONSE_CACHE.clear()
+        try:
+            with patch.object(gen, "_prefetch_holding_context"), \
+                    patch.object(gen, "_build_holding_prompt", return_value="same prompt"), \
+                    patch.object(
+                        gen._llm, "chat_with_system", new_callable=AsyncMock, return_value=raw
+                    ) as chat:
+                first, second = _entries(), _entries()
+                await gen._enrich_with_ai(first, 0.0)
+                await gen._enrich_with_ai(second, 0.0)
+        finally:
+            _RESPONSE_CACHE.clear()
+        chat.assert_awaited_once()
+        assert second[0]["ai_comment"] == first[0]["ai_comment"] == "稳健"
+
+
+class TestHoldingMaxTokens:
+    @pytest.mark.parametrize("weight, expected", [
+        (0.3, MINOR_HOLDING_MAX_TOKENS),
+        (1.0, HOLDING_MAX_TOKENS),
+        (25.0, HOLDING_MAX_TOKENS),
+    ])
+    def test_minor_positions_get_smaller_budget(self, weight, expected):
+        assert _holding_max_tokens({"weight_pct": weight}) == expected
+
+
+class TestWeeklyPromptSections:
+    def test_optional_sections_empty_without_data(self):
+        assert _weekly_sector_section(None, None) == ""
+        assert _weekly_northbound_section({}) == ""
+
+    def test_technical_section_lists_available_changes(self):
+        indicators = {
+            "change_5d": 1.25, "change_20d": None, "change_60d": -3.0,
+            "ma20": None, "ma60": None, "volume_change": None,
+            "high_60d": 12.0, "low_60d": 10.0,
+        }
+        assert _weekly_technical_section(indicators, 11.0) == (
+            "== 技术面 ==\n"
+            "价格走势: 5日:+1.2%, 60日:-3.0%\n"
+            "60日区间: 10.00-12.00 (当前50%位置)"
+        )
+
+
+@pytest.fixture
+def db_session():
+    """Create an in-memory SQLite database session for testing."""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestWeeklyHoldingAi:
+    async def test_minor_positions_skip_llm(self):
+        gen = WeeklyReportGenerator(db=None)
+        entries = [
+            {"symbol": "AAA", "quantity": 10.0, "weight_pct": 0.2, "action": "hold", "ai_comment": ""},
+            {"symbol": "BBB", "quantity": 0.0, "weight_pct": 0.0, "action": "hold", "ai_comment": ""},
+        ]
+        with patch.object(gen, "_prefetch_holding_context") as prefetch, \
+                patch.object(gen._llm, "chat_with_system", new_callable=AsyncMock) as chat:
+            await gen._enrich_holdings_weekly_ai(entries)
+        prefetch.assert_not_called()
+        chat.assert_not_called()
+        assert [e["ai_comment"] for e in entries] == [MINOR_POSITION_COMMENT] * 2
+        assert [e["action"] for e in entries] == ["hold", "hold"]
+
+
+class TestPricesWithAsOfBulk:
+    @staticmethod
+    def _holding(symbol, avg_cost="5"):
+        return Holding(
+            symbol=symbol, market=Market.US, tier=Tier.CORE, quantity=Decimal("1"),
+            avg_cost=Decimal(avg_cost), first_buy_date=date(2025, 1, 1), buy_reason="test",
+        )
+
+    def test_latest_and_as_of_prices_from_one_lookup(self, db_session):
+        for day, close in [(1, "10"), (3, "11"), (6, "12")]:
+            db_session.add(DailyQuote(
+                symbol="AAA", market=Market.US, trade_date=date(2025, 1, day), close=Decimal(close),
+            ))
+        db_session.add(DailyQuote(
+            symbol="NEW", market=Market.US, trade_date=date(2025, 1, 6), close=Decimal("7"),
+        ))
+        db_session.commit()
+
+        holdings = [self._holding("AAA"), self._holding("NEW"), self._holding("NONE", "3")]
+        current, at_date = _get_prices_with_as_of_bulk(db_session, holdings, date(2025, 1, 4))
+
+        assert current == {
+            ("AAA", Market.US): 12.0,
+            ("NEW", Market.US): 7.0,
+            ("NONE", Market.US): 3.0,
+        }
+        assert at_date == {("AAA", Market.US): 11.0}
+        assert all(type(p) is float for p in [*current.values(), *at_date.values()])
+
+
+class TestLatestPricesBulk:
+    @staticmethod
+    def _holdings(db_session):
+        db_session.add(DailyQuote(
+            symbol="AAA", market=Market.US, trade_date=date(2025, 1, 6), close=Decimal("12"),
+        ))
+        db_session.commit()
+        return [
+            TestPricesWithAsOfBulk._holding("AAA"),
+            TestPricesWithAsOfBulk._holding("NONE", "3"),
+        ]
+
+    def test_reports_in_one_run_share_prices(self, db_session):
+        holdings = self._holdings(db_session)
+        with report_run() as run:
+            first = _get_latest_prices_bulk(db_session, holdings)
+            # A second report finds every pair cached and never touches the DB
+            second = _get_latest_prices_bulk(None, holdings)
+            assert run.latest_prices == {("AAA", Market.US): 12.0, ("NONE", Market.US): None}
+        assert first == second == {("AAA", Market.US): 12.0, ("NONE", Market.US): 3.0}
+
+        # The next run reads freshly collected data
+        db_session.query(DailyQuote).update({DailyQuote.close: Decimal("13")})
+        db_session.commit()
+        with report_run():
+            assert _get_latest_prices_bulk(db_session, holdings)[("AAA", Market.US)] == 13.0
+
+    def test_prices_are_not_shared_outside_a_run(self, db_session):
+        holdings = self._holdings(db_session)
+        _get_latest_prices_bulk(db_session, holdings)
+        db_session.query(DailyQuote).update({DailyQuote.close: Decimal("13")})
+        db_session.commit()
+
+        # A collection between two reports is picked up by the next one
+        assert _get_latest_prices_bulk(db_session, holdings)[("AAA", Market.US)] == 13.0
+
+
+class TestStockNamesBulk:
+    def test_prefetched_fundamentals_skip_the_query(self):
+        fundamentals = {("AAA", "US"): MagicMock(), ("BBB", "US"): None}
+        fundamentals[("AAA", "US")].name = "Alpha"
+        names = _get_stock_names_bulk(
+            None, [("AAA", Market.US), ("BBB", Market.US), ("CASH", Market.CN)],
+            fundamentals=fundamentals,
+        )
+        assert names == {
+            ("AAA", Market.US): "Alpha",
+            ("BBB", Market.US): "BBB",
+            ("CASH", Market.CN): "现金",
+        }
+
+
+class TestSectorsBulk:
+    def test_themes_resolve_to_exact_sector_names(self, db_session):
+        today = date.today()
+        for name, change in [("半导体", "1.5"), ("半导体设备", "9.9"), ("光伏设备", "-0.8")]:
+            db_session.add(SectorSnapshot(
+                snapshot_date=today, sector_type="industry", code=name, name=name,
+                stock_count=10, avg_price=1, change_pct=Decimal(change), volume=1, amount=1,
+                leading_stock="lead",
+            ))
+            db_session.add(SectorFlowSnapshot(
+                snapshot_date=today, sector_type="industry", code=name, name=name,
+                main_net_inflow=Decimal(change), super_large_inflow=0, large_inflow=0,
+                medium_inflow=0, small_inflow=0, main_pct=0,
+            ))
+        db_session.commit()
+
+        sectors = _get_sectors_bulk(db_session, ["半导体", "新能源", "港股科技"])
+
+        perf, flow = sectors["半导体"]
+        assert perf["change_pct"] == 1.5  # "半导体设备" is a different board
+        assert flow["net_inflow"] == 1.5
+        # Mapped through THEME_SECTORS
+        assert sectors["新能源"][0]["name"] == "光伏设备"
+        assert sectors["港股科技"] == (None, None)
+
+
+class TestSignalsBySymbolBulk:
+    def test_keeps_the_most_recent_signals_within_the_window(self, db_session):
+        now = datetime.now()
+        for age in [40, 1, 3, 2]:
+            db_session.add(Signal(
+                signal_type=SignalType.PRICE, title=f"d{age}", description="d",
+                severity=SignalSeverity.HIGH, source="test", related_symbols=["AAA"],
+                created_at=now - timedelta(days=age),
+            ))
+        db_session.commit()
+
+        signals = _get_signals_by_symbol_bulk(db_session, ["AAA", "BBB"], limit=2)
+
+        assert [s.title for s in signals["AAA"]] == ["d1", "d2"]
+        assert signals["BBB"] == []
+
+
+class TestCachedAnalyzerReport:
+    def test_reuses_report_within_a_run(self):
+        analyzer = MagicMock()
+        analyzer.name = "market_environment"
+        with report_run() as run:
+            first = _cached_analyzer_report(analyzer)
+            with report_run() as nested:
+                second = _cached_analyzer_report(analyzer)
+            # Leaving the nested block keeps the outer run's reports
+            assert nested is run
+            assert run.analyzer_reports == {"market_environment": first}
+        assert first is second
+        analyzer.analyze.assert_called_once()
+
+    def test_concurrent_runs_keep_their_own_reports(self):
+        analyzer = MagicMock()
+        analyzer.name = "market_environment"
+        analyzer.analyze.side_effect = lambda: object()
+        both_started = threading.Barrier(2)
+
+        def _one_run():
+            with report_run():
+                both_started.wait(timeout=5)
+                return _cached_analyzer_report(analyzer), _cached_analyzer_report(analyzer)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            runs = [f.result() for f in [pool.submit(_one_run), pool.submit(_one_run)]]
+
+        assert runs[0][0] is runs[0][1]
+        assert runs[1][0] is runs[1][1]
+        assert runs[0][0] is not runs[1][0]
+
+    def test_runs_analyzer_each_time_outside_a_run(self):
+        analyzer = MagicMock()
+        analyzer.name = "market_environment"
+        _cached_analyzer_report(analyzer)
+        _cached_analyzer_report(analyzer)
+        assert analyzer.analyze.call_count == 2
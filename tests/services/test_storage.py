@@ -341,6 +341,20 @@ class TestStorageServiceStoreFundamentals:
         assert result == 2
         db.execute.assert_called_once()
 
+    def test_binds_floats_and_stores_zero_as_null(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+        storage = StorageService(db)
+
+        storage.store_fundamentals([
+            MockFundamentalData(symbol="GOOG", market="US", pe_ratio=25.5, pb_ratio=0.0),
+        ])
+
+        (row,) = db.execute.call_args.args[1]
+        assert row["pe_ratio"] == 25.5 and type(row["pe_ratio"]) is float
+        assert row["pb_ratio"] is None
+        assert row["market_cap"] is None
+
     def test_skips_none_entries(self):
         from src.services.storage import StorageService
         db = MagicMock()
@@ -426,3 +440,141 @@ class TestStorageServiceStoreMarketBreadth:
 
         result = storage.store_market_breadth([])
         assert result == 0
+
+
+class TestStorageServiceStoreTushare:
+    """Tests for store_tushare_data."""
+
+    def test_stores_index_valuations_and_fund_navs(self):
+        from src.services.storage import StorageService
+        from src.db.models_market_data import FundNavSnapshot, IndexValuationSnapshot
+        db = MagicMock()
+        storage = StorageService(db)
+
+        valuation = MagicMock(ts_code="000300.SH", trade_date=date(2026, 1, 5), pe=12.5, pb=0.0,
+                              total_mv=0.0)
+        valuation.name = "沪深300"
+        nav = MagicMock(ts_code="512480.SH", nav_date=date(2026, 1, 5), unit_nav=1.28,
+                        accum_nav=0.0, adj_nav=None)
+
+        with patch.object(storage, "_mysql_upsert", return_value=1) as upsert:
+            result = storage.store_tushare_data({"index_valuations": [valuation], "fund_navs": [nav]})
+
+        assert result == 2
+        (val_call, nav_call) = upsert.call_args_list
+        assert val_call.args[0] is IndexValuationSnapshot
+        assert val_call.args[1] == [{
+            "ts_code": "000300.SH", "name": "沪深300", "trade_date": date(2026, 1, 5),
+            "total_mv": 0.0, "pe": 12.5, "pb": None,
+        }]
+        assert list(val_call.args[2]) == ["ts_code", "trade_date"]
+        assert nav_call.args[0] is FundNavSnapshot
+        assert nav_call.args[1] == [{
+            "ts_code": "512480.SH", "nav_date": date(2026, 1, 5),
+            "unit_nav": 1.28, "accum_nav": None, "adj_nav": None,
+        }]
+        assert list(nav_call.args[2]) == ["ts_code", "nav_date"]
+
+    def test_missing_keys_store_nothing(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+        storage = StorageService(db)
+
+        assert storage.store_tushare_data({}) == 0
+        db.execute.assert_not_called()
+
+
+class TestStorageServiceBatched:
+    """Tests for the one-commit-per-tick context manager."""
+
+    def test_commits_once_on_exit(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+
+        with StorageService(db) as storage:
+            storage.store_yield_spread(MockYieldSpread(
+                date(2026, 1, 15), Decimal("4.10"), Decimal("4.50"), Decimal("0.40"),
+            ))
+            storage.store_market_indicators([
+                MockMarketIndicator("^VIX", "VIX", 18.5, -2.3, date(2026, 1, 15)),
+            ])
+            db.commit.assert_not_called()
+
+        assert db.execute.call_count == 2
+        assert db.begin_nested.call_count == 2
+        db.commit.assert_called_once()
+
+    def test_rolls_back_on_error(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+
+        with pytest.raises(RuntimeError):
+            with StorageService(db):
+                raise RuntimeError("collector failed")
+
+        db.rollback.assert_called_once()
+        db.commit.assert_not_called()
+
+
+class TestStorageServicePaging:
+    """Tests for paging large upserts."""
+
+    def test_large_upserts_are_split_into_pages(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+        storage = StorageService(db)
+
+        indicators = [
+            MockMarketIndicator(f"SYM{i}", "x", 1.0, 0.1, date(2026, 1, 15)) for i in range(5)
+        ]
+        with patch("src.services.storage.get_settings") as settings:
+            settings.return_value.storage_upsert_page_size = 2
+            result = storage.store_market_indicators(indicators)
+
+        assert result == 5
+        assert db.execute.call_count == 3
+        db.commit.assert_called_once()
+
+    def test_rows_are_bound_to_a_reused_statement(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+        storage = StorageService(db)
+
+        storage.store_market_indicators([
+            MockMarketIndicator("^VIX", "VIX", 18.5, -2.3, date(2026, 1, 15)),
+        ])
+        storage.store_market_indicators([
+            MockMarketIndicator("^VIX", "VIX", 19.0, 2.7, date(2026, 1, 15)),
+        ])
+
+        (first_stmt, first_rows), (second_stmt, _) = [c.args for c in db.execute.call_args_list]
+        assert first_stmt is second_stmt
+        assert [r["symbol"] for r in first_rows] == ["^VIX"]
+
+
+class TestStorageServiceTickDate:
+    """Tests for pinning the snapshot date of a collection run."""
+
+    def test_tick_date_is_stamped_on_snapshots(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+        storage = StorageService(db)
+        storage.set_tick_date(date(2026, 1, 15))
+
+        storage.store_market_breadth([
+            MockMarketBreadthData("000001.SH", "上证", 3000.0, 0.1, 1000, 800, 100),
+        ])
+
+        (row,) = db.execute.call_args.args[1]
+        assert row["snapshot_date"] == date(2026, 1, 15)
+
+    def test_defaults_to_today(self):
+        from src.services.storage import StorageService
+        db = MagicMock()
+
+        StorageService(db).store_market_breadth([
+            MockMarketBreadthData("000001.SH", "上证", 3000.0, 0.1, 1000, 800, 100),
+        ])
+
+        (row,) = db.execute.call_args.args[1]
+        assert row["snapshot_date"] == date.today()
@@ -1,8 +1,10 @@
 """Tests for Telegram service."""
+import asyncio
+
 import pytest
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
-from src.services.telegram import TelegramService, format_signal_message
+from src.services.telegram import SEVERITY_DISPLAY, TelegramService, format_signal_message
 from src.db.models import Signal, SignalType, SignalSeverity
 
 
@@ -46,6 +48,52 @@ class TestFormatSignalMessage:
         assert "CRITICAL" in message
         assert "Stop Loss" in message
 
+    @pytest.mark.parametrize("severity", list(SignalSeverity))
+    def test_every_severity_has_display(self, severity):
+        """Each severity renders its emoji and upper-case label."""
+        signal = Signal(
+            signal_type=SignalType.PRICE,
+            title="T",
+            description="D",
+            severity=severity,
+            source="s",
+        )
+
+        message = format_signal_message(signal)
+
+        emoji, label = SEVERITY_DISPLAY[severity]
+        assert message.startswith(f"{emoji} *T*")
+        assert f"Severity: {severity.value.upper()}" in message
+        assert label == severity.value.upper()
+
+    def test_layout_skips_missing_sector_and_symbols(self):
+        """Optional sector and symbol lines are left out entirely."""
+        signal = Signal(
+            signal_type=SignalType.PRICE,
+            title="T",
+            description="D",
+            severity=SignalSeverity.LOW,
+            source="s",
+        )
+
+        assert format_signal_message(signal) == "🔵 *T*\n\n📊 Severity: LOW\n\nD\n\n_Source: s_"
+
+    def test_layout_with_sector_and_symbols(self):
+        """Sector follows severity; symbols get their own paragraph."""
+        signal = Signal(
+            signal_type=SignalType.SECTOR,
+            sector="tech",
+            title="T",
+            description="D",
+            severity=SignalSeverity.HIGH,
+            source="s",
+            related_symbols=["A", "B"],
+        )
+
+        assert format_signal_message(signal) == (
+            "🟠 *T*\n\n📊 Severity: HIGH\n📁 Sector: tech\n\nD\n\n🏷️ Symbols: A, B\n\n_Source: s_"
+        )
+
 
 class TestTelegramService:
     """Tests for TelegramService."""
@@ -57,6 +105,7 @@ class TestTelegramService:
         settings.telegram_bot_token = "test_token"
         settings.telegram_chat_id = "123456"
         settings.telegram_enabled = True
+        settings.telegram_max_concurrency = 2
         return settings
 
     def test_service_disabled_when_no_token(self):
@@ -93,3 +142,65 @@ class TestTelegramService:
 
         result = await service.send_signal(signal)
         assert result is False
+
+    @pytest.mark.asyncio
+    async def test_send_signals_bounds_concurrency(self, mock_settings):
+        """Batched sends keep at most telegram_max_concurrency in flight."""
+        service = TelegramService(mock_settings)
+        in_flight = peak = 0
+
+        async def fake_send(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if "fail" in kwargs["text"]:
+                raise RuntimeError("boom")
+
+        service._bot = Mock(send_message=AsyncMock(side_effect=fake_send))
+        service._bot_loop = asyncio.get_running_loop()
+        signals = [
+            Signal(
+                id=i,
+                signal_type=SignalType.PRICE,
+                title="fail" if i == 3 else f"S{i}",
+                description="d",
+                severity=SignalSeverity.HIGH,
+                source="test",
+            )
+            for i in range(6)
+        ]
+
+        results = await service.send_signals(signals)
+
+        assert results == [True, True, True, False, True, True]
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_send_signals_when_disabled(self):
+        """Disabled service reports every signal as unsent."""
+        settings = Mock()
+        settings.telegram_bot_token = ""
+        settings.telegram_chat_id = ""
+        settings.telegram_enabled = False
+
+        service = TelegramService(settings)
+
+        assert await service.send_signals([Mock(), Mock()]) == [False, False]
+
+    @pytest.mark.asyncio
+    async def test_bot_reused_within_a_loop(self, mock_settings):
+        """Sends on one event loop share the service's Bot."""
+        service = TelegramService(mock_settings)
+
+        assert await service._get_bot() is await service._get_bot()
+
+    def test_new_bot_per_event_loop(self, mock_settings):
+        """A Bot is never reused on a loop other than the one that created it."""
+        service = TelegramService(mock_settings)
+
+        first = asyncio.run(service._get_bot())
+        second = asyncio.run(service._get_bot())
+
+        assert first is not second
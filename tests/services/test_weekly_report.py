@@ -135,7 +135,10 @@ class TestWeeklyReportService:
 
     @pytest.fixture
     def service(self):
-        return WeeklyReportService()
+        service = WeeklyReportService()
+        # Latest closes by (symbol, market); empty means every holding is valued at cost
+        service._load_latest_quotes = Mock(return_value={})
+        return service
 
     @pytest.fixture
     def mock_db(self):
@@ -155,8 +158,7 @@ class TestWeeklyReportService:
         holdings = [_make_holding(tier=Tier.CORE, quantity=Decimal("100"), avg_cost=Decimal("100"))]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
         # Mock latest quotes
-        quote = _make_quote(symbol="AAPL", close=Decimal("100"))
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = quote
+        service._load_latest_quotes.return_value = {("AAPL", Market.US): Decimal("100")}
 
         summary = service._build_portfolio_summary(mock_db)
         assert summary.total_value == Decimal("10000")
@@ -168,11 +170,26 @@ class TestWeeklyReportService:
         """When no quote available, use avg_cost * quantity as value."""
         holdings = [_make_holding(tier=Tier.CORE, quantity=Decimal("10"), avg_cost=Decimal("50"))]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         summary = service._build_portfolio_summary(mock_db)
         assert summary.total_value == Decimal("500")
 
+    def test_build_portfolio_summary_prefers_latest_quote(self, service, mock_db):
+        """Latest close overrides cost basis, looked up by (symbol, market)."""
+        holdings = [
+            _make_holding(id=1, symbol="AAPL", quantity=Decimal("10"), avg_cost=Decimal("50")),
+            _make_holding(id=2, symbol="00700", market=Market.HK, quantity=Decimal("10"),
+                          avg_cost=Decimal("30")),
+        ]
+        mock_db.query.return_value.filter.return_value.all.return_value = holdings
+        service._load_latest_quotes.return_value = {
+            ("AAPL", Market.US): Decimal("60"),
+            ("00700", Market.US): Decimal("999"),  # same symbol, other market
+        }
+
+        summary = service._build_portfolio_summary(mock_db)
+        assert summary.total_value == Decimal("900")
+
     def test_build_portfolio_summary_multi_tier(self, service, mock_db):
         """Multiple tiers compute correct percentages."""
         holdings = [
@@ -182,7 +199,6 @@ class TestWeeklyReportService:
         ]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
         # No quotes - use cost basis
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         summary = service._build_portfolio_summary(mock_db)
         assert summary.total_value == Decimal("10000")
@@ -236,7 +252,6 @@ class TestWeeklyReportService:
         """Single holding at 100% triggers concentration alert."""
         holdings = [_make_holding(tier=Tier.CORE, quantity=Decimal("100"), avg_cost=Decimal("100"))]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         result = service._build_risk_alerts(mock_db)
         assert any("concentration" in a.message.lower() or "集中" in a.message for a in result)
@@ -245,7 +260,6 @@ class TestWeeklyReportService:
         """Holdings without stop loss trigger alert."""
         holdings = [_make_holding(stop_loss_price=None)]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         result = service._build_risk_alerts(mock_db)
         assert any("stop" in a.message.lower() or "止损" in a.message for a in result)
@@ -255,7 +269,6 @@ class TestWeeklyReportService:
         # All in gamble tier
         holdings = [_make_holding(tier=Tier.GAMBLE, quantity=Decimal("100"), avg_cost=Decimal("100"))]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         result = service._build_risk_alerts(mock_db)
         assert any("偏离" in a.message or "deviation" in a.message.lower() or "再平衡" in a.message for a in result)
@@ -266,7 +279,6 @@ class TestWeeklyReportService:
         """Deviation triggers rebalance action item."""
         holdings = [_make_holding(tier=Tier.GAMBLE, quantity=Decimal("100"), avg_cost=Decimal("100"))]
         mock_db.query.return_value.filter.return_value.all.return_value = holdings
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         # Also need signals query for action items
         result = service._build_action_items(mock_db, holdings=holdings)
@@ -286,12 +298,24 @@ class TestWeeklyReportService:
     def test_generate_report_returns_weekly_report(self, service, mock_db):
         """generate_report returns a WeeklyReport instance."""
         mock_db.query.return_value.filter.return_value.all.return_value = []
-        mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
 
         report = service.generate_report(mock_db)
         assert isinstance(report, WeeklyReport)
         assert report.report_date == date.today()
 
+    def test_generate_report_loads_quotes_once(self, service, mock_db):
+        """All builders share one quote lookup."""
+        holdings = [_make_holding(tier=Tier.GAMBLE, quantity=Decimal("100"), avg_cost=Decimal("100"))]
+        mock_db.query.return_value.filter.return_value.all.return_value = holdings
+
+        with patch.object(service, "_build_signal_summary", return_value=[]):
+            report = service.generate_report(mock_db)
+
+        service._load_latest_quotes.assert_called_once_with(mock_db, holdings)
+        assert report.portfolio_summary.total_value == Decimal("10000")
+        assert report.risk_alerts
+        assert report.action_items
+
     # --- format_as_text ---
 
     def test_format_as_text(self, service):
@@ -365,3 +389,141 @@ class TestWeeklyReportService:
         text = service.format_as_text(report)
         assert isinstance(text, str)
         assert len(text) > 0
+
+
+class TestLoadLatestQuotes:
+    """Tests for the batched latest-quote lookup."""
+
+    def test_latest_close_per_symbol_and_market(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.db.database import Base
+        import src.db.models_auth  # noqa: F401  (holdings.user_id -> users)
+
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        today = date.today()
+        db.add_all([
+            _make_quote("AAPL", Market.US, Decimal("150"), today - timedelta(days=1)),
+            _make_quote("AAPL", Market.US, Decimal("160"), today),
+            _make_quote("AAPL", Market.HK, Decimal("9"), today),
+            _make_quote("ZERO", Market.US, Decimal("0"), today),
+        ])
+        db.commit()
+        holdings = [
+            _make_holding(id=1, symbol="AAPL"),
+            _make_holding(id=2, symbol="ZERO"),
+            _make_holding(id=3, symbol="NONE"),
+        ]
+
+        try:
+            quotes = WeeklyReportService()._load_latest_quotes(db, holdings)
+        finally:
+            db.close()
+
+        assert quotes == {("AAPL", Market.US): Decimal("160")}
+
+
+class TestRunAnalyzers:
+    """Tests for running report analyzers."""
+
+    class _FakeAnalyzer:
+        def __init__(self, db, name="fake", fail=False):
+            self.db = db
+            self.name = name
+            self.fail = fail
+
+        def analyze(self):
+            if self.fail:
+                raise RuntimeError("boom")
+            return Mock(section_name=self.name, rating="A", score=80, summary="s",
+                        details=[], recommendations=[], data={"db": self.db})
+
+    def _factories(self):
+        from functools import partial
+        return [
+            partial(self._FakeAnalyzer, name="one"),
+            partial(self._FakeAnalyzer, name="two", fail=True),
+            partial(self._FakeAnalyzer, name="three"),
+        ]
+
+    def test_parallel_runs_keep_order_and_use_own_sessions(self):
+        db = MagicMock()
+        with patch("src.services.weekly_report.get_settings") as settings:
+            settings.return_value.report_parallel_sections = True
+            sections = WeeklyReportService()._run_analyzers(db, self._factories())
+
+        assert [s.name for s in sections] == ["one", "two", "three"]
+        assert sections[1].rating is None  # failure isolated to its own section
+        assert all(s.data["db"] is not db for s in (sections[0], sections[2]))
+
+    def test_sequential_runs_share_the_session(self):
+        db = MagicMock()
+        with patch("src.services.weekly_report.get_settings") as settings:
+            settings.return_value.report_parallel_sections = False
+            sections = WeeklyReportService()._run_analyzers(db, self._factories())
+
+        assert [s.name for s in sections] == ["one", "two", "three"]
+        assert sections[0].data["db"] is db
+
+
+class TestLlmAdvice:
+    """Tests for the report advice LLM call."""
+
+    def test_repeated_advice_is_served_from_cache(self):
+        import json
+        import httpx
+        from unittest.mock import AsyncMock
+        from src.services.llm_client import _RESPONSE_CACHE
+        from src.services.weekly_report import AnalyzerSection
+
+        service = WeeklyReportService()
+        service._llm.cache_ttl = 60
+        service._llm.cache_path = ""
+        sections = [AnalyzerSection(name="宏观", rating="A", score=80, summary="s",
+                                    details=[], recommendations=["r"])]
+        body = "data: " + json.dumps({"type": "response", "data": {
+            "choices": [{"message": {"role": "assistant", "content": "建议"}}],
+        }}) + "\n\n"
+        response = httpx.Response(200, text=body, request=httpx.Request("POST", "https://x"))
+
+        _RESPONSE_CACHE.clear()
+        try:
+            with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=response) as post:
+                first = service._safe_llm_advice(sections, report_type="daily")
+                second = service._safe_llm_advice(sections, report_type="daily")
+        finally:
+            _RESPONSE_CACHE.clear()
+
+        assert first == second == "建议"
+        post.assert_awaited_once()
+
+    def test_weekly_advice_overlaps_legacy_builders(self):
+        import threading
+        from src.services.weekly_report import _PortfolioContext
+
+        service = WeeklyReportService()
+        requested = threading.Event()
+
+        def advice(sections, report_type):
+            requested.set()
+            return "建议"
+
+        # The signal summary only completes if the advice was already requested
+        def signal_summary(db, user_id=None):
+            return {"overlapped": requested.wait(timeout=2)}
+
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = []
+        ctx = _PortfolioContext(holdings=[], values={}, total=Decimal("0"),
+                                tier_values={}, tier_holdings={})
+        with patch.object(service, "_run_analyzers", return_value=[]), \
+                patch.object(service, "_portfolio_context", return_value=ctx), \
+                patch.object(service, "_load_holdings", return_value=[]), \
+                patch.object(service, "_safe_llm_advice", side_effect=advice), \
+                patch.object(service, "_build_signal_summary", side_effect=signal_summary):
+            report = service.generate_weekly_report(db)
+
+        assert report.ai_advice == "建议"
+        assert report.signal_summary == {"overlapped": True}